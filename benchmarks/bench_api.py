@@ -0,0 +1,142 @@
+"""
+HTTP load against a local uvicorn: the previous sync `def` handlers vs the async API.
+
+    python -m benchmarks.bench_api [--players 2000] [--clients 32] [--seconds 5] [--write-ratio 0.05]
+
+Each server runs in its own process on a throwaway database. Clients issue a
+mix of GET /players/{id}, GET /players?limit=50 pages and POST /players.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from benchmarks.bench_db import make_database
+from core.player import PlayerRegistry
+from core.api import PlayerCreate
+
+# The old handler shapes, kept as the baseline. Imported by the uvicorn worker
+# as benchmarks.bench_api:sync_app with BADMINTON_DB set.
+sync_app = FastAPI()
+_sync_registry = PlayerRegistry()
+
+
+@sync_app.get("/players")
+def _sync_list(limit: int = 50):
+    rows, _ = _sync_registry.players_page(limit)
+    return rows
+
+
+@sync_app.get("/players/{player_id}")
+def _sync_get(player_id: str):
+    rows = _sync_registry.get_player(player_id=player_id)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Player not found")
+    return rows[0]
+
+
+@sync_app.post("/players", status_code=201)
+def _sync_create(payload: PlayerCreate):
+    return _sync_registry.register_player(payload.first_name, payload.surname, payload.rating, payload.elo)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(app: str, db_path: Path, port: int) -> subprocess.Popen:
+    env = {**os.environ, "BADMINTON_DB": str(db_path)}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/players/none", timeout=1)
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{app} did not start")
+
+
+async def _load(port: int, ids: list[str], clients: int, seconds: float, write_ratio: float) -> dict[str, float]:
+    latencies: list[float] = []
+    errors = 0
+    stop = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30) as client:
+
+        async def worker(slot: int) -> None:
+            nonlocal errors
+            rng = random.Random(slot)
+            while time.monotonic() < stop:
+                roll = rng.random()
+                t0 = time.perf_counter()
+                if roll < write_ratio:
+                    r = await client.post("/players", json={"first_name": f"Load{slot}", "surname": "Client"})
+                elif roll < write_ratio + 0.15:
+                    r = await client.get("/players", params={"limit": 50})
+                else:
+                    r = await client.get(f"/players/{rng.choice(ids)}")
+                latencies.append(time.perf_counter() - t0)
+                errors += r.status_code >= 400
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+        elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": float(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    args = parser.parse_args()
+
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, app in (("sync", "benchmarks.bench_api:sync_app"), ("async", "core.api:app")):
+            path = Path(tmp) / f"{label}.db"
+            ids = make_database(path, args.players)
+            port = _free_port()
+            proc = _start_server(app, path, port)
+            try:
+                results[label] = asyncio.run(_load(port, ids, args.clients, args.seconds, args.write_ratio))
+            finally:
+                proc.terminate()
+                proc.wait()
+
+    print(f"{args.players} players, {args.clients} clients, {args.seconds:.0f} s, {args.write_ratio:.0%} writes\n")
+    print(f"{'':<8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for label, r in results.items():
+        print(f"{label:<8}{r['rps']:>10.0f}{r['p50']:>10.1f}{r['p99']:>10.1f}{r['errors']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
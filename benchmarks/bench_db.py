@@ -0,0 +1,170 @@
+"""
+Requests per second through PlayerRegistry: fresh connection per call vs ConnectionManager.
+
+    python -m benchmarks.bench_db [--players 1000] [--ops 5000] [--threads 4] [--seconds 2]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from core.db import ConnectionManager
+from core.migrations import migrate
+from core.player import PlayerRegistry
+
+
+class PerCallConnections:
+    """The old behaviour: every registry call opens (and pays for) a new connection."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        pass
+
+
+def make_database(path: Path, players: int) -> list[str]:
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.execute("PRAGMA journal_mode = DELETE")
+    ids = [f"P{i:06d}" for i in range(players)]
+    conn.executemany(
+        "INSERT INTO players (id, first_name, surname, rating) VALUES (?, ?, ?, 'E')",
+        [(pid, f"First{i}", f"Surname{i}") for i, pid in enumerate(ids)],
+    )
+    conn.commit()
+    conn.close()
+    return ids
+
+
+def _rate(ops: int, seconds: float) -> float:
+    return ops / seconds if seconds > 0 else float("inf")
+
+
+def bench_sequential(registry: PlayerRegistry, ids: list[str], ops: int) -> dict[str, float]:
+    rng = random.Random(0)
+
+    t0 = time.perf_counter()
+    for _ in range(ops):
+        registry.get_player(player_id=rng.choice(ids))
+    get_rps = _rate(ops, time.perf_counter() - t0)
+
+    list_ops = max(1, ops // 50)
+    t0 = time.perf_counter()
+    for _ in range(list_ops):
+        registry.list_players()
+    list_rps = _rate(list_ops, time.perf_counter() - t0)
+
+    update_ops = max(1, ops // 10)
+    t0 = time.perf_counter()
+    for i in range(update_ops):
+        registry.update_player(rng.choice(ids), rating="DE"[i % 2])
+    update_rps = _rate(update_ops, time.perf_counter() - t0)
+
+    return {"get_player": get_rps, "list_players": list_rps, "update_player": update_rps}
+
+
+def bench_concurrent(registry: PlayerRegistry, ids: list[str], threads: int, seconds: float) -> dict[str, float]:
+    """`threads` readers calling get_player while one writer calls update_player."""
+    stop = threading.Event()
+    reads = [0] * threads
+    writes = [0]
+    errors: list[Exception] = []
+
+    def reader(slot: int) -> None:
+        rng = random.Random(slot)
+        try:
+            while not stop.is_set():
+                registry.get_player(player_id=rng.choice(ids))
+                reads[slot] += 1
+        except Exception as e:  # e.g. "database is locked" on the old path
+            errors.append(e)
+
+    def writer() -> None:
+        rng = random.Random(-1)
+        try:
+            while not stop.is_set():
+                registry.update_player(rng.choice(ids), rating="DE"[writes[0] % 2])
+                writes[0] += 1
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+    workers.append(threading.Thread(target=writer))
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    time.sleep(seconds)
+    stop.set()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "reads": _rate(sum(reads), elapsed),
+        "writes": _rate(writes[0], elapsed),
+        "errors": float(len(errors)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--ops", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results: dict[str, dict[str, float]] = {}
+        for label, factory in (
+            ("per-call", PerCallConnections),
+            ("pooled", ConnectionManager),
+        ):
+            path = Path(tmp) / f"{label}.db"
+            ids = make_database(path, args.players)
+            db = factory(path)
+            registry = PlayerRegistry(db)
+            results[label] = bench_sequential(registry, ids, args.ops)
+            results[label].update(
+                {f"concurrent {k}": v for k, v in bench_concurrent(registry, ids, args.threads, args.seconds).items()}
+            )
+            db.close()
+
+    before, after = results["per-call"], results["pooled"]
+    print(f"{args.players} players, {args.ops} ops, {args.threads} reader threads + 1 writer\n")
+    print(f"{'req/s':<28}{'per-call':>12}{'pooled':>12}{'speedup':>10}")
+    for key in before:
+        speedup = after[key] / before[key] if before[key] else float("nan")
+        suffix = "" if key.endswith("errors") else f"{speedup:>9.1f}x"
+        print(f"{key:<28}{before[key]:>12.0f}{after[key]:>12.0f}{suffix}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Doubles matchmaking: the old adjacent-pair greedy vs the constrained optimiser.
+
+    python -m benchmarks.bench_matchmaking [--attendees 200] [--courts 30] [--runs 20] [--max-checks 400]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from core.constants import MATCHMAKING_MAX_SWAP_CHECKS, MAX_PARTNER_GAP, MAX_TEAM_DIFF
+from engine.matchmaking import Match, _elo, make_balanced_doubles
+
+
+def make_players(n: int, rng: random.Random) -> list[dict]:
+    return [
+        {"id": f"P{i:04d}", "first_name": f"First{i}", "surname": f"Surname{i}", "boosted": rng.gauss(1500, 250)}
+        for i in range(n)
+    ]
+
+
+def greedy_doubles(players: list[dict], courts: int) -> list[tuple[tuple[float, float], tuple[float, float]]]:
+    """The previous algorithm: sort, bench the lowest, pair neighbours, pair neighbouring pairs."""
+    elos = sorted((_elo(p) for p in players), reverse=True)[: courts * 4]
+    elos = elos[: len(elos) // 4 * 4]
+    return [((elos[i], elos[i + 1]), (elos[i + 2], elos[i + 3])) for i in range(0, len(elos), 4)]
+
+
+def score(teams: list[tuple[tuple[float, float], tuple[float, float]]]) -> dict[str, float]:
+    imbalance = partner_violations = team_violations = 0.0
+    for (a, b), (c, d) in teams:
+        diff = abs((a + b) - (c + d)) / 2
+        imbalance += diff
+        partner_violations += (abs(a - b) > MAX_PARTNER_GAP) + (abs(c - d) > MAX_PARTNER_GAP)
+        team_violations += diff > MAX_TEAM_DIFF
+    return {"imbalance": imbalance, "partner_violations": partner_violations, "team_violations": team_violations}
+
+
+def optimised_teams(players: list[dict], matches: list[Match]) -> list[tuple[tuple[float, float], tuple[float, float]]]:
+    by_name = {f"{p['first_name']} {p['surname']}": _elo(p) for p in players}
+    return [
+        ((by_name[m.team1[0]], by_name[m.team1[1]]), (by_name[m.team2[0]], by_name[m.team2[1]]))
+        for m in matches
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attendees", type=int, default=200)
+    parser.add_argument("--courts", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--max-checks", type=int, default=MATCHMAKING_MAX_SWAP_CHECKS)
+    args = parser.parse_args()
+
+    rows: dict[str, list[dict[str, float]]] = {"greedy": [], "optimised": []}
+    for run in range(args.runs):
+        rng = random.Random(run)
+        players = make_players(args.attendees, rng)
+
+        t0 = time.perf_counter()
+        teams = greedy_doubles(players, args.courts)
+        rows["greedy"].append({**score(teams), "ms": (time.perf_counter() - t0) * 1000})
+
+        t0 = time.perf_counter()
+        matches, _ = make_balanced_doubles(players, seed=run, courts=args.courts, max_swap_checks=args.max_checks)
+        elapsed = (time.perf_counter() - t0) * 1000
+        rows["optimised"].append({**score(optimised_teams(players, matches)), "ms": elapsed})
+
+    print(f"{args.attendees} attendees, {args.courts} courts, {args.runs} runs (mean per run; ms also max)\n")
+    print(f"{'':<12}{'imbalance':>12}{'partner viol':>14}{'team viol':>11}{'ms':>9}{'max ms':>9}")
+    for label, results in rows.items():
+        mean = {k: statistics.fmean(r[k] for r in results) for k in results[0]}
+        worst = max(r["ms"] for r in results)
+        print(
+            f"{label:<12}{mean['imbalance']:>12.1f}{mean['partner_violations']:>14.2f}"
+            f"{mean['team_violations']:>11.2f}{mean['ms']:>9.2f}{worst:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
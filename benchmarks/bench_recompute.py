@@ -0,0 +1,122 @@
+"""
+Rating replay over a synthetic match history: full rebuild vs checkpointed incremental recompute.
+
+    python -m benchmarks.bench_recompute [--matches 1000000] [--players 2000] [--per-session 60]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import resource
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from core.db import ConnectionManager
+from core.migrations import migrate
+from core.player import PlayerRegistry
+from engine.recompute import recompute_ratings
+
+
+def make_history(path: Path, *, matches: int, players: int, per_session: int, seed: int = 0) -> None:
+    """Doubles club nights: `per_session` completed matches per session, winners biased toward stronger teams."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    ids = [f"P{i:06d}" for i in range(players)]
+    skill = {pid: rng.gauss(1500, 200) for pid in ids}
+    conn.executemany(
+        "INSERT INTO players (id, first_name, surname, rating) VALUES (?, ?, ?, 'E')",
+        [(pid, f"First{i}", f"Surname{i}") for i, pid in enumerate(ids)],
+    )
+
+    match_rows: list[tuple] = []
+    player_rows: list[tuple] = []
+
+    def flush() -> None:
+        conn.executemany(
+            """INSERT INTO matches (id, session_id, court_id, format, team1_ids, team2_ids,
+                                    score_team1, score_team2, status)
+            VALUES (?, ?, ?, 'doubles', ?, ?, ?, ?, 'completed')""",
+            match_rows,
+        )
+        conn.executemany("INSERT INTO match_players (match_id, player_id, team) VALUES (?, ?, ?)", player_rows)
+        match_rows.clear()
+        player_rows.clear()
+
+    sessions = (matches + per_session - 1) // per_session
+    n = 0
+    for s in range(sessions):
+        session_id = f"S{s:06d}"
+        conn.execute(
+            "INSERT INTO sessions (id, date, start_time, end_time) VALUES (?, '2024-01-01', '19:00', '22:00')",
+            (session_id,),
+        )
+        court_id = conn.execute(
+            "INSERT INTO courts (session_id, court_number) VALUES (?, 1)", (session_id,)
+        ).lastrowid
+        attendees = rng.sample(ids, min(len(ids), 40))
+        for _ in range(min(per_session, matches - n)):
+            a, b, c, d = rng.sample(attendees, 4)
+            team1_strength = skill[a] + skill[b] + rng.gauss(0, 150)
+            team2_strength = skill[c] + skill[d] + rng.gauss(0, 150)
+            score1, score2 = (21, rng.randint(5, 19)) if team1_strength > team2_strength else (rng.randint(5, 19), 21)
+            match_id = f"M{n:08d}"
+            match_rows.append((match_id, session_id, court_id, f"{a},{b}", f"{c},{d}", score1, score2))
+            player_rows.extend([(match_id, a, 1), (match_id, b, 1), (match_id, c, 2), (match_id, d, 2)])
+            n += 1
+        if len(match_rows) >= 50_000:
+            flush()
+    flush()
+    conn.commit()
+    conn.close()
+
+
+def _timed(label: str, fn) -> None:
+    t0 = time.perf_counter()
+    summary = fn()
+    elapsed = time.perf_counter() - t0
+    rate = summary.matches / elapsed if elapsed else float("inf")
+    print(f"{label:<36}{elapsed * 1000:>12.1f} ms{summary.matches:>11} matches{rate:>12.0f} matches/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=1_000_000)
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--per-session", type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "history.db"
+        t0 = time.perf_counter()
+        make_history(path, matches=args.matches, players=args.players, per_session=args.per_session)
+        print(f"generated {args.matches} matches in {time.perf_counter() - t0:.1f} s\n")
+
+        db = ConnectionManager(path)
+        registry = PlayerRegistry(db)
+
+        _timed("full replay (first build)", lambda: recompute_ratings(registry))
+        _timed("nothing changed", lambda: recompute_ratings(registry))
+
+        with db.read() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+        for fraction in (0.999, 0.99, 0.5):
+            match_id = f"M{int(total * fraction):08d}"
+            with db.write() as conn:
+                conn.execute(
+                    "UPDATE matches SET score_team1 = score_team2, score_team2 = score_team1 WHERE id = ?",
+                    (match_id,),
+                )
+            _timed(f"score fix at {fraction:.1%} of history", lambda: recompute_ratings(registry, from_match_id=match_id))
+
+        _timed("full replay (K-factor change)", lambda: recompute_ratings(registry, full=True))
+        db.close()
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\npeak RSS {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Bench rotation: the old sort-the-whole-waiting-list pick vs RotationQueue.
+
+    python -m benchmarks.bench_rotation [--refills 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from engine.rotation import RotationQueue
+
+
+class ListRotation:
+    """The previous SessionState behaviour, kept here as the baseline."""
+
+    def __init__(self) -> None:
+        self.waiting_ids: list[str] = []
+
+    def push(self, pid: str, games_played: dict[str, int], rng: random.Random) -> None:
+        self.waiting_ids.append(pid)
+
+    def remove(self, pid: str) -> None:
+        self.waiting_ids = [x for x in self.waiting_ids if x != pid]
+
+    def pick(self, needed: int, games_played: dict[str, int], rng: random.Random) -> list[str]:
+        if len(self.waiting_ids) < needed:
+            return []
+        scored = [(games_played.get(pid, 0), rng.random(), pid) for pid in self.waiting_ids]
+        scored.sort(key=lambda t: (t[0], t[1]))
+        picked = [pid for _, _, pid in scored[:needed]]
+        picked_set = set(picked)
+        self.waiting_ids = [pid for pid in self.waiting_ids if pid not in picked_set]
+        return picked
+
+
+class HeapRotation:
+    def __init__(self) -> None:
+        self.queue = RotationQueue()
+
+    def push(self, pid: str, games_played: dict[str, int], rng: random.Random) -> None:
+        self.queue.push(pid, games_played.get(pid, 0), rng)
+
+    def remove(self, pid: str) -> None:
+        self.queue.remove(pid)
+
+    def pick(self, needed: int, games_played: dict[str, int], rng: random.Random) -> list[str]:
+        return self.queue.pop_many(needed)
+
+
+def simulate(rotation, attendees: int, courts: int, refills: int, seed: int = 0) -> tuple[float, int]:
+    """Fill `courts`, then repeatedly finish a random court, pause/unpause someone waiting, and refill."""
+    rng = random.Random(seed)
+    games_played = {f"P{i:05d}": 0 for i in range(attendees)}
+    for pid in games_played:
+        rotation.push(pid, games_played, rng)
+    on_court = [rotation.pick(4, games_played, rng) for _ in range(courts)]
+    paused: list[str] = []
+
+    t0 = time.perf_counter()
+    for i in range(refills):
+        idx = rng.randrange(courts)
+        for pid in on_court[idx]:
+            games_played[pid] += 1
+            rotation.push(pid, games_played, rng)
+        if i % 4 == 0 and paused:
+            rotation.push(paused.pop(), games_played, rng)
+        elif i % 4 == 2:
+            pid = rng.choice(list(games_played))
+            if all(pid not in c for c in on_court) and pid not in paused:
+                rotation.remove(pid)
+                paused.append(pid)
+        on_court[idx] = rotation.pick(4, games_played, rng)
+    elapsed = time.perf_counter() - t0
+
+    spread = max(games_played.values()) - min(games_played.values())
+    return elapsed, spread
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--refills", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{args.refills} court refills (with pauses/unpauses); µs per refill and games-played spread\n")
+    print(f"{'attendees':>10}{'courts':>8}{'list µs':>10}{'heap µs':>10}{'speedup':>9}{'list spread':>13}{'heap spread':>13}")
+    for attendees, courts in ((40, 6), (200, 30), (1000, 60), (5000, 200)):
+        t_list, s_list = simulate(ListRotation(), attendees, courts, args.refills)
+        t_heap, s_heap = simulate(HeapRotation(), attendees, courts, args.refills)
+        per_list = t_list / args.refills * 1e6
+        per_heap = t_heap / args.refills * 1e6
+        print(
+            f"{attendees:>10}{courts:>8}{per_list:>10.1f}{per_heap:>10.1f}"
+            f"{per_list / per_heap:>8.1f}x{s_list:>13}{s_heap:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Monte Carlo club nights: run the session engine headless over thousands of
+seeded nights to tune court count, format and the refill rule before an event.
+
+    python -m benchmarks.simulate [--nights 2000] [--players 60] [--courts 3,4,5]
+        [--format d,s] [--lookahead 0,4] [--ready 0,1] [--minutes 120]
+        [--match-minutes 12] [--late 0.3] [--early 0.2] [--workers N] [--seed 0]
+
+Comma-separated --courts / --format / --lookahead / --ready values are run as a grid,
+one report row per combination. Each night draws its attendees from the same
+synthetic club (benchmarks.synthetic); some arrive during the first half hour
+and some leave in the last, and match lengths are gamma-distributed. The
+night is driven through the same operations the CLI and API use
+(add_attendees, start_session, complete_courts, remove_attendee), with the
+operator marking each court finished the moment its match ends.
+
+Reports court utilisation, wait-time percentiles (minutes from coming off
+court or arriving to the next game), the games-played spread among players
+there all night, and the team Elo gap of the matches made.
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import itertools
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from functools import partial
+from typing import Iterable
+
+import numpy as np
+
+from benchmarks.synthetic import club_night, make_players
+from core.constants import READY_MATCHES_PER_COURT, REFILL_LOOKAHEAD
+from engine.session import (
+    SessionState,
+    add_attendees,
+    complete_courts,
+    is_on_court,
+    remove_attendee,
+    start_session,
+)
+
+MATCH_MINUTES = {"d": 12.0, "s": 10.0}
+MATCH_MINUTES_CV = 0.35  # spread of match length relative to its mean
+LATE_WINDOW_MINUTES = 30.0
+EARLY_WINDOW_MINUTES = 30.0
+
+
+class ClubPlayers:
+    """Stands in for PlayerRegistry: the session engine only reads `version` and `get_players`."""
+
+    version = 0
+
+    def __init__(self, players: Iterable[dict]) -> None:
+        self._players = {p["id"]: p for p in players}
+
+    def get_players(self, player_ids: Iterable[str]) -> tuple[list[dict], list[str]]:
+        ids = list(player_ids)
+        return [self._players[pid] for pid in ids if pid in self._players], [pid for pid in ids if pid not in self._players]
+
+
+@dataclass(frozen=True)
+class NightConfig:
+    players: int = 60           # club size; each night's attendees are drawn from it
+    courts: int | None = None   # None: sized to the night's turnout
+    fmt: str = "d"
+    lookahead: int = REFILL_LOOKAHEAD
+    ready_per_court: int = READY_MATCHES_PER_COURT
+    minutes: float = 120.0
+    match_minutes: float | None = None  # None: MATCH_MINUTES[fmt]
+    late: float = 0.3           # share of attendees arriving after the start
+    early: float = 0.2          # share leaving before the end
+    club_seed: int = 0
+
+
+@dataclass
+class NightStats:
+    courts: int
+    attendees: int
+    busy_minutes: float = 0.0
+    waits: list[float] = field(default_factory=list)
+    imbalance: list[float] = field(default_factory=list)
+    full_night_games: list[int] = field(default_factory=list)
+
+
+def run_night(config: NightConfig, seed: int) -> NightStats:
+    rng = random.Random(seed)
+    night = club_night(make_players(config.players, config.club_seed), seed)
+    courts = config.courts or night.courts
+    club = ClubPlayers(night.attendees)
+    by_id = {p["id"]: p for p in night.attendees}
+    mean = config.match_minutes or MATCH_MINUTES[config.fmt]
+    shape = 1 / MATCH_MINUTES_CV**2
+
+    arrive = {pid: rng.uniform(0, LATE_WINDOW_MINUTES) if rng.random() < config.late else 0.0 for pid in by_id}
+    if not any(t == 0.0 for t in arrive.values()):
+        arrive[min(arrive, key=arrive.get)] = 0.0
+    leave = {
+        pid: config.minutes - rng.uniform(0, EARLY_WINDOW_MINUTES)
+        for pid in by_id
+        if rng.random() < config.early
+    }
+
+    stats = NightStats(courts=courts, attendees=len(by_id))
+    events: list[tuple[float, int, str, object]] = []
+    counter = itertools.count()
+    for pid, t in arrive.items():
+        if t > 0:
+            heapq.heappush(events, (t, next(counter), "arrive", pid))
+    for pid, t in leave.items():
+        heapq.heappush(events, (max(t, arrive[pid]), next(counter), "leave", pid))
+
+    state = SessionState(lookahead=config.lookahead, ready_per_court=config.ready_per_court)
+    waiting_since: dict[str, float] = {}
+    seen: list[tuple[str, ...] | None] = [None] * courts
+    leaving: set[str] = set()
+
+    def track(now: float) -> None:
+        """Start the clock on matches the last operation put on court."""
+        for idx, ids in enumerate(state.court_player_ids):
+            if not ids or ids is seen[idx]:
+                continue
+            seen[idx] = ids
+            for pid in ids:
+                stats.waits.append(now - waiting_since.pop(pid))
+            half = len(ids) // 2
+            elos = [by_id[pid]["elo"] for pid in ids]
+            stats.imbalance.append(abs(sum(elos[:half]) / half - sum(elos[half:]) / half))
+            length = rng.gammavariate(shape, mean / shape)
+            stats.busy_minutes += min(length, config.minutes - now)
+            heapq.heappush(events, (now + length, next(counter), "finish", idx + 1))
+
+    first = [by_id[pid] for pid in sorted(by_id) if arrive[pid] == 0.0]
+    add_attendees(state, first)
+    waiting_since.update((p["id"], 0.0) for p in first)
+    start_session(club, state, config.fmt, courts, seed)
+    track(0.0)
+
+    while events and events[0][0] < config.minutes:
+        now, _, kind, what = heapq.heappop(events)
+        if kind == "finish":
+            waiting_since.update((pid, now) for pid in state.court_player_ids[what - 1])
+            complete_courts(club, state, [what])
+            for pid in list(leaving):
+                if not is_on_court(state, pid):
+                    remove_attendee(state, pid)
+                    waiting_since.pop(pid, None)
+                    leaving.discard(pid)
+        elif kind == "arrive":
+            add_attendees(state, [by_id[what]])
+            waiting_since[what] = now
+        elif is_on_court(state, what):  # leave after this game
+            leaving.add(what)
+        else:
+            remove_attendee(state, what)
+            waiting_since.pop(what, None)
+        track(now)
+
+    stats.full_night_games = [
+        state.games_played[pid] for pid in by_id if arrive[pid] == 0.0 and pid not in leave
+    ]
+    return stats
+
+
+def _percentile(values: list[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+def summarize(config: NightConfig, nights: list[NightStats]) -> dict[str, float]:
+    court_minutes = sum(n.courts for n in nights) * config.minutes
+    waits = [w for n in nights for w in n.waits]
+    imbalance = [x for n in nights for x in n.imbalance]
+    spreads = [max(n.full_night_games) - min(n.full_night_games) for n in nights if len(n.full_night_games) > 1]
+    return {
+        "courts": statistics.mean(n.courts for n in nights),
+        "attendees": statistics.mean(n.attendees for n in nights),
+        "utilisation": sum(n.busy_minutes for n in nights) / court_minutes,
+        "wait_p50": _percentile(waits, 50),
+        "wait_p90": _percentile(waits, 90),
+        "wait_p99": _percentile(waits, 99),
+        "spread_mean": statistics.mean(spreads) if spreads else float("nan"),
+        "spread_p90": _percentile(spreads, 90),
+        "imbalance_mean": statistics.mean(imbalance) if imbalance else float("nan"),
+        "imbalance_p90": _percentile(imbalance, 90),
+        "matches": len(imbalance) / len(nights),
+    }
+
+
+def simulate(config: NightConfig, nights: int, seed: int, pool: ProcessPoolExecutor, workers: int) -> dict[str, float]:
+    """Run nights seeded seed..seed+nights-1 across the pool (a few chunks per worker)."""
+    chunksize = max(1, nights // (4 * workers))
+    results = pool.map(partial(run_night, config), range(seed, seed + nights), chunksize=chunksize)
+    return summarize(config, list(results))
+
+
+def _csv(parse):
+    return lambda text: [parse(v) for v in text.split(",")]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nights", type=int, default=2000)
+    parser.add_argument("--players", type=int, default=60, help="club size")
+    parser.add_argument("--courts", type=_csv(int), default=[None], help="default: sized to each night's turnout")
+    parser.add_argument("--format", type=_csv(str), default=["d"], help="d (doubles) and/or s (singles)")
+    parser.add_argument("--lookahead", type=_csv(int), default=[REFILL_LOOKAHEAD])
+    parser.add_argument("--ready", type=_csv(int), default=[READY_MATCHES_PER_COURT], help="matches picked ahead per court")
+    parser.add_argument("--minutes", type=float, default=120.0)
+    parser.add_argument("--match-minutes", type=float, default=None, help="mean match length (default: 12 doubles, 10 singles)")
+    parser.add_argument("--late", type=float, default=0.3)
+    parser.add_argument("--early", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    base = NightConfig(
+        players=args.players,
+        minutes=args.minutes,
+        match_minutes=args.match_minutes,
+        late=args.late,
+        early=args.early,
+        club_seed=args.seed,
+    )
+    print(
+        f"{args.nights} nights per row, {args.players}-player club, {args.minutes:.0f} min; "
+        f"{args.late:.0%} arrive late, {args.early:.0%} leave early\n"
+    )
+    print(
+        f"{'fmt':>4}{'courts':>8}{'look':>6}{'ready':>7}{'people':>8}{'util':>7}{'wait p50':>10}{'p90':>7}{'p99':>7}"
+        f"{'spread':>8}{'p90':>5}{'Elo gap':>9}{'p90':>6}{'games':>7}{'s':>7}"
+    )
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for fmt, courts, lookahead, ready in itertools.product(args.format, args.courts, args.lookahead, args.ready):
+            config = replace(base, fmt=fmt, courts=courts, lookahead=lookahead, ready_per_court=ready)
+            t0 = time.perf_counter()
+            r = simulate(config, args.nights, args.seed, pool, args.workers)
+            print(
+                f"{fmt:>4}{r['courts']:>8.1f}{lookahead:>6}{ready:>7}{r['attendees']:>8.1f}{r['utilisation']:>7.0%}"
+                f"{r['wait_p50']:>10.1f}{r['wait_p90']:>7.1f}{r['wait_p99']:>7.1f}"
+                f"{r['spread_mean']:>8.2f}{r['spread_p90']:>5.0f}{r['imbalance_mean']:>9.0f}{r['imbalance_p90']:>6.0f}"
+                f"{r['matches']:>7.1f}{time.perf_counter() - t0:>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Benchmark suite: matchmaking, a simulated session and registry CRUD at several club sizes.
+
+    python -m benchmarks.suite [--sizes 10,100,1000,10000] [--repeat 5] [--out results.json]
+    python -m benchmarks.suite --compare baseline.json [--threshold 0.25]
+
+Every case is run `--repeat` times on seeded synthetic data (benchmarks.synthetic)
+and reported in seconds per call (median and min). Results are printed as JSON,
+or written to --out. With --compare, the best (min) time for each case is
+compared with the baseline file, because it is the figure least disturbed by
+other load on the machine. Cases slower by more than --threshold are flagged,
+and the exit status is 1.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.synthetic import club_night, make_database, make_players
+from core.db import ConnectionManager
+from core.player import PlayerRegistry
+from engine.matchmaking import (
+    MatchRoster,
+    balanced_doubles,
+    balanced_singles,
+    make_balanced_doubles,
+    make_balanced_singles,
+)
+from engine.session import (
+    SessionState,
+    add_attendees,
+    complete_court,
+    pause_attendee,
+    start_session,
+    unpause_attendee,
+)
+
+CRUD_OPS = 500  # registry calls timed per CRUD case (capped at the club size)
+
+
+def _per_op(fn: Callable[[], int]) -> float:
+    """Seconds per operation for one call of `fn`, which returns how many operations it did."""
+    t0 = time.perf_counter()
+    ops = fn()
+    return (time.perf_counter() - t0) / max(ops, 1)
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "runs": len(samples)}
+
+
+def _measure(fn: Callable[[], int], repeat: int) -> dict[str, float]:
+    return _summary([_per_op(fn) for _ in range(repeat)])
+
+
+def bench_matchmaking(size: int, repeat: int, seed: int) -> dict[str, dict]:
+    night = club_night(make_players(size, seed), seed)
+    roster = MatchRoster.from_players(night.attendees)
+
+    def doubles() -> int:
+        make_balanced_doubles(night.attendees, seed=seed, courts=night.courts)
+        return 1
+
+    def singles() -> int:
+        make_balanced_singles(night.attendees, seed=seed)
+        return 1
+
+    def doubles_roster() -> int:
+        balanced_doubles(roster, seed=seed, courts=night.courts)
+        return 1
+
+    def singles_roster() -> int:
+        balanced_singles(roster, seed=seed)
+        return 1
+
+    return {
+        f"matchmaking.doubles/{size}": _measure(doubles, repeat),
+        f"matchmaking.singles/{size}": _measure(singles, repeat),
+        f"matchmaking.doubles_roster/{size}": _measure(doubles_roster, repeat),
+        f"matchmaking.singles_roster/{size}": _measure(singles_roster, repeat),
+    }
+
+
+def bench_session(registry: PlayerRegistry, players: list[dict], repeat: int, seed: int) -> dict[str, dict]:
+    """A whole club night: lobby, start, three rounds of court refills with pauses/unpauses."""
+    night = club_night(players, seed)
+    size = len(players)
+
+    def run() -> int:
+        state = SessionState()
+        add_attendees(state, night.attendees)
+        start_session(registry, state, "d", night.courts, seed)
+        refills = 3 * night.courts
+        for i in range(refills):
+            court_no = i % night.courts + 1
+            if state.court_player_ids[court_no - 1]:
+                complete_court(registry, state, court_no)
+            if i % 10 == 5 and state.waiting:
+                pid = next(iter(state.waiting))
+                pause_attendee(state, pid)
+                unpause_attendee(state, pid)
+        return 1
+
+    return {f"session.club_night/{size}": _measure(run, repeat)}
+
+
+def bench_registry(registry: PlayerRegistry, players: list[dict], repeat: int) -> dict[str, dict]:
+    size = len(players)
+    k = min(size, CRUD_OPS)
+    ids = [p["id"] for p in players[:k]]
+    created: list[str] = []
+
+    def create() -> int:
+        created.extend(registry.register_player(f"New{i}", "Player", "E")["id"] for i in range(k))
+        return k
+
+    def read() -> int:
+        for pid in ids:
+            registry.get_player(player_id=pid)
+        return k
+
+    def list_all() -> int:
+        registry.list_players()
+        return 1
+
+    def update() -> int:
+        for i, pid in enumerate(ids):
+            registry.update_player(pid, rating="DE"[i % 2])
+        return k
+
+    def delete() -> int:
+        for pid in created:
+            registry.delete_player(pid)
+        created.clear()
+        return k
+
+    # create/delete alternate so the table stays at `size` rows for every run
+    create_samples, delete_samples = [], []
+    for _ in range(repeat):
+        create_samples.append(_per_op(create))
+        delete_samples.append(_per_op(delete))
+
+    results = {
+        f"registry.create/{size}": _summary(create_samples),
+        f"registry.delete/{size}": _summary(delete_samples),
+    }
+    results[f"registry.get/{size}"] = _measure(read, repeat)
+    results[f"registry.list/{size}"] = _measure(list_all, repeat)
+    results[f"registry.update/{size}"] = _measure(update, repeat)
+    return results
+
+
+def run_suite(sizes: list[int], repeat: int, seed: int) -> dict:
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            print(f"size {size}...", file=sys.stderr)
+            players = make_players(size, seed)
+            results.update(bench_matchmaking(size, repeat, seed))
+
+            path = Path(tmp) / f"club-{size}.db"
+            make_database(path, players)
+            db = ConnectionManager(path)
+            registry = PlayerRegistry(db)
+            results.update(bench_session(registry, players, repeat, seed))
+            results.update(bench_registry(registry, players, repeat))
+            db.close()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print a current-vs-baseline table; return the names of cases that regressed."""
+    regressions = []
+    print(f"{'case':<32}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<32}{'-':>12}{result['min_s'] * 1e3:>10.3f}ms{'new':>8}")
+            continue
+        ratio = result["min_s"] / base["min_s"] if base["min_s"] else float("inf")
+        flag = "  REGRESSION" if ratio > 1 + threshold else ""
+        print(
+            f"{name:<32}{base['min_s'] * 1e3:>10.3f}ms{result['min_s'] * 1e3:>10.3f}ms"
+            f"{ratio:>7.2f}x{flag}"
+        )
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="comma-separated club sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help="write results JSON here instead of stdout")
+    parser.add_argument("--compare", type=Path, help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    current = run_suite(sizes, args.repeat, args.seed)
+
+    text = json.dumps(current, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    elif not args.compare:
+        print(text)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
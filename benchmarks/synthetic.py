@@ -0,0 +1,77 @@
+"""
+Seeded synthetic club data for the benchmarks.
+
+Players get Elo from a club-like distribution (most around the C grades, thin
+tails toward E and A), a boosted rating near it, the grade their Elo falls in
+and a personal attendance rate. A club night is the players who turned up
+plus a court count for a hall sized to them.
+"""
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+import sqlite3
+
+from core.constants import GRADE_THRESHOLDS
+from core.migrations import migrate
+
+CLUB_ELO_MEAN = 1500.0
+CLUB_ELO_SD = 180.0
+ELO_FLOOR, ELO_CEILING = 900.0, 2300.0
+PLAYERS_PER_COURT = 6  # four on court, about two resting
+
+
+def grade_for(elo: float) -> str:
+    grade = GRADE_THRESHOLDS[0][0]
+    for name, threshold in GRADE_THRESHOLDS:
+        if elo >= threshold:
+            grade = name
+    return grade
+
+
+def make_players(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    players = []
+    for i in range(n):
+        elo = min(ELO_CEILING, max(ELO_FLOOR, rng.gauss(CLUB_ELO_MEAN, CLUB_ELO_SD)))
+        players.append({
+            "id": f"P{i:06d}",
+            "first_name": f"First{i}",
+            "surname": f"Surname{i}",
+            "rating": grade_for(elo),
+            "elo": elo,
+            "boosted": elo + rng.gauss(0, 40),
+            "attendance": rng.betavariate(2, 3),  # mean 40%; a few regulars, many occasionals
+        })
+    return players
+
+
+@dataclass
+class ClubNight:
+    attendees: list[dict]
+    courts: int
+
+
+def club_night(players: list[dict], seed: int = 0) -> ClubNight:
+    """Who turns up on one night, and how many courts that hall would book."""
+    rng = random.Random(seed)
+    attendees = [p for p in players if rng.random() < p["attendance"]]
+    if len(attendees) < 4:
+        attendees = players[: min(len(players), 4)]
+    courts = max(1, math.ceil(len(attendees) / PLAYERS_PER_COURT))
+    return ClubNight(attendees, courts)
+
+
+def make_database(path: Path, players: list[dict]) -> None:
+    """A fresh database at `path` holding `players`."""
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO players (id, first_name, surname, rating, elo, boosted) VALUES (?, ?, ?, ?, ?, ?)",
+        [(p["id"], p["first_name"], p["surname"], p["rating"], p["elo"], p["boosted"]) for p in players],
+    )
+    conn.commit()
+    conn.close()
@@ -1,13 +1,15 @@
 from core.player import PlayerRegistry
+from core.session_store import SessionStore
 from cli.prompts import prompt_choice
-from cli.registry_flows import register_player_flow, list_players_flow
+from cli.registry_flows import export_players_flow, import_players_flow, register_player_flow, list_players_flow
+from engine.session import SessionState, end_session, restore_state
 from cli.session_flows import (
-    SessionState,
     add_attendee_flow,
     show_attendees_flow,
     remove_attendee_flow,
     start_session_flow,
     show_courts_flow,
+    live_board_flow,
     complete_court_flow,
     show_games_played_flow,
     pause_attendee_flow,
@@ -15,10 +17,45 @@ from cli.session_flows import (
 )
 
 
-def session_menu(registry: PlayerRegistry) -> None:
-    state = SessionState()
-    print("\n=== Session (lobby) ===")
+def session_menu(registry: PlayerRegistry, state: SessionState | None = None) -> None:
+    if state is None:
+        store = SessionStore(registry.db)
+        state = SessionState(session_id=store.open_session(), store=store)
+        print("\n=== Session (lobby) ===")
+    try:
+        _session_loop(registry, state)
+    finally:
+        if state.store is not None:
+            state.store.close()
+            failed = state.store.failed_writes()
+            if failed:
+                print(f"\nWarning: {len(failed)} session record(s) could not be saved to the database:")
+                for _, _, error in failed:
+                    print(f"- {error}")
 
+
+def resume_session_menu(registry: PlayerRegistry) -> None:
+    store = SessionStore(registry.db)
+    latest = store.latest_open_snapshot()
+    if latest is None:
+        print("No unfinished session to resume.")
+        store.close()
+        return
+
+    session_id, payload = latest
+    state = restore_state(registry, session_id, payload, store)
+    print(f"\n=== Session resumed ({len(state.attendee_ids)} attendees, {state.phase}) ===")
+    if state.phase == "running":
+        show_courts_flow(state)
+    session_menu(registry, state)
+
+
+def _end_session(state: SessionState) -> None:
+    end_session(state)
+    print("Ending session.")
+
+
+def _session_loop(registry: PlayerRegistry, state: SessionState) -> None:
     while True:
         if state.phase == "lobby":
             print("\nSession Lobby:")
@@ -46,7 +83,7 @@ def session_menu(registry: PlayerRegistry) -> None:
                     show_courts_flow(state)
                     input("\nPress Enter to return to the menu...")
             elif choice == "0":
-                print("Ending session.")
+                _end_session(state)
                 break
 
         else:
@@ -58,9 +95,10 @@ def session_menu(registry: PlayerRegistry) -> None:
             print("5) Remove attendee (leaving)")
             print("6) Pause attendee")
             print("7) Unpause attendee")
+            print("8) Live court board")
             print("0) End session and return to main menu")
 
-            choice = prompt_choice("Choose an option: ", {"1", "2", "3", "4", "5", "6", "7", "0"})
+            choice = prompt_choice("Choose an option: ", {"1", "2", "3", "4", "5", "6", "7", "8", "0"})
 
             if choice == "1":
                 show_courts_flow(state)
@@ -83,8 +121,10 @@ def session_menu(registry: PlayerRegistry) -> None:
             elif choice == "7":
                 unpause_attendee_flow(state)
                 input("\nPress Enter to return to the menu...")
+            elif choice == "8":
+                live_board_flow(registry, state)
             elif choice == "0":
-                print("Ending session.")
+                _end_session(state)
                 break
 
 
@@ -96,9 +136,12 @@ def run(registry: PlayerRegistry) -> None:
         print("1) Register player")
         print("2) List players")
         print("3) Start / Enter session")
+        print("4) Resume last session")
+        print("5) Import players (CSV/JSONL)")
+        print("6) Export players (CSV/JSONL)")
         print("0) Exit")
 
-        choice = prompt_choice("Choose an option: ", {"1", "2", "3", "0"})
+        choice = prompt_choice("Choose an option: ", {"1", "2", "3", "4", "5", "6", "0"})
 
         if choice == "1":
             register_player_flow(registry)
@@ -106,6 +149,12 @@ def run(registry: PlayerRegistry) -> None:
             list_players_flow(registry)
         elif choice == "3":
             session_menu(registry)
+        elif choice == "4":
+            resume_session_menu(registry)
+        elif choice == "5":
+            import_players_flow(registry)
+        elif choice == "6":
+            export_players_flow(registry)
         elif choice == "0":
             print("Goodbye.")
             break
@@ -1,3 +1,9 @@
+import shutil
+import sys
+from functools import lru_cache
+from typing import TextIO
+
+from core.constants import BOARD_GAP
 from engine.matchmaking import Match
 
 
@@ -13,13 +19,18 @@ def render_badminton_court(court_no: int, match: Match) -> list[str]:
     Returns a list of strings representing one court.
     Visually: outer boundary + midline + net + player labels on each side.
     """
-    left = " & ".join(match.team1)
-    right = " & ".join(match.team2)
+    return list(_court_block(court_no, match.format, tuple(match.team1), tuple(match.team2)))
+
+
+@lru_cache(maxsize=256)
+def _court_block(court_no: int, fmt: str, team1: tuple[str, ...], team2: tuple[str, ...]) -> tuple[str, ...]:
+    left = " & ".join(team1)
+    right = " & ".join(team2)
 
     # Inside width (between vertical borders)
     W = 33  # tweak if you want wider courts
 
-    title = f"Court {court_no} ({match.format})"
+    title = f"Court {court_no} ({fmt})"
     title = _fit(title, W)
 
     left_label = _fit(left, W)
@@ -47,7 +58,7 @@ def render_badminton_court(court_no: int, match: Match) -> list[str]:
         f"│{_fit('', W)}│",
         f"└{'─'*W}┘",
     ]
-    return lines
+    return tuple(lines)
 
 
 def print_courts_as_board(matches: list[Match], courts: int, per_row: int = 2) -> None:
@@ -62,11 +73,93 @@ def print_courts_as_board(matches: list[Match], courts: int, per_row: int = 2) -
 
     court_blocks = [render_badminton_court(i + 1, m) for i, m in enumerate(on_court)]
     block_height = len(court_blocks[0])
-    gap = "   "  # spacing between courts
+    gap = " " * BOARD_GAP  # spacing between courts
 
     print("\n=== Courts ===")
     for r in range(0, len(court_blocks), per_row):
         row_blocks = court_blocks[r : r + per_row]
         for line_i in range(block_height):
             print(gap.join(block[line_i] for block in row_blocks))
-        print()
\ No newline at end of file
+        print()
+
+
+def courts_per_row(columns: int) -> int:
+    """How many court blocks fit side by side in `columns` terminal columns."""
+    width = len(_court_block(1, "", (), ())[0])
+    return max(1, (columns + BOARD_GAP) // (width + BOARD_GAP))
+
+
+class CourtBoard:
+    """
+    Live court board drawn with ANSI cursor positioning.
+
+    Each court's block is remembered by what it shows; `draw` rewrites only
+    the courts and footer lines that changed since the last call, in a single
+    write. The whole screen is cleared only when the layout changes (court
+    count or terminal width).
+    """
+
+    def __init__(self, out: TextIO = sys.stdout, *, top: int = 2) -> None:
+        self.out = out
+        self.top = top  # first screen row of the board (1-based); row 1 holds the title
+        self._layout: tuple[int, int] | None = None
+        self._drawn: list[tuple] = []
+        self._footer: list[str] = []
+
+    @property
+    def height(self) -> int:
+        """Rows taken by the board (excluding the footer) in the current layout."""
+        if self._layout is None:
+            return 0
+        courts, per_row = self._layout
+        rows = (courts + per_row - 1) // per_row
+        return rows * (len(_court_block(1, "", (), ())) + 1)
+
+    def invalidate(self) -> None:
+        self._layout = None
+
+    def draw(self, matches: list[Match], footer: list[str] = ()) -> bool:
+        """Bring the screen up to date. Returns True if it had to redraw from scratch."""
+        columns, _ = shutil.get_terminal_size()
+        per_row = courts_per_row(columns)
+        parts: list[str] = []
+
+        relaid = self._layout != (len(matches), per_row)
+        if relaid:
+            self._layout = (len(matches), per_row)
+            self._drawn = [()] * len(matches)
+            self._footer = []
+            parts.append("\x1b[2J\x1b[H=== Courts (live) ===")
+
+        block_height = len(_court_block(1, "", (), ()))
+        block_width = len(_court_block(1, "", (), ())[0])
+        for i, m in enumerate(matches):
+            key = (i + 1, m.format, tuple(m.team1), tuple(m.team2))
+            if self._drawn[i] == key:
+                continue
+            self._drawn[i] = key
+            row = self.top + (i // per_row) * (block_height + 1)
+            col = 1 + (i % per_row) * (block_width + BOARD_GAP)
+            for line_i, line in enumerate(_court_block(*key)):
+                parts.append(f"\x1b[{row + line_i};{col}H{line}")
+
+        footer_top = self.top + self.height
+        footer = [line[:columns] for line in footer]
+        for line_i in range(max(len(footer), len(self._footer))):
+            line = footer[line_i] if line_i < len(footer) else ""
+            if line_i < len(self._footer) and self._footer[line_i] == line:
+                continue
+            parts.append(f"\x1b[{footer_top + line_i};1H\x1b[2K{line}")
+        self._footer = footer
+
+        if parts:
+            self.out.write("".join(parts))
+            self.out.flush()
+        return relaid
+
+    def move_below(self, offset: int = 0) -> None:
+        """Put the cursor on the line `offset` rows under the footer and clear it."""
+        row = self.top + self.height + len(self._footer) + offset
+        self.out.write(f"\x1b[{row};1H\x1b[2K")
+        self.out.flush()
+
@@ -1,3 +1,19 @@
+import codecs
+import os
+import select
+import shutil
+import sys
+from typing import Callable, TypeVar
+
+try:  # POSIX only; elsewhere pick_incremental uses plain line input
+    import termios
+    import tty
+except ImportError:
+    termios = None
+
+T = TypeVar("T")
+
+
 def prompt_int(prompt: str, default: int | None = None) -> int:
     while True:
         raw = input(prompt).strip()
@@ -19,4 +35,94 @@ def prompt_choice(prompt: str, valid: set[str]) -> str:
         raw = input(prompt).strip().lower()
         if raw in valid_lower:
             return raw
-        print(f"Please enter one of: {', '.join(sorted(valid))}")
\ No newline at end of file
+        print(f"Please enter one of: {', '.join(sorted(valid))}")
+
+
+def _pick_by_lines(prompt: str, search: Callable[[str], list[T]], label: Callable[[T], str]) -> T | None:
+    while True:
+        query = input(prompt).strip()
+        if not query:
+            return None
+        results = search(query)
+        if not results:
+            print("No matches.")
+            continue
+        for i, item in enumerate(results, 1):
+            print(f"  {i}) {label(item)}")
+        choice = input("Pick a number (blank to search again): ").strip()
+        if choice.isdigit() and 1 <= int(choice) <= len(results):
+            return results[int(choice) - 1]
+
+
+def _read_key(fd: int, decoder) -> str:
+    """One keypress in cbreak mode; arrow keys come back as "up"/"down", a lone Esc as "esc"."""
+    ch = decoder.decode(os.read(fd, 1))
+    while not ch:  # partway through a multi-byte character
+        ch = decoder.decode(os.read(fd, 1))
+    if ch != "\x1b":
+        return ch
+    if not select.select([fd], [], [], 0.05)[0]:
+        return "esc"
+    seq = os.read(fd, 2).decode("ascii", "replace")
+    return {"[A": "up", "[B": "down"}.get(seq, "")
+
+
+def pick_incremental(prompt: str, search: Callable[[str], list[T]], label: Callable[[T], str]) -> T | None:
+    """
+    Search as you type: matches for the text so far are listed under the prompt
+    after every keypress. Up/Down move the selection, Enter picks it, and Esc
+    (or Enter with nothing typed) returns None. Outside a terminal, or where
+    raw key input isn't available, it falls back to search-then-pick-a-number.
+    """
+    if termios is None or not sys.stdin.isatty():
+        return _pick_by_lines(prompt, search, label)
+
+    fd = sys.stdin.fileno()
+    saved = termios.tcgetattr(fd)
+    decoder = codecs.getincrementaldecoder(sys.stdin.encoding or "utf-8")("replace")
+    out = sys.stdout
+    query, results, selected = "", [], 0
+    try:
+        tty.setcbreak(fd)
+        while True:
+            width = shutil.get_terminal_size().columns - 1
+            out.write("\r\x1b[J" + (prompt + query)[-width:])
+            for i, item in enumerate(results):
+                marker = ">" if i == selected else " "
+                out.write("\n" + f"{marker} {label(item)}"[:width])
+            if query and not results:
+                out.write("\n  (no matches)")
+            lines_below = len(results) or (1 if query else 0)
+            if lines_below:
+                out.write(f"\x1b[{lines_below}A")
+            column = min(len(prompt + query), width)
+            out.write("\r" + (f"\x1b[{column}C" if column else ""))
+            out.flush()
+
+            key = _read_key(fd, decoder)
+            if key in ("\r", "\n"):
+                if not query:
+                    return None
+                if results:
+                    return results[selected]
+                continue
+            if key in ("esc", "\x04"):
+                return None
+            if key == "up":
+                selected = max(selected - 1, 0)
+                continue
+            if key == "down":
+                selected = min(selected + 1, max(len(results) - 1, 0))
+                continue
+            if key in ("\x7f", "\b"):
+                query = query[:-1]
+            elif key.isprintable():
+                query += key
+            else:
+                continue
+            results = search(query) if query.strip() else []
+            selected = 0
+    finally:
+        out.write("\r\x1b[J")
+        out.flush()
+        termios.tcsetattr(fd, termios.TCSADRAIN, saved)
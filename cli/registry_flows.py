@@ -1,4 +1,5 @@
 from core.player import PlayerRegistry
+from core.player_io import export_file, import_file
 
 
 def player_label(p: dict) -> str:
@@ -36,4 +37,39 @@ def list_players_flow(registry: PlayerRegistry) -> None:
         return
 
     print("\nPlayers in database:")
-    print_players(players)
\ No newline at end of file
+    print_players(players)
+
+
+def print_import_result(result: dict) -> None:
+    print(f"Imported {result['imported']} player(s).")
+    if result["error_count"]:
+        print(f"{result['error_count']} row(s) skipped:")
+        for e in result["errors"]:
+            print(f"- row {e['row']}: {e['error']}")
+        hidden = result["error_count"] - len(result["errors"])
+        if hidden:
+            print(f"  ...and {hidden} more")
+
+
+def import_players_flow(registry: PlayerRegistry) -> None:
+    path = input("File to import (.csv with first_name,surname[,rating,elo] columns, or .jsonl): ").strip()
+    if not path:
+        return
+    try:
+        result = import_file(registry, path)
+    except (OSError, ValueError) as e:
+        print(f"Could not import: {e}")
+        return
+    print_import_result(result)
+
+
+def export_players_flow(registry: PlayerRegistry) -> None:
+    path = input("Export to file (.csv or .jsonl): ").strip()
+    if not path:
+        return
+    try:
+        count = export_file(registry, path)
+    except (OSError, ValueError) as e:
+        print(f"Could not export: {e}")
+        return
+    print(f"Exported {count} player(s) to {path}.")
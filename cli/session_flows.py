@@ -1,175 +1,58 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-import random
+import select
+import shutil
+import sys
+import textwrap
 
+from core.constants import BOARD_POLL_INTERVAL_S
 from core.player import PlayerRegistry
-from engine.matchmaking import Match
-from cli.prompts import prompt_choice, prompt_int
+from engine.session import (
+    SessionState,
+    add_attendees,
+    complete_courts,
+    get_attendees,
+    next_up,
+    pause_attendee,
+    remove_attendee,
+    start_session,
+    sync_roster,
+    unpause_attendee,
+)
+from cli.prompts import pick_incremental, prompt_choice, prompt_int
 from cli.registry_flows import print_players, player_label
-from cli.display import print_courts_as_board
-
-
-# -----------------------------
-# Session State (court-based)
-# -----------------------------
-
-@dataclass
-class SessionState:
-    attendee_ids: set[str] = field(default_factory=set)
-    phase: str = "lobby"
-    fmt: str = "d"  # "d" doubles, "s" singles
-    courts: int = 1
-    seed: int | None = None
-
-    court_matches: list[Match] = field(default_factory=list)              
-    court_player_ids: list[tuple[str, ...]] = field(default_factory=list)
-    waiting_ids: list[str] = field(default_factory=list) 
-    paused_ids: set[str] = field(default_factory=set)
-    games_played: dict[str, int] = field(default_factory=dict)
-    rng: random.Random = field(default_factory=random.Random)
-
-
-# -----------------------------
-# Helpers
-# -----------------------------
-
-def _display_name(p: dict) -> str:
-    first = p.get("first_name")
-    surname = p.get("surname")
-    if isinstance(first, str) and isinstance(surname, str):
-        full = f"{first.strip()} {surname.strip()}".strip()
-        if full:
-            return full
-
-    pid = p.get("id")
-    return str(pid) if pid is not None else "?"
-
-
-def _choose_players_from_db(registry: PlayerRegistry) -> list[dict]:
-    """Enter one or more player IDs (comma/space separated). Returns found player dicts."""
-    raw = input("\nEnter player ID(s) to add (comma/space separated, blank to cancel): ").strip()
-    if not raw:
-        return []
-
-    ids = [x.strip() for x in raw.replace(",", " ").split() if x.strip()]
-
-    chosen: list[dict] = []
-    for pid in ids:
-        rows = registry.get_player(player_id=pid)
-        if not rows:
-            print(f"No player found with id '{pid}'. Skipping.")
-            continue
-        chosen.append(rows[0])
-
-    return chosen
-
-
-def _get_attendees(registry: PlayerRegistry, state: SessionState) -> list[dict]:
-    attendees: list[dict] = []
-    for pid in sorted(state.attendee_ids):
-        rows = registry.get_player(player_id=pid)
-        if rows:
-            attendees.append(rows[0])
-    return attendees
-
-
-def _empty_match(fmt: str) -> Match:
-    if fmt == "d":
-        return Match(format="doubles", team1=("—", "—"), team2=("—", "—"))
-    return Match(format="singles", team1=("—",), team2=("—",))
-
-
-def _pick_next_players(state: SessionState, needed: int) -> list[str]:
-    """Pick the next N player IDs from waiting, prioritising those with fewer games played."""
-    if len(state.waiting_ids) < needed:
-        return []
-
-    scored: list[tuple[int, float, str]] = []
-    for pid in state.waiting_ids:
-        gp = state.games_played.get(pid, 0)
-        scored.append((gp, state.rng.random(), pid))
-
-    scored.sort(key=lambda t: (t[0], t[1]))
-    picked = [pid for _, _, pid in scored[:needed]]
-
-    picked_set = set(picked)
-    state.waiting_ids = [pid for pid in state.waiting_ids if pid not in picked_set]
-
-    return picked
-
-
-def _make_match_for_ids(
-    registry: PlayerRegistry,
-    fmt: str,
-    ids: list[str],
-    rng: random.Random,
-) -> tuple[Match, tuple[str, ...]]:
-    """Create a Match for display + return the exact IDs used."""
-
-    # Build display names
-    name_map: dict[str, str] = {}
-    for pid in ids:
-        rows = registry.get_player(player_id=pid)
-        name_map[pid] = _display_name(rows[0]) if rows else pid
-
-    ids_shuffled = ids[:]
-    rng.shuffle(ids_shuffled)
-
-    if fmt == "d":
-        a, b, c, d = ids_shuffled
-        m = Match(format="doubles", team1=(name_map[a], name_map[b]), team2=(name_map[c], name_map[d]))
-        return m, (a, b, c, d)
-
-    a, b = ids_shuffled
-    m = Match(format="singles", team1=(name_map[a],), team2=(name_map[b],))
-    return m, (a, b)
+from cli.display import CourtBoard, print_courts_as_board
 
 
 # -----------------------------
 # Lobby flows
 # -----------------------------
 
-def add_attendee_flow(registry: PlayerRegistry, state: SessionState) -> None:
-    database_players = registry.list_players()
-    available_players = [p for p in database_players if p.get("id") not in state.attendee_ids]
+def _search_available(registry: PlayerRegistry, state: SessionState, query: str) -> list[dict]:
+    return [p for p in registry.search(query) if p["id"] not in state.attendee_ids]
 
-    if not available_players:
-        print("No available players to add.")
-        return
-
-    print("\nAvailable players in database:")
-    print_players(available_players)
-
-    players = _choose_players_from_db(registry)
-    if not players:
-        return
 
+def add_attendee_flow(registry: PlayerRegistry, state: SessionState) -> None:
+    print("\nSearch by name or player ID; pick a match to add them. Enter on an empty search when done.")
     added_any = False
-    for player in players:
-        pid = player.get("id")
-        if not pid:
-            continue
-
-        if pid in state.attendee_ids:
-            print(f"Already in session: {pid}")
-            continue
-
-        state.attendee_ids.add(pid)
-        state.games_played.setdefault(pid, 0)  # harmless in lobby too
-
-        # If session is running, join the waiting list (unless paused)
-        if state.phase == "running" and pid not in state.paused_ids:
-            state.waiting_ids.append(pid)
-
-        print(f"Added to session: {player_label(player)}")
-        added_any = True
+    while True:
+        player = pick_incremental(
+            "Add player: ",
+            lambda query: _search_available(registry, state, query),
+            player_label,
+        )
+        if player is None:
+            break
+
+        for added in add_attendees(state, [player]):
+            print(f"Added to session: {player_label(added)}")
+            added_any = True
 
     if not added_any:
         print("No new attendees were added.")
 
 def show_attendees_flow(registry: PlayerRegistry, state: SessionState) -> None:
-    attendees = _get_attendees(registry, state)
+    attendees = get_attendees(registry, state)
     if not attendees:
         print("No attendees yet.")
         return
@@ -179,7 +62,7 @@ def show_attendees_flow(registry: PlayerRegistry, state: SessionState) -> None:
 
 
 def remove_attendee_flow(registry: PlayerRegistry, state: SessionState) -> None:
-    attendees = _get_attendees(registry, state)
+    attendees = get_attendees(registry, state)
     if not attendees:
         print("No attendees to remove.")
         return
@@ -191,19 +74,12 @@ def remove_attendee_flow(registry: PlayerRegistry, state: SessionState) -> None:
     if not pid:
         return
 
-    if pid not in state.attendee_ids:
-        print("That player is not in the session.")
-        return
-
-    if state.phase == "running" and _is_on_court(state, pid):
-        print("That player is currently on court. Remove them after their game finishes.")
+    try:
+        remove_attendee(state, pid)
+    except ValueError as e:
+        print(e)
         return
 
-    state.attendee_ids.discard(pid)
-    state.paused_ids.discard(pid)
-    state.waiting_ids = [x for x in state.waiting_ids if x != pid]
-    state.games_played.pop(pid, None)
-
     print(f"Removed attendee id '{pid}'.")
 
 
@@ -218,41 +94,17 @@ def start_session_flow(registry: PlayerRegistry, state: SessionState) -> None:
 
     fmt = prompt_choice("Singles or Doubles? (s/d): ", {"s", "d"})
     courts = prompt_int("How many courts? ", default=1)
-    if courts <= 0:
-        print("Courts must be at least 1.")
-        return
 
-    seed_raw = input("Random seed (optional, press Enter to skip): ").strip()
-    seed = int(seed_raw) if seed_raw else None
-
-    # lock in settings
-    state.phase = "running"
-    state.fmt = fmt
-    state.courts = courts
-    state.seed = seed
-    state.rng = random.Random(seed)
-
-    # init games played
-    for pid in state.attendee_ids:
-        state.games_played.setdefault(pid, 0)
-
-    # everyone starts waiting
-    state.waiting_ids = [pid for pid in sorted(state.attendee_ids) if pid not in state.paused_ids]
-    # allocate courts immediately
-    state.court_matches = []
-    state.court_player_ids = []
-
-    needed = 4 if fmt == "d" else 2
-    for _ in range(courts):
-        picked = _pick_next_players(state, needed)
-        if not picked:
-            state.court_matches.append(_empty_match(fmt))
-            state.court_player_ids.append(tuple())
-            continue
-
-        match, ids_tuple = _make_match_for_ids(registry, fmt, picked, state.rng)
-        state.court_matches.append(match)
-        state.court_player_ids.append(ids_tuple)
+    seed = None
+    if courts > 0:
+        seed_raw = input("Random seed (optional, press Enter to skip): ").strip()
+        seed = int(seed_raw) if seed_raw else None
+
+    try:
+        start_session(registry, state, fmt, courts, seed)
+    except ValueError as e:
+        print(e)
+        return
 
     print("\nSession started and courts allocated. Use 'Show courts' to view.")
 
@@ -261,6 +113,19 @@ def start_session_flow(registry: PlayerRegistry, state: SessionState) -> None:
 # Running flows
 # -----------------------------
 
+def _waiting_line(state: SessionState) -> str:
+    parts = [f"{pid}({state.games_played.get(pid, 0)})" for pid in state.waiting]
+    return "Waiting/Bench: " + ", ".join(parts) if parts else ""
+
+
+def _next_up_lines(state: SessionState) -> list[str]:
+    """One line per ready match; the first goes on the next court to finish."""
+    return [
+        f"Next up {n}: {' & '.join(m.team1)} vs {' & '.join(m.team2)}"
+        for n, m in enumerate(next_up(state), 1)
+    ]
+
+
 def show_courts_flow(state: SessionState) -> None:
     if state.phase != "running":
         print("No allocation yet. Start the session first.")
@@ -268,50 +133,136 @@ def show_courts_flow(state: SessionState) -> None:
 
     print_courts_as_board(state.court_matches, state.courts, per_row=2)
 
-    if state.waiting_ids:
-        parts: list[str] = []
-        for pid in state.waiting_ids:
-            gp = state.games_played.get(pid, 0)
-            parts.append(f"{pid}({gp})")
-        print("Waiting/Bench:", ", ".join(parts))
+    for line in _next_up_lines(state):
+        print(line)
+    if state.waiting:
+        print(_waiting_line(state))
 
 
-def complete_court_flow(registry: PlayerRegistry, state: SessionState) -> None:
+_LIVE_HELP = "Court number(s) = finished (2:21-17 adds the score), p <id> = pause, u <id> = unpause, q = back to menu"
+
+
+def _live_footer(state: SessionState, status: str) -> list[str]:
+    columns, _ = shutil.get_terminal_size()
+    waiting = textwrap.wrap(_waiting_line(state), columns) or ["Waiting/Bench: (nobody)"]
+    return _next_up_lines(state) + waiting + ["", _LIVE_HELP, status]
+
+
+def _read_live_command(board: CourtBoard, state: SessionState, status: str) -> str:
+    """
+    Wait for a command line. While the user hasn't typed anything, keep polling
+    so a resized terminal gets the board re-laid out straight away.
+    """
+    try:
+        select.select([sys.stdin], [], [], 0)
+    except (OSError, ValueError):  # Windows consoles can't be select()ed; just block
+        return input()
+
+    while True:
+        ready, _, _ = select.select([sys.stdin], [], [], BOARD_POLL_INTERVAL_S)
+        if ready:
+            line = sys.stdin.readline()
+            return line if line else "q"
+        if board.draw(state.court_matches[: state.courts], _live_footer(state, status)):
+            board.move_below(1)
+            sys.stdout.write("> ")
+            sys.stdout.flush()
+
+
+def live_board_flow(registry: PlayerRegistry, state: SessionState) -> None:
+    """Full-screen board that redraws only the courts that changed; commands are typed underneath."""
     if state.phase != "running":
-        print("Session not running.")
+        print("No allocation yet. Start the session first.")
         return
 
-    court_no = prompt_int("Which court finished? (number): ", default=0)
-    if court_no <= 0 or court_no > state.courts:
-        print("Invalid court number.")
+    if not sys.stdout.isatty():
+        show_courts_flow(state)
         return
 
-    idx = court_no - 1
-    ids_on_court = state.court_player_ids[idx]
-    if not ids_on_court:
-        print("That court has no match allocated.")
-        return
+    board = CourtBoard()
+    status = ""
+    sys.stdout.write("\x1b[?1049h")  # alternate screen, restored on exit
+    try:
+        while True:
+            board.draw(state.court_matches[: state.courts], _live_footer(state, status))
+            board.move_below(1)
+            sys.stdout.write("> ")
+            sys.stdout.flush()
+
+            cmd, _, arg = _read_live_command(board, state, status).strip().partition(" ")
+            arg = arg.strip()
+            try:
+                if cmd in {"q", "0"}:
+                    return
+                if cmd[:1].isdigit():
+                    court_nos, scores = _parse_courts(f"{cmd} {arg}")
+                    refilled = complete_courts(registry, state, court_nos, scores)
+                    status = _refill_status(court_nos, refilled)
+                elif cmd == "p" and arg:
+                    pause_attendee(state, arg)
+                    status = f"Paused attendee id '{arg}'."
+                elif cmd == "u" and arg:
+                    unpause_attendee(state, arg)
+                    status = f"Unpaused attendee id '{arg}'."
+                else:
+                    status = ""
+            except ValueError as e:
+                status = str(e)
+    finally:
+        sys.stdout.write("\x1b[?1049l")
+        sys.stdout.flush()
+
+
+def _parse_courts(raw: str) -> tuple[list[int], dict[int, tuple[int, int]]]:
+    """Court numbers, each optionally with its score: "1 3:21-17" → ([1, 3], {3: (21, 17)})."""
+    court_nos: list[int] = []
+    scores: dict[int, tuple[int, int]] = {}
+    for part in raw.replace(",", " ").split():
+        court, _, score = part.partition(":")
+        try:
+            court_no = int(court)
+        except ValueError:
+            raise ValueError("Court numbers must be whole numbers.") from None
+        court_nos.append(court_no)
+        if score:
+            team1, _, team2 = score.partition("-")
+            try:
+                scores[court_no] = (int(team1), int(team2))
+            except ValueError:
+                raise ValueError(f"Enter court {court_no}'s score as points-points, e.g. {court_no}:21-17.") from None
+    return court_nos, scores
+
+
+def _court_list(court_nos: list[int]) -> str:
+    label = "court" if len(court_nos) == 1 else "courts"
+    return f"{label} {', '.join(map(str, court_nos))}"
+
+
+def _refill_status(court_nos: list[int], refilled: list[bool]) -> str:
+    done = [n for n, ok in zip(court_nos, refilled) if ok]
+    empty = [n for n, ok in zip(court_nos, refilled) if not ok]
+    parts = []
+    if done:
+        parts.append(f"{_court_list(done).capitalize()} updated.")
+    if empty:
+        parts.append(f"Not enough waiting players to refill {_court_list(empty)} right now.")
+    return " ".join(parts)
+
 
-    # update fairness stats and send them to the back of the waiting list
-    for pid in ids_on_court:
-        state.games_played[pid] = state.games_played.get(pid, 0) + 1
-        if pid not in state.paused_ids:
-            state.waiting_ids.append(pid)
-
-    # refill this court
-    needed = 4 if state.fmt == "d" else 2
-    picked = _pick_next_players(state, needed)
-    if not picked:
-        state.court_matches[idx] = _empty_match(state.fmt)
-        state.court_player_ids[idx] = tuple()
-        print("Not enough waiting players to refill that court right now.")
+def complete_court_flow(registry: PlayerRegistry, state: SessionState) -> None:
+    if state.phase != "running":
+        print("Session not running.")
         return
 
-    match, ids_tuple = _make_match_for_ids(registry, state.fmt, picked, state.rng)
-    state.court_matches[idx] = match
-    state.court_player_ids[idx] = ids_tuple
+    raw = input("Which court(s) finished? Add the score to rate the match (e.g. 2:21-17 or 1 3): ")
+    try:
+        court_nos, scores = _parse_courts(raw)
+        refilled = complete_courts(registry, state, court_nos, scores)
+    except ValueError as e:
+        print(e)
+        return
 
-    print(f"Court {court_no} updated.")
+    print(_refill_status(court_nos, refilled))
 
 
 def show_games_played_flow(registry: PlayerRegistry, state: SessionState) -> None:
@@ -319,40 +270,26 @@ def show_games_played_flow(registry: PlayerRegistry, state: SessionState) -> Non
         print("No session stats yet.")
         return
 
-    rows: list[tuple[int, str, str]] = []
-    for pid, gp in state.games_played.items():
-        players = registry.get_player(player_id=pid)
-        name = _display_name(players[0]) if players else pid
-        rows.append((gp, pid, name))
+    roster = sync_roster(registry, state)
+    rows = [(gp, pid, roster.name(pid)) for pid, gp in state.games_played.items()]
 
     rows.sort(key=lambda t: (t[0], t[2]))
 
     print("\nGames played:")
     for gp, pid, name in rows:
         print(f"- {name} ({pid}): {gp}")
-        
-        
-def _is_on_court(state: SessionState, pid: str) -> bool:
-    for ids_tuple in state.court_player_ids:
-        if pid in ids_tuple:
-            return True
-    return False
+
 
 def pause_attendee_flow(state: SessionState) -> None:
     pid = input("\nEnter attendee ID to pause (blank to cancel): ").strip()
     if not pid:
         return
 
-    if pid not in state.attendee_ids:
-        print("That player is not in the session.")
+    try:
+        pause_attendee(state, pid)
+    except ValueError as e:
+        print(e)
         return
-
-    if _is_on_court(state, pid):
-        print("That player is currently on court. Pause them after their game finishes.")
-        return
-
-    state.paused_ids.add(pid)
-    state.waiting_ids = [x for x in state.waiting_ids if x != pid]
     print(f"Paused attendee id '{pid}'.")
     
 def unpause_attendee_flow(state: SessionState) -> None:
@@ -360,17 +297,10 @@ def unpause_attendee_flow(state: SessionState) -> None:
     if not pid:
         return
 
-    if pid not in state.attendee_ids:
-        print("That player is not in the session.")
+    try:
+        unpause_attendee(state, pid)
+    except ValueError as e:
+        print(e)
         return
 
-    if pid not in state.paused_ids:
-        print("That player is not paused.")
-        return
-
-    state.paused_ids.discard(pid)
-
-    if state.phase == "running":
-        state.waiting_ids.append(pid)
-
     print(f"Unpaused attendee id '{pid}'.")
\ No newline at end of file
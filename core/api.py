@@ -1,11 +1,85 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from core.player import PlayerRegistry
-from typing import Optional
+import base64
+import binascii
+import io
+import json
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from core.async_player import AsyncPlayerRegistry
+from core.constants import (
+    IMPORT_SPOOL_BYTES,
+    LEADERBOARD_DEFAULT_LIMIT,
+    MAX_PAGE_SIZE,
+    SEARCH_DEFAULT_LIMIT,
+    SEARCH_MAX_LIMIT,
+)
+from core.db import get_manager, init_db
+from core.metrics import metrics
+from core.player import PLAYER_FIELDS
+from core.player_io import format_rows
+from core.session_feed import CLOSED, RESYNC, LiveSession
+from core.session_store import SessionStore
+from engine import session as sessions_engine
+from engine.session import SessionState
+from typing import AsyncIterator, Literal, Optional
 
 
-app = FastAPI(title="Badminton API")
-registry = PlayerRegistry()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    yield
+    for live in live_sessions.values():
+        live.feed.close()
+    if _store is not None:
+        _store.close()
+    registry.close()
+    get_manager().close()
+
+
+class MetricsMiddleware:
+    """
+    Counts and times HTTP requests and adds a Server-Timing header with the
+    request's SQL statement count, connections opened and instrumented calls.
+    Plain ASGI so that, with metrics off, it is a single flag check.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not metrics.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = metrics.start_request()
+        t0 = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - t0
+                route = getattr(scope.get("route"), "path", "unmatched")
+                metrics.http_requests.inc(scope["method"], route, str(message["status"]))
+                metrics.http_seconds.observe(elapsed, scope["method"], route)
+
+                entries = [f"{key};dur={secs * 1000:.2f}" for key, secs in stats.timings.items()]
+                entries.append(f'sql;desc="{stats.sql_statements} statements, {stats.connections} connections"')
+                entries.append(f"total;dur={elapsed * 1000:.2f}")
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", ", ".join(entries).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
+
+
+app = FastAPI(title="Badminton API", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+registry = AsyncPlayerRegistry()
+live_sessions: dict[str, LiveSession] = {}
+_store: SessionStore | None = None
 
 class PlayerCreate(BaseModel):
     first_name: str
@@ -13,35 +87,234 @@ class PlayerCreate(BaseModel):
     rating: str = "E"
     elo: Optional[float] = None
 
+class PlayerLookup(BaseModel):
+    ids: list[str]
+
 class PlayerUpdate(BaseModel):
     first_name: str | None = None
     surname: str | None = None
     rating: str | None = None
 
+class CourtsComplete(BaseModel):
+    courts: list[int] = Field(..., min_length=1)
+    scores: dict[int, tuple[int, int]] = Field(default_factory=dict)  # court → (team 1, team 2) points
+
+class CourtComplete(BaseModel):
+    score: tuple[int, int] | None = None  # (team 1, team 2) points; unscored matches aren't rated
+
+class SessionStart(BaseModel):
+    format: Literal["singles", "doubles"] = "doubles"
+    courts: int = Field(1, ge=1)
+    seed: int | None = None
+
+def _encode_cursor(key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def _decode_cursor(cursor: str) -> list[str]:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(key, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+async def _single(rows: list[dict]) -> AsyncIterator[list[dict]]:
+    yield rows
+
+async def _stream_rows(chunks: AsyncIterator[list[dict]], fmt: str) -> AsyncIterator[str]:
+    """Serialise chunks of rows as NDJSON or a JSON array, one chunk per yield."""
+    if fmt == "ndjson":
+        async for chunk in chunks:
+            yield "".join(json.dumps(row) + "\n" for row in chunk)
+        return
+
+    yield "["
+    sep = ""
+    async for chunk in chunks:
+        if chunk:
+            yield sep + ",".join(json.dumps(row) for row in chunk)
+            sep = ","
+    yield "]"
+
+async def _export_rows(chunks: AsyncIterator[list[dict]], fmt: str, fields: list[str]) -> AsyncIterator[str]:
+    """Serialise chunks of rows as CSV (one header line) or JSONL, one chunk per yield."""
+    if fmt == "csv":
+        yield "".join(format_rows((), fmt, fields))
+    async for chunk in chunks:
+        yield "".join(format_rows(chunk, fmt, fields, header=False))
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Metrics"])
+async def get_metrics():
+    """Prometheus text exposition. Empty unless the server runs with BADMINTON_METRICS=1."""
+    if not metrics.enabled:
+        return PlainTextResponse("", media_type="text/plain; version=0.0.4")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/players", tags=["Players"])
-def list_players():
-    return registry.list_players()
+async def list_players(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    fields: str | None = None,
+    format: Literal["json", "ndjson"] = "json",
+):
+    """
+    Players ordered by surname, first name, id.
+
+    Without `limit` the whole table is streamed. With `limit` one keyset page is
+    returned and the `X-Next-Cursor` header holds the `cursor` for the next page.
+    `fields` is a comma-separated projection; `format=ndjson` emits one object per line.
+    Responses carry an ETag; a matching If-None-Match gets 304.
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    after = _decode_cursor(cursor) if cursor else None
+
+    etag = f'"players-{await registry.players_version()}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    headers = {"ETag": etag}
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    try:
+        if limit is None:
+            chunks = registry.iter_players(fields=field_list, after=after)
+        else:
+            rows, next_after = await registry.players_page(limit, fields=field_list, after=after)
+            chunks = _single(rows)
+            if next_after is not None:
+                headers["X-Next-Cursor"] = _encode_cursor(next_after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(_stream_rows(chunks, format), media_type=media_type, headers=headers)
+
+@app.get("/leaderboard", tags=["Leaderboard"])
+async def get_leaderboard(
+    request: Request,
+    response: Response,
+    grade: str | None = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(LEADERBOARD_DEFAULT_LIMIT, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    Players by Elo, highest first; tied players share a rank. `grade` limits
+    the board to that grade's Elo band, ranked within it. Carries an ETag like
+    GET /players, so polling screens get 304 until a rating changes.
+    """
+    etag = f'"leaderboard-{await registry.players_version()}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    try:
+        rows, total = await registry.leaderboard(grade=grade, offset=offset, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["ETag"] = etag
+    return {"total": total, "offset": offset, "players": rows}
+
+@app.post("/players/lookup", tags=["Players"])
+async def lookup_players(payload: PlayerLookup):
+    players, missing = await registry.get_players(payload.ids)
+    return {"players": players, "missing": missing}
+
+@app.get("/players/search", tags=["Players"])
+async def search_players(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+):
+    """Players whose name matches `q`: name prefixes first, then substrings, then close spellings."""
+    try:
+        return await registry.search(q, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/players/export", tags=["Players"])
+async def export_players(
+    format: Literal["csv", "jsonl"] = "csv",
+    fields: str | None = None,
+):
+    """
+    Every player as a CSV or JSONL download, streamed from the database.
+    `fields` is a comma-separated list of columns (default: all).
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(PLAYER_FIELDS)
+    try:
+        chunks = registry.iter_players(fields=field_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="players.{format}"'}
+    return StreamingResponse(_export_rows(chunks, format, field_list), media_type=media_type, headers=headers)
+
+@app.post("/players/import", tags=["Players"])
+async def import_players(request: Request, format: Literal["csv", "jsonl"] = "csv"):
+    """
+    Add players from a CSV (header row with first_name, surname and optionally
+    rating, elo, id) or JSONL request body, in one transaction. Bad rows are
+    skipped and reported by row number; the rest are imported.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as body:
+        async for data in request.stream():
+            body.write(data)
+        body.seek(0)
+        text = io.TextIOWrapper(body, encoding="utf-8-sig", newline="")
+        try:
+            return await registry.import_lines(text, format)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="Body must be UTF-8 text")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            text.detach()
+
+@app.get("/players/{player_id}/rank", tags=["Leaderboard"])
+async def get_player_rank(player_id: str):
+    """The player's rank by Elo overall and within their grade band (ties share a rank)."""
+    rank = await registry.player_rank(player_id)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="Player not found")
+    return rank
 
 @app.get("/players/{player_id}", tags=["Players"])
-def get_player(player_id: str):
-    rows = registry.get_player(player_id=player_id)
+async def get_player(player_id: str):
+    rows = await registry.get_player(player_id)
     if not rows:
         raise HTTPException(status_code=404, detail="Player not found")
     return rows[0]
 
 @app.post("/players", status_code=201, tags=["Players"])
-def create_player(payload: PlayerCreate):
+async def create_player(payload: PlayerCreate):
     try:
-        return registry.register_player(
+        return await registry.register_player(
             payload.first_name, payload.surname, payload.rating, payload.elo
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/players/bulk", status_code=201, tags=["Players"])
+async def create_players(payload: list[PlayerCreate], response: Response):
+    """
+    Register many players in one transaction. 201 if every row was created,
+    207 if only some were, 400 if none were; the body lists what was created
+    and each rejected row's index and error either way.
+    """
+    result = await registry.register_players(p.model_dump() for p in payload)
+    if result["errors"]:
+        response.status_code = 207 if result["created"] else 400
+    return result
+
 @app.patch("/players/{player_id}", tags=["Players"])
-def update_player(player_id: str, payload: PlayerUpdate):
+async def update_player(player_id: str, payload: PlayerUpdate):
     try:
-        updated = registry.update_player(
+        updated = await registry.update_player(
             player_id,
             first_name=payload.first_name,
             surname=payload.surname,
@@ -49,16 +322,164 @@ def update_player(player_id: str, payload: PlayerUpdate):
         )
         if not updated:
             raise HTTPException(status_code=404, detail="Player not found (or no fields changed)")
-        return registry.get_player(player_id=player_id)[0]
+        return (await registry.get_player(player_id))[0]
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.delete("/players/{player_id}", tags=["Players"])
-def delete_player(player_id: str):
+async def delete_player(player_id: str):
     try:
-        deleted = registry.delete_player(player_id)
+        deleted = await registry.delete_player(player_id)
         if not deleted:
             raise HTTPException(status_code=404, detail="Player not found")
         return {"deleted": True}
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# -----------------------------
+# Sessions
+# -----------------------------
+
+def _session_store() -> SessionStore:
+    global _store
+    if _store is None:
+        _store = SessionStore(registry.registry.db)
+    return _store
+
+def _live(session_id: str) -> LiveSession:
+    live = live_sessions.get(session_id)
+    if live is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return live
+
+async def _apply(live: LiveSession, op, *args):
+    try:
+        return await live.apply(op, *args)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/sessions", status_code=201, tags=["Sessions"])
+async def create_session():
+    store = _session_store()
+    state = SessionState(session_id=store.open_session(), store=store)
+    live = live_sessions[state.session_id] = LiveSession(state)
+    return {"id": state.session_id, "seq": live.feed.seq, "state": live.feed.view}
+
+@app.get("/sessions/{session_id}", tags=["Sessions"])
+async def get_session(session_id: str):
+    live = _live(session_id)
+    return {"id": session_id, "seq": live.feed.seq, "state": live.feed.view}
+
+@app.post("/sessions/{session_id}/attendees", tags=["Sessions"])
+async def add_session_attendees(session_id: str, payload: PlayerLookup):
+    live = _live(session_id)
+    players, missing = await registry.get_players(payload.ids)
+    added = await _apply(live, sessions_engine.add_attendees, live.state, players)
+    return {"added": [p["id"] for p in added], "missing": missing, "seq": live.feed.seq}
+
+@app.delete("/sessions/{session_id}/attendees/{player_id}", tags=["Sessions"])
+async def remove_session_attendee(session_id: str, player_id: str):
+    live = _live(session_id)
+    await _apply(live, sessions_engine.remove_attendee, live.state, player_id)
+    return {"seq": live.feed.seq}
+
+@app.post("/sessions/{session_id}/attendees/{player_id}/pause", tags=["Sessions"])
+async def pause_session_attendee(session_id: str, player_id: str):
+    live = _live(session_id)
+    await _apply(live, sessions_engine.pause_attendee, live.state, player_id)
+    return {"seq": live.feed.seq}
+
+@app.post("/sessions/{session_id}/attendees/{player_id}/unpause", tags=["Sessions"])
+async def unpause_session_attendee(session_id: str, player_id: str):
+    live = _live(session_id)
+    await _apply(live, sessions_engine.unpause_attendee, live.state, player_id)
+    return {"seq": live.feed.seq}
+
+@app.post("/sessions/{session_id}/start", tags=["Sessions"])
+async def start_session(session_id: str, payload: SessionStart):
+    fmt = "d" if payload.format == "doubles" else "s"
+    live = _live(session_id)
+    await _apply(
+        live,
+        sessions_engine.start_session,
+        registry.registry,
+        live.state,
+        fmt,
+        payload.courts,
+        payload.seed,
+    )
+    return {"seq": live.feed.seq}
+
+@app.post("/sessions/{session_id}/courts/{court_no}/complete", tags=["Sessions"])
+async def complete_session_court(session_id: str, court_no: int, payload: CourtComplete | None = None):
+    live = _live(session_id)
+    score = payload.score if payload else None
+    refilled = await _apply(
+        live, sessions_engine.complete_court, registry.registry, live.state, court_no, score
+    )
+    return {"refilled": refilled, "seq": live.feed.seq}
+
+@app.post("/sessions/{session_id}/courts/complete", tags=["Sessions"])
+async def complete_session_courts(session_id: str, payload: CourtsComplete):
+    """Finish several courts at once; their refills are balanced together."""
+    live = _live(session_id)
+    refilled = await _apply(
+        live, sessions_engine.complete_courts, registry.registry, live.state, payload.courts, payload.scores
+    )
+    return {"refilled": dict(zip(payload.courts, refilled)), "seq": live.feed.seq}
+
+@app.post("/sessions/{session_id}/end", tags=["Sessions"])
+async def end_session(session_id: str):
+    live = _live(session_id)
+    await _apply(live, sessions_engine.end_session, live.state)
+    live_sessions.pop(session_id, None)
+    live.feed.close()
+    return {"ended": True, "seq": live.feed.seq}
+
+@app.websocket("/sessions/{session_id}/feed")
+async def session_feed(websocket: WebSocket, session_id: str, since: int | None = None):
+    """
+    Push court / waiting-list / attendee diffs as `{"seq", "changes"}` messages.
+
+    The first message is `{"seq", "full"}` unless `since` is given and the
+    diffs after it are still held, in which case those are replayed instead.
+    A client that falls behind gets a fresh `full` message and carries on.
+    """
+    live = live_sessions.get(session_id)
+    if live is None:
+        await websocket.close(code=4404)
+        return
+
+    await websocket.accept()
+    feed = live.feed
+    # Subscribe and read the backlog with no await in between, so no diff is missed or repeated.
+    queue = feed.subscribe()
+    backlog = feed.since(since) if since is not None else None
+    full = feed.full() if backlog is None else None
+    last_seq = feed.seq
+    try:
+        if full is not None:
+            await websocket.send_text(full)
+        else:
+            for _, text in backlog:
+                await websocket.send_text(text)
+
+        while True:
+            message = await queue.get()
+            if message is CLOSED:
+                await websocket.close()
+                return
+            if message is RESYNC:
+                last_seq = feed.seq
+                await websocket.send_text(feed.full())
+                continue
+            seq, text = message
+            if seq > last_seq:
+                last_seq = seq
+                await websocket.send_text(text)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        feed.unsubscribe(queue)
+
@@ -0,0 +1,152 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import AsyncIterator, Callable, Hashable, Iterable, Iterator, Mapping, Sequence, TypeVar
+
+from core.constants import DB_READ_WORKERS, LEADERBOARD_DEFAULT_LIMIT, SEARCH_DEFAULT_LIMIT, STREAM_CHUNK_ROWS
+from core.player import PlayerRegistry
+from core.player_io import import_lines
+
+T = TypeVar("T")
+
+
+def _take(rows: Iterator[dict], n: int) -> list[dict]:
+    return list(islice(rows, n))
+
+
+class AsyncPlayerRegistry:
+    """
+    Awaitable front for PlayerRegistry, used by the API.
+
+    Reads run on a small pool of threads, each with its own query-only
+    connection. Identical reads that overlap share one query, and every caller
+    gets the same result objects, so treat them as read-only. Writes queue on
+    one dedicated thread and run one at a time in arrival order. The event
+    loop never blocks on SQLite. Calls run in a copy of the caller's context,
+    so per-request metrics follow them onto the worker threads.
+    """
+
+    def __init__(self, registry: PlayerRegistry | None = None, *, read_workers: int = DB_READ_WORKERS) -> None:
+        self.registry = registry or PlayerRegistry()
+        self._readers = ThreadPoolExecutor(read_workers, thread_name_prefix="db-read")
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="db-write")
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    async def _read(self, key: Hashable, fn: Callable[[], T]) -> T:
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.get_running_loop().run_in_executor(self._readers, contextvars.copy_context().run, fn)
+            self._inflight[key] = fut
+
+            def _forget(done: asyncio.Future) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            fut.add_done_callback(_forget)
+        # One caller going away must not cancel the query for the others.
+        return await asyncio.shield(fut)
+
+    async def _write(self, fn: Callable[[], T]) -> T:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._writer, contextvars.copy_context().run, fn)
+        finally:
+            # Reads issued from now on must see this write, so stop sharing older ones.
+            self._inflight.clear()
+
+    # -- reads --
+
+    async def get_player(self, player_id: str) -> list[dict]:
+        return await self._read(
+            ("get_player", player_id),
+            functools.partial(self.registry.get_player, player_id=player_id),
+        )
+
+    async def get_players(self, player_ids: Iterable[str]) -> tuple[list[dict], list[str]]:
+        ids = tuple(player_ids)
+        return await self._read(("get_players", ids), functools.partial(self.registry.get_players, ids))
+
+    async def players_page(
+        self,
+        limit: int,
+        *,
+        fields: Sequence[str] | None = None,
+        after: Sequence[str] | None = None,
+    ) -> tuple[list[dict], tuple[str, str, str] | None]:
+        fields = tuple(fields) if fields else None
+        after = tuple(after) if after else None
+        return await self._read(
+            ("players_page", limit, fields, after),
+            functools.partial(self.registry.players_page, limit, fields=fields, after=after),
+        )
+
+    async def search(self, query: str, limit: int = SEARCH_DEFAULT_LIMIT) -> list[dict]:
+        return await self._read(("search", query, limit), functools.partial(self.registry.search, query, limit))
+
+    async def leaderboard(
+        self,
+        *,
+        grade: str | None = None,
+        offset: int = 0,
+        limit: int = LEADERBOARD_DEFAULT_LIMIT,
+    ) -> tuple[list[dict], int]:
+        return await self._read(
+            ("leaderboard", grade, offset, limit),
+            functools.partial(self.registry.leaderboard, grade=grade, offset=offset, limit=limit),
+        )
+
+    async def player_rank(self, player_id: str) -> dict | None:
+        return await self._read(("player_rank", player_id), functools.partial(self.registry.player_rank, player_id))
+
+    async def players_version(self) -> int:
+        return await self._read(("players_version",), self.registry.players_version)
+
+    def iter_players(
+        self,
+        *,
+        fields: Sequence[str] | None = None,
+        after: Sequence[str] | None = None,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Stream players in listing order, STREAM_CHUNK_ROWS at a time.
+        Arguments are validated on call (ValueError); rows are fetched on the reader threads.
+        """
+        rows = self.registry.iter_players(fields=fields, after=after)
+        return self._stream(rows)
+
+    async def _stream(self, rows: Iterator[dict]) -> AsyncIterator[list[dict]]:
+        loop = asyncio.get_running_loop()
+        take = functools.partial(contextvars.copy_context().run, _take, rows, STREAM_CHUNK_ROWS)
+        pending: asyncio.Future | None = None
+        try:
+            while chunk := await (pending := loop.run_in_executor(self._readers, take)):
+                yield chunk
+        finally:
+            # A cancelled consumer leaves its chunk still being read on a reader
+            # thread, and `rows` can't be closed while it is running.
+            if pending is not None:
+                await asyncio.wait([pending])
+            await loop.run_in_executor(self._readers, rows.close)
+
+    # -- writes --
+
+    async def register_player(self, first_name: str, surname: str, rating: str = "E", elo: float | None = None) -> dict:
+        return await self._write(functools.partial(self.registry.register_player, first_name, surname, rating, elo))
+
+    async def register_players(self, batch: Iterable[Mapping]) -> dict:
+        return await self._write(functools.partial(self.registry.register_players, list(batch)))
+
+    async def import_lines(self, lines: Iterable[str], fmt: str) -> dict:
+        """Import CSV or JSONL text; `lines` is read on the writer thread, so it may be a file."""
+        return await self._write(functools.partial(import_lines, self.registry, lines, fmt))
+
+    async def update_player(self, player_id: str, **fields) -> bool:
+        return await self._write(functools.partial(self.registry.update_player, player_id, **fields))
+
+    async def delete_player(self, player_id: str) -> bool:
+        return await self._write(functools.partial(self.registry.delete_player, player_id))
+
+    def close(self) -> None:
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
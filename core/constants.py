@@ -51,9 +51,15 @@ BOOST_GAMMA = 0.05
 # 2.0 = stronger player gets noticeably larger share.
 SPLIT_POWER = 2.0
 
+# Batches with at least this many matches are rated with the NumPy path
+VECTORIZE_MIN_MATCHES = 32
 
 
 
+
+# Grading (PlayerRegistry.update_grades): a player moves to the grade their
+# Elo falls in under GRADE_THRESHOLDS once on a win streak this long (up) or
+# a losing streak this long (down)
 PROMOTION_MATCH_STREAK = 8
 
 DEMOTION_MATCH_STREAK = 8
@@ -64,4 +70,119 @@ MAX_PARTNER_GAP = 250
 
 MAX_TEAM_DIFF = 300
 
+# Pairs of foursomes the doubles optimiser may try swapping players between
+# before it returns its best grouping so far (a count, not a time, so results
+# don't depend on machine speed; about 50 ms of work)
+MATCHMAKING_MAX_SWAP_CHECKS = 400
+
+# How many neighbouring foursomes (in Elo order) the optimiser swaps players with
+SWAP_WINDOW = 3
+
+# Cost of pairing two players who have already partnered / faced each other
+# tonight, per previous game together, in Elo points of team imbalance so it
+# trades off against balance when a court is refilled
+PARTNER_REPEAT_WEIGHT = 100.0
+OPPONENT_REPEAT_WEIGHT = 50.0
+# Extra waiting players (on the same games-played count) considered when
+# filling a court, so repeat pairings can be avoided without skipping the queue
+REFILL_LOOKAHEAD = 4
+# Matches picked ahead per court, so a finished court is refilled straight
+# from the ready queue and the board can show who is on next (0: pick at refill)
+READY_MATCHES_PER_COURT = 1
+
 DATABASE_PATH = "database/club.db"
+
+
+# DATABASE CONNECTIONS
+
+# How long a connection waits on a locked database before giving up (ms)
+DB_BUSY_TIMEOUT_MS = 5000
+
+# Prepared statements kept per connection
+DB_STATEMENT_CACHE_SIZE = 256
+
+# Random suffixes tried before player id allocation gives up
+ID_ALLOCATION_ATTEMPTS = 100
+
+# Rows inserted per executemany when importing players
+IMPORT_BATCH_ROWS = 5000
+
+# Import errors listed in the result; any beyond this are only counted
+IMPORT_MAX_ERRORS = 1000
+
+# Uploaded import bodies larger than this are spooled to a temporary file (bytes)
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+# PLAYER SEARCH
+
+# Results returned by a search when no limit is given
+SEARCH_DEFAULT_LIMIT = 10
+
+# Largest search a client may request
+SEARCH_MAX_LIMIT = 100
+
+# Names read from the search index and scored for typo-tolerant search; caps
+# the cost of very common fragments (e.g. "son")
+SEARCH_CANDIDATES = 200
+
+# Rarest query trigrams used to find candidates for typo-tolerant search
+SEARCH_FUZZY_GRAMS = 4
+
+# Spelling fallback for typo-tolerant search: a query word may be one edit
+# away from a name per this many letters (at least one edit)
+SEARCH_TYPO_LETTERS = 4
+
+
+# LEADERBOARD
+
+# Players per page when no limit is given
+LEADERBOARD_DEFAULT_LIMIT = 50
+
+# Players per block of the in-memory ranking; adding or removing a player
+# shifts at most about twice this many entries
+LEADERBOARD_BLOCK_SIZE = 512
+
+# API
+
+# Largest page a client may request from GET /players
+MAX_PAGE_SIZE = 1000
+
+# Rows serialised per chunk when streaming a response
+STREAM_CHUNK_ROWS = 500
+
+# Reader threads behind the async API registry (writes always use one thread)
+DB_READ_WORKERS = 4
+
+# Diffs each live session keeps so reconnecting feed clients can catch up
+FEED_HISTORY = 1000
+
+# Messages buffered per feed subscriber before it is sent a full resync instead
+FEED_QUEUE_SIZE = 256
+
+
+# SESSION JOURNAL
+
+# How often queued session events are committed in the background (s)
+JOURNAL_FLUSH_INTERVAL_S = 0.5
+
+# Queued statements that trigger a commit before the interval is up
+JOURNAL_MAX_BATCH = 200
+
+
+# DISPLAY
+
+# Columns between court blocks on the board
+BOARD_GAP = 3
+
+# How often the live board checks for a resized terminal while waiting for input (s)
+BOARD_POLL_INTERVAL_S = 0.5
+
+
+# METRICS (enabled with BADMINTON_METRICS=1)
+
+# Histogram bucket upper bounds for timings (s)
+METRICS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Registry calls slower than this are logged with their SQL (ms); 0 turns the log off
+SLOW_QUERY_MS = 100.0
@@ -1,16 +1,174 @@
+import os
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator, Sequence, TypeVar
+
+from core.constants import DB_BUSY_TIMEOUT_MS, DB_STATEMENT_CACHE_SIZE
+from core.metrics import metrics
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-DB_FILE = BASE_DIR / "badminton.db"
+# BADMINTON_DB points the app (and a uvicorn worker) at another database file.
+DB_FILE = Path(os.environ.get("BADMINTON_DB", BASE_DIR / "badminton.db"))
 SCHEMA_FILE = BASE_DIR / "database" / "schema.sql"
 
+# Lowest host-parameter limit across SQLite builds still in the wild.
+SQLITE_MAX_VARIABLES = 999
+
+T = TypeVar("T")
+
+
+def chunked(items: Sequence[T], size: int = SQLITE_MAX_VARIABLES) -> Iterator[Sequence[T]]:
+    """Split `items` into slices small enough for one `IN (?, ?, ...)` query."""
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+class ConnectionManager:
+    """
+    Long-lived SQLite connections shared by the whole process.
+
+    Reads go through one query-only connection per thread; writes go through a
+    single writer connection guarded by a lock. The database runs in WAL mode,
+    so readers keep working while a write transaction is open.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = DB_FILE,
+        *,
+        busy_timeout_ms: int = DB_BUSY_TIMEOUT_MS,
+        cached_statements: int = DB_STATEMENT_CACHE_SIZE,
+    ) -> None:
+        self.path = Path(path)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._writer: sqlite3.Connection | None = None
+        self._readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
+    def _connect(self, *, query_only: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,  # transactions are managed explicitly in write()
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        if metrics.enabled:
+            metrics.on_connect()
+            conn.set_trace_callback(metrics.on_statement)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        if query_only:
+            conn.execute("PRAGMA query_only = ON")
+        else:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def _writer_connection(self) -> sqlite3.Connection:
+        # The writer is opened first so WAL mode is set before any reader attaches.
+        if self._writer is None:
+            self._writer = self._connect(query_only=False)
+        return self._writer
+
+    def _reader_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            with self._write_lock:
+                self._writer_connection()
+            conn = self._connect(query_only=True)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Yield this thread's read connection. Each statement sees the latest commit."""
+        yield self._reader_connection()
+
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """
+        Yield a private query-only connection, closed on exit. Use it for long
+        streams so they don't pin this thread's shared reader to an old snapshot.
+        """
+        with self._write_lock:
+            self._writer_connection()
+        conn = self._connect(query_only=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """
+        Yield the writer connection inside a BEGIN IMMEDIATE transaction.
+        Commits on success, rolls back on error. Nested calls join the outer transaction.
+        """
+        with self._write_lock:
+            conn = self._writer_connection()
+            if conn.in_transaction:
+                yield conn
+                return
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        self._local = threading.local()
+
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+_manager: ConnectionManager | None = None
+_manager_lock = threading.Lock()
+
+
+def get_manager() -> ConnectionManager:
+    """Return the process-wide ConnectionManager for DB_FILE."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ConnectionManager(DB_FILE)
+    return _manager
+
+
 def get_db_connection() -> sqlite3.Connection:
     conn = sqlite3.connect(DB_FILE)
     conn.row_factory = sqlite3.Row
     return conn
 
-def init_db() -> None:
-    with get_db_connection() as conn:
-        conn.executescript(SCHEMA_FILE.read_text(encoding="utf-8"))
-        conn.commit()
\ No newline at end of file
+def init_db() -> list[str]:
+    """
+    Bring the database up to the current schema (see core.migrations).
+    Returns the migration steps applied; when there are none this is a
+    single pragma read.
+    """
+    from core.migrations import migrate  # core.migrations builds on this module
+
+    conn = sqlite3.connect(get_manager().path, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+    try:
+        return migrate(conn)
+    finally:
+        conn.close()
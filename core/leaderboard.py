@@ -0,0 +1,251 @@
+"""
+In-memory Elo ranking for the leaderboard endpoints.
+
+PlayerRegistry keeps one Leaderboard per process, loads it on the first
+ranking query and then feeds it each rating change from its own write
+transactions, so it is never re-sorted. Writes from another process are
+spotted through the players version counter (table_versions) and trigger a
+reload on the next query.
+"""
+from __future__ import annotations
+
+import math
+import threading
+from bisect import bisect_left, insort
+from typing import Iterable, Iterator, Mapping
+
+from core.constants import GRADE_THRESHOLDS, LEADERBOARD_BLOCK_SIZE
+
+
+def grade_band(grade: str) -> tuple[float, float]:
+    """The [low, high) Elo range GRADE_THRESHOLDS gives `grade`; the lowest band is open below."""
+    for i, (name, threshold) in enumerate(GRADE_THRESHOLDS):
+        if name == grade:
+            low = -math.inf if i == 0 else float(threshold)
+            high = float(GRADE_THRESHOLDS[i + 1][1]) if i + 1 < len(GRADE_THRESHOLDS) else math.inf
+            return low, high
+    raise ValueError(f"Invalid grade '{grade}'. Must be one of {tuple(g for g, _ in GRADE_THRESHOLDS)}")
+
+
+def grade_for_elo(elo: float) -> str:
+    grade = GRADE_THRESHOLDS[0][0]
+    for name, threshold in GRADE_THRESHOLDS:
+        if elo >= threshold:
+            grade = name
+    return grade
+
+
+class OrderedKeys:
+    """
+    Sorted list with O(log n) rank (`index_of`) and positional lookup.
+
+    Keys live in blocks of about `block_size`; a Fenwick tree over the block
+    lengths turns a position into (block, offset) and back in O(log blocks).
+    Adding or removing a key touches one block.
+    """
+
+    def __init__(self, keys: Iterable = (), *, block_size: int = LEADERBOARD_BLOCK_SIZE) -> None:
+        self._block_size = block_size
+        ordered = sorted(keys)
+        self._blocks: list[list] = [ordered[i : i + block_size] for i in range(0, len(ordered), block_size)]
+        self._len = len(ordered)
+        self._reindex()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _reindex(self) -> None:
+        self._maxes = [block[-1] for block in self._blocks]
+        # Fenwick tree of block lengths, built in O(blocks).
+        tree = [0] + [len(block) for block in self._blocks]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _grow(self, block: int, delta: int) -> None:
+        i = block + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _before(self, block: int) -> int:
+        """Keys in blocks before `block`."""
+        total = 0
+        while block:
+            total += self._tree[block]
+            block -= block & -block
+        return total
+
+    def _locate(self, pos: int) -> tuple[int, int]:
+        """(block, offset) of position `pos`."""
+        block = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = block + step
+            if nxt < len(self._tree) and self._tree[nxt] <= pos:
+                block = nxt
+                pos -= self._tree[nxt]
+            step >>= 1
+        return block, pos
+
+    def add(self, key) -> None:
+        if not self._blocks:
+            self._blocks.append([key])
+            self._len = 1
+            self._reindex()
+            return
+        b = min(bisect_left(self._maxes, key), len(self._blocks) - 1)
+        block = self._blocks[b]
+        insort(block, key)
+        self._maxes[b] = block[-1]
+        self._len += 1
+        if len(block) > 2 * self._block_size:
+            self._blocks[b : b + 1] = [block[: self._block_size], block[self._block_size :]]
+            self._reindex()
+        else:
+            self._grow(b, 1)
+
+    def remove(self, key) -> None:
+        """Remove `key` (ValueError if absent)."""
+        b = bisect_left(self._maxes, key)
+        block = self._blocks[b] if b < len(self._blocks) else []
+        i = bisect_left(block, key)
+        if i == len(block) or block[i] != key:
+            raise ValueError(f"{key!r} not in list")
+        del block[i]
+        self._len -= 1
+        if block:
+            self._maxes[b] = block[-1]
+            self._grow(b, -1)
+        else:
+            del self._blocks[b]
+            self._reindex()
+
+    def index_of(self, key) -> int:
+        """How many keys sort before `key`."""
+        b = bisect_left(self._maxes, key)
+        if b == len(self._blocks):
+            return self._len
+        return self._before(b) + bisect_left(self._blocks[b], key)
+
+    def slice(self, start: int, stop: int) -> Iterator:
+        """Keys at positions start..stop-1."""
+        stop = min(stop, self._len)
+        if start >= stop:
+            return
+        b, i = self._locate(start)
+        remaining = stop - start
+        while remaining:
+            chunk = self._blocks[b][i : i + remaining]
+            yield from chunk
+            remaining -= len(chunk)
+            b, i = b + 1, 0
+
+
+class Leaderboard:
+    """
+    Players ranked by Elo, highest first. Tied players share a rank
+    ("1, 2, 2, 4") and are listed by id.
+
+    Thread-safe. `version` is the players version the ranking matches, or
+    None when it must be (re)loaded.
+    """
+
+    def __init__(self, *, block_size: int = LEADERBOARD_BLOCK_SIZE) -> None:
+        self._block_size = block_size
+        self._keys = OrderedKeys(block_size=block_size)  # (-elo, player id)
+        self._elo: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.version: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._elo)
+
+    def load(self, version: int, rows: Iterable[tuple[str, float]]) -> None:
+        """Replace the ranking with (player id, elo) rows read at players `version`."""
+        elo = {pid: float(value) for pid, value in rows}
+        keys = OrderedKeys(((-value, pid) for pid, value in elo.items()), block_size=self._block_size)
+        with self._lock:
+            self._elo, self._keys, self.version = elo, keys, version
+
+    def apply(self, changes: Mapping[str, float | None], *, before: int, after: int) -> None:
+        """
+        Apply {player id: new elo, or None if deleted} from a write that took
+        the players version from `before` to `after`. If the ranking wasn't
+        at `before`, someone else wrote in between, so it is marked for reload.
+        """
+        with self._lock:
+            if self.version != before:
+                self.version = None
+                return
+            for pid, value in changes.items():
+                old = self._elo.pop(pid, None)
+                if old is not None:
+                    self._keys.remove((-old, pid))
+                if value is not None:
+                    value = float(value)
+                    self._elo[pid] = value
+                    self._keys.add((-value, pid))
+            self.version = after
+
+    def invalidate(self) -> None:
+        """Reload on the next query."""
+        with self._lock:
+            self.version = None
+
+    def _above(self, elo: float) -> int:
+        """Players rated strictly higher than `elo`."""
+        return self._keys.index_of((-elo,))
+
+    def _at_least(self, elo: float) -> int:
+        """Players rated `elo` or higher."""
+        if elo == math.inf:
+            return 0
+        if elo == -math.inf:
+            return len(self._keys)
+        return self._keys.index_of((math.nextafter(-elo, math.inf),))
+
+    def page(self, offset: int, limit: int, grade: str | None = None) -> tuple[list[tuple[int, str, float]], int]:
+        """
+        (rank, player id, elo) for `limit` players from `offset` down the
+        ranking, or down one grade band with ranks counted within it; and
+        how many players the ranking (or band) holds.
+        """
+        with self._lock:
+            if grade is None:
+                start, stop = 0, len(self._keys)
+            else:
+                low, high = grade_band(grade)
+                start, stop = self._at_least(high), self._at_least(low)
+
+            entries: list[tuple[int, str, float]] = []
+            rank, previous = 0, None
+            first = start + offset
+            for pos, (neg_elo, pid) in enumerate(self._keys.slice(first, min(stop, first + limit)), first):
+                if neg_elo != previous:
+                    rank = (self._above(-neg_elo) if previous is None else pos) - start + 1
+                    previous = neg_elo
+                entries.append((rank, pid, -neg_elo))
+            return entries, stop - start
+
+    def rank(self, player_id: str) -> dict | None:
+        """Overall and in-band rank of one player, or None if they aren't ranked."""
+        with self._lock:
+            elo = self._elo.get(player_id)
+            if elo is None:
+                return None
+            grade = grade_for_elo(elo)
+            low, high = grade_band(grade)
+            above = self._above(elo)
+            band_start = self._at_least(high)
+            return {
+                "id": player_id,
+                "elo": elo,
+                "rank": above + 1,
+                "players": len(self._keys),
+                "grade": grade,
+                "grade_rank": above - band_start + 1,
+                "grade_players": self._at_least(low) - band_start,
+            }
@@ -0,0 +1,215 @@
+"""
+Timers and counters for the hot paths, rendered as Prometheus text.
+
+Everything is off unless BADMINTON_METRICS=1. While off, `timed` wrappers cost
+one attribute check and connections get no SQL trace callback. The slow
+registry-call log threshold can be overridden with BADMINTON_SLOW_QUERY_MS.
+"""
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, TypeVar
+
+from core.constants import METRICS_BUCKETS, SLOW_QUERY_MS
+
+F = TypeVar("F", bound=Callable)
+
+slow_log = logging.getLogger("badminton.slow_query")
+
+
+def _label_text(labelnames: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{k}="{v}"' for k, v in zip(labelnames, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = METRICS_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: dict[tuple[str, ...], list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                le = _label_text(self.labelnames + ("le",), labels + (f"{bound:g}",))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _label_text(self.labelnames + ("le",), labels + ("+Inf",))
+            lines.append(f"{self.name}_bucket{le} {series[-1]}")
+            base = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{base} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{base} {series[-1]}")
+        return lines
+
+
+@dataclass
+class RequestStats:
+    """What one API request cost; feeds the Server-Timing header."""
+    sql_statements: int = 0
+    connections: int = 0
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+_request: contextvars.ContextVar[RequestStats | None] = contextvars.ContextVar("request_stats", default=None)
+_call_sql: contextvars.ContextVar[list[str] | None] = contextvars.ContextVar("call_sql", default=None)
+
+
+class Metrics:
+    def __init__(self, *, enabled: bool, slow_query_ms: float) -> None:
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+
+        self.calls = Histogram("badminton_call_seconds", "Time spent in instrumented calls.", ("area", "name"))
+        self.sql_statements = Counter("badminton_sql_statements_total", "SQL statements executed.")
+        self.connections = Counter("badminton_db_connections_opened_total", "SQLite connections opened.")
+        self.slow_calls = Counter("badminton_slow_calls_total", "Registry calls over the slow-query threshold.", ("name",))
+        self.http_requests = Counter("badminton_http_requests_total", "HTTP requests served.", ("method", "route", "status"))
+        self.http_seconds = Histogram("badminton_http_request_seconds", "HTTP request latency to first byte.", ("method", "route"))
+        self._all = (
+            self.calls, self.sql_statements, self.connections, self.slow_calls,
+            self.http_requests, self.http_seconds,
+        )
+
+    # -- hooks called from core.db --
+
+    def on_connect(self) -> None:
+        self.connections.inc()
+        stats = _request.get()
+        if stats is not None:
+            stats.connections += 1
+
+    def on_statement(self, sql: str) -> None:
+        """sqlite3 trace callback: runs on the thread that executes the statement."""
+        self.sql_statements.inc()
+        stats = _request.get()
+        if stats is not None:
+            stats.sql_statements += 1
+        captured = _call_sql.get()
+        if captured is not None:
+            captured.append(sql)
+
+    # -- requests --
+
+    def start_request(self) -> RequestStats:
+        stats = RequestStats()
+        _request.set(stats)
+        return stats
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._all:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
+metrics = Metrics(
+    enabled=os.environ.get("BADMINTON_METRICS", "") == "1",
+    slow_query_ms=_env_float("BADMINTON_SLOW_QUERY_MS", SLOW_QUERY_MS),
+)
+
+
+def _summarise_sql(statements: list[str], limit: int = 10) -> str:
+    shown = [" ".join(sql.split()) for sql in statements[:limit]]
+    if len(statements) > limit:
+        shown.append(f"(+{len(statements) - limit} more)")
+    return " | ".join(shown)
+
+
+def timed(area: str, name: str | None = None, *, slow_log_sql: bool = False) -> Callable[[F], F]:
+    """
+    Record each call's duration under badminton_call_seconds{area, name}
+    and in the current request's Server-Timing. With `slow_log_sql`, calls
+    slower than the slow-query threshold are logged with the SQL they ran.
+    """
+
+    def decorate(fn: F) -> F:
+        label = name or fn.__name__
+        timing_key = f"{area}.{label}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+
+            captured = None
+            token = None
+            if slow_log_sql and metrics.slow_query_ms > 0 and _call_sql.get() is None:
+                captured = []
+                token = _call_sql.set(captured)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - t0
+                if token is not None:
+                    _call_sql.reset(token)
+                metrics.calls.observe(elapsed, area, label)
+                stats = _request.get()
+                if stats is not None:
+                    stats.timings[timing_key] = stats.timings.get(timing_key, 0.0) + elapsed
+                if captured is not None and elapsed * 1000 >= metrics.slow_query_ms:
+                    metrics.slow_calls.inc(label)
+                    slow_log.warning("%s took %.1f ms: %s", label, elapsed * 1000, _summarise_sql(captured))
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
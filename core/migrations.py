@@ -0,0 +1,176 @@
+"""
+Versioned schema migrations.
+
+The applied version lives in the database header (PRAGMA user_version), so
+an up-to-date database costs one pragma read at startup. Step N of
+MIGRATIONS takes a database from version N to N + 1 inside its own
+transaction; the version is bumped in that same transaction, so a failed
+step leaves nothing half-applied.
+
+database/schema.sql is the baseline (step 1). Later schema changes are new
+steps appended here, never edits to an applied step.
+"""
+from __future__ import annotations
+
+import sqlite3
+from typing import Callable, Iterator
+
+from core.db import SCHEMA_FILE
+
+# Rating columns added to the players table after the first release, with
+# the definitions schema.sql gives them.
+_PLAYER_COLUMNS = {
+    "elo": "REAL NOT NULL DEFAULT 1500.0",
+    "boosted": "REAL NOT NULL DEFAULT 1500.0",
+    "total_games": "INTEGER NOT NULL DEFAULT 0",
+    "total_wins": "INTEGER NOT NULL DEFAULT 0",
+    "total_losses": "INTEGER NOT NULL DEFAULT 0",
+    "streak_wins": "INTEGER NOT NULL DEFAULT 0",
+    "streak_losses": "INTEGER NOT NULL DEFAULT 0",
+}
+
+
+def _statements(script: str) -> Iterator[str]:
+    """Split an SQL script into statements (trigger bodies stay whole)."""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield statement
+            statement = ""
+
+
+def _run_script(conn: sqlite3.Connection, script: str) -> None:
+    # Not executescript(): it commits first, and each step must be one transaction.
+    for statement in _statements(script):
+        conn.execute(statement)
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _retire(conn: sqlite3.Connection, table: str) -> None:
+    """Drop a table from the old layout, or keep it as legacy_<table> if it holds rows."""
+    if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+        conn.execute(f"ALTER TABLE {table} RENAME TO legacy_{table}")
+    else:
+        conn.execute(f"DROP TABLE {table}")
+
+
+def _baseline(conn: sqlite3.Connection) -> None:
+    """
+    schema.sql, after bringing a database from the first release up to it:
+    players gain the rating columns (and lose the unique-name index; players
+    are told apart by id), and the old sessions / matches / match_players
+    tables, which had a different layout, are retired.
+    """
+    player_columns = _columns(conn, "players")
+    if player_columns:
+        for name, definition in _PLAYER_COLUMNS.items():
+            if name not in player_columns:
+                conn.execute(f"ALTER TABLE players ADD COLUMN {name} {definition}")
+        conn.execute("DROP INDEX IF EXISTS ux_players_full_name")
+
+    session_columns = _columns(conn, "sessions")
+    if session_columns and "date" not in session_columns:
+        for table in ("match_players", "matches", "sessions"):  # referencing tables first
+            if _columns(conn, table):
+                _retire(conn, table)
+
+    _run_script(conn, SCHEMA_FILE.read_text(encoding="utf-8"))
+
+
+def _rating_indexes(conn: sqlite3.Connection) -> None:
+    # Leaderboards order by elo / boosted. The rating replay joins matches to
+    # match_players and orders each match's players by team; covering that
+    # saves a table lookup per player.
+    _run_script(conn, """
+        CREATE INDEX IF NOT EXISTS idx_players_elo     ON players(elo);
+        CREATE INDEX IF NOT EXISTS idx_players_boosted ON players(boosted);
+        CREATE INDEX IF NOT EXISTS idx_match_players_match ON match_players(match_id, team, player_id);
+    """)
+
+
+def _grade_changes(conn: sqlite3.Connection) -> None:
+    # Audit trail for PlayerRegistry.update_grades, one row per grade change.
+    _run_script(conn, """
+        CREATE TABLE IF NOT EXISTS grade_changes (
+            id            INTEGER PRIMARY KEY,
+            player_id     TEXT    NOT NULL REFERENCES players(id) ON DELETE CASCADE,
+            session_id    TEXT,              -- session graded; NULL for a whole-club run
+            old_grade     TEXT    NOT NULL,
+            new_grade     TEXT    NOT NULL,
+            elo           REAL    NOT NULL,  -- at the time of the change
+            streak_wins   INTEGER NOT NULL,
+            streak_losses INTEGER NOT NULL,
+            changed_at    TEXT    NOT NULL DEFAULT (datetime('now'))
+        );
+        CREATE INDEX IF NOT EXISTS idx_grade_changes_player ON grade_changes(player_id);
+    """)
+
+
+def _match_rated_flag(conn: sqlite3.Connection) -> None:
+    # engine.recompute finds new work by this flag rather than by rowid:
+    # courts finish out of order, so a match can complete after a later-
+    # created one has been rated. Matches the rowid watermark had already
+    # passed count as rated.
+    _run_script(conn, """
+        ALTER TABLE matches ADD COLUMN rated INTEGER NOT NULL DEFAULT 0;
+        UPDATE matches SET rated = 1
+        WHERE status = 'completed' AND rowid <= (SELECT COALESCE(MAX(last_seq), 0) FROM rating_batches);
+        CREATE INDEX IF NOT EXISTS idx_matches_unrated ON matches(status) WHERE rated = 0;
+    """)
+
+
+MIGRATIONS: tuple[tuple[str, Callable[[sqlite3.Connection], None]], ...] = (
+    ("baseline schema", _baseline),
+    ("rating and match history indexes", _rating_indexes),
+    ("grade change audit", _grade_changes),
+    ("match rated flag", _match_rated_flag),
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> list[str]:
+    """
+    Apply any pending migrations, one transaction each. Returns the names of
+    the steps applied (empty if the database was already current). Safe to
+    run from several processes at once: each step re-checks the version once
+    it holds the write lock.
+    """
+    version = schema_version(conn)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {version} is newer than this app supports ({SCHEMA_VERSION})."
+        )
+    if version == SCHEMA_VERSION:
+        return []
+
+    applied: list[str] = []
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # transactions are managed explicitly below
+    try:
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = schema_version(conn)
+                if version >= SCHEMA_VERSION:
+                    conn.execute("COMMIT")
+                    break
+                name, step = MIGRATIONS[version]
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {version + 1}")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            applied.append(name)
+    finally:
+        conn.isolation_level = isolation_level
+    return applied
@@ -1,48 +1,361 @@
 import random
 import sqlite3
-from core.db import get_db_connection
-from core.constants import ALLOWED_GRADES, DEFAULT_ELO
+from contextlib import contextmanager
+from typing import Container, Iterable, Iterator, Mapping, Sequence
+from core.db import ConnectionManager, chunked, get_manager
+from core.constants import (
+    ALLOWED_GRADES,
+    DEFAULT_ELO,
+    DEMOTION_MATCH_STREAK,
+    GRADE_THRESHOLDS,
+    ID_ALLOCATION_ATTEMPTS,
+    IMPORT_BATCH_ROWS,
+    IMPORT_MAX_ERRORS,
+    LEADERBOARD_DEFAULT_LIMIT,
+    PROMOTION_MATCH_STREAK,
+    SEARCH_CANDIDATES,
+    SEARCH_DEFAULT_LIMIT,
+    SEARCH_FUZZY_GRAMS,
+    SEARCH_MAX_LIMIT,
+    SEARCH_TYPO_LETTERS,
+)
+from core.leaderboard import Leaderboard, grade_band
+from core.metrics import timed
+from model.model import RatingChange
+
+PLAYER_FIELDS = (
+    "id",
+    "first_name",
+    "surname",
+    "rating",
+    "elo",
+    "boosted",
+    "total_games",
+    "total_wins",
+    "total_losses",
+    "streak_wins",
+    "streak_losses",
+    "created_at",
+)
+
+# Columns owned by the rating engine.
+RATING_FIELDS = (
+    "elo",
+    "boosted",
+    "total_games",
+    "total_wins",
+    "total_losses",
+    "streak_wins",
+    "streak_losses",
+)
+
+# Listing order; backed by idx_players_name_order so keyset pages are index seeks.
+PLAYER_ORDER_KEY = ("surname", "first_name", "id")
+
+
+def _name_words(row: Mapping) -> list[str]:
+    return f"{row['first_name']} {row['surname']}".lower().split()
+
+
+def _like_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _fts_phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _trigrams(term: str) -> list[str]:
+    return [term[i : i + 3] for i in range(len(term) - 2)]
+
+
+def _prefix_end(prefix: str) -> str:
+    """Smallest string above every string starting with `prefix`."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Edits (insert, delete, substitute, swap two neighbours) turning `a` into `b`."""
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        before, previous = previous, current
+    return previous[-1]
+
+
+@contextmanager
+def _search_index_deferred(conn: sqlite3.Connection) -> Iterator[None]:
+    """
+    Inside a write transaction: suspend the per-row search index trigger and
+    index every player inserted meanwhile with one statement at the end,
+    which is several times cheaper for bulk inserts. On error the
+    transaction's rollback restores the trigger. A database without the
+    trigger is left as it is.
+    """
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_players_search_insert'"
+    ).fetchone()
+    if row is None:
+        yield
+        return
+    (trigger_sql,) = row
+    (last_rowid,) = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM players").fetchone()
+    conn.execute("DROP TRIGGER trg_players_search_insert")
+    yield
+    conn.execute(
+        """INSERT INTO players_search(rowid, first_name, surname)
+        SELECT rowid, first_name, surname FROM players WHERE rowid > ?""",
+        (last_rowid,),
+    )
+    conn.execute(trigger_sql)
 
 
 class PlayerRegistry:
 
-    def _generate_player_id(self, first_name: str, surname: str) -> str:
+    def __init__(self, db: ConnectionManager | None = None) -> None:
+        self.db = db or get_manager()
+        # Bumped inside every write transaction that changes a row, so
+        # in-memory caches (e.g. the session roster) know when to reload.
+        self.version = 0
+        # Loaded by the first ranking query, then kept current by the writes below.
+        self._leaderboard = Leaderboard()
+
+    @staticmethod
+    def _players_version(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT version FROM table_versions WHERE name = 'players'").fetchone()
+        return row["version"] if row else 0
+
+    @contextmanager
+    def _ranking_changes(self, conn: sqlite3.Connection) -> Iterator[dict[str, float | None]]:
+        """
+        Inside a write transaction: yields a dict to fill with {player id: new
+        elo, or None if deleted}, applied to the leaderboard once the block
+        is done. Costs nothing until a ranking has been asked for.
+        """
+        changes: dict[str, float | None] = {}
+        if self._leaderboard.version is None:
+            yield changes
+            return
+        before = self._players_version(conn)
+        yield changes
+        self._leaderboard.apply(changes, before=before, after=self._players_version(conn))
+
+    def _rank_updates(self, ranked: dict[str, float | None], updated: int, elos: list[tuple[str, float]]) -> None:
+        # An UPDATE naming an unknown id changes nothing, so the new Elos only
+        # go to the leaderboard when every row matched; otherwise it reloads.
+        if updated == len(elos):
+            ranked.update(elos)
+        else:
+            self._leaderboard.invalidate()
+
+    def _generate_player_id(
+        self,
+        conn: sqlite3.Connection,
+        first_name: str,
+        surname: str,
+        reserved: Container[str] | None = None,
+    ) -> str:
+        """
+        Probe random suffixes against the primary key. Call inside a write
+        transaction so the chosen id can't be taken before the INSERT.
+        `reserved` holds ids already handed out in the same batch.
+        """
         base = f"{first_name[0].upper()}{surname.capitalize()}"
-        existing_ids = {p["id"] for p in self.list_players()}
-        while True:
-            suffix = random.randint(1000, 9999)
-            new_id = f"{base}{suffix}"
-            if new_id not in existing_ids:
+        for _ in range(ID_ALLOCATION_ATTEMPTS):
+            new_id = f"{base}{random.randint(1000, 9999)}"
+            if reserved is not None and new_id in reserved:
+                continue
+            if conn.execute("SELECT 1 FROM players WHERE id = ?", (new_id,)).fetchone() is None:
                 return new_id
+        raise ValueError(f"Could not allocate a unique player id for '{base}'.")
 
 
-    def register_player(self, first_name: str, surname: str, rating: str = "E", elo: float | None = None) -> dict:
-            first_name = first_name.strip()
-            surname = surname.strip()
-            rating = rating.strip().upper()
+    @staticmethod
+    def _clean_new_player(first_name: str, surname: str, rating: str, elo: float | None) -> tuple[str, str, str, float]:
+        first_name = first_name.strip()
+        surname = surname.strip()
+        rating = rating.strip().upper()
+
+        if not first_name or not surname:
+            raise ValueError("First name and surname cannot be empty.")
+        if rating not in ALLOWED_GRADES:
+            raise ValueError(f"Invalid rating '{rating}'. Must be one of {ALLOWED_GRADES}")
+        starting_elo = elo if elo is not None else DEFAULT_ELO
+        return first_name, surname, rating, starting_elo
 
-            if not first_name or not surname:
-                raise ValueError("First name and surname cannot be empty.")
-            if rating not in ALLOWED_GRADES:
-                raise ValueError(f"Invalid rating '{rating}'. Must be one of {ALLOWED_GRADES}")
-            starting_elo = elo if elo is not None else DEFAULT_ELO
-            player_id = self._generate_player_id(first_name, surname)
+
+    @timed("registry", slow_log_sql=True)
+    def register_player(self, first_name: str, surname: str, rating: str = "E", elo: float | None = None) -> dict:
+            first_name, surname, rating, starting_elo = self._clean_new_player(first_name, surname, rating, elo)
 
             try:
-                with get_db_connection() as conn:
+                with self.db.write() as conn, self._ranking_changes(conn) as ranked:
+                    player_id = self._generate_player_id(conn, first_name, surname)
                     conn.execute(
                         """INSERT INTO players
                             (id, first_name, surname, rating, elo, boosted)
                         VALUES (?, ?, ?, ?, ?, ?)""",
                         (player_id, first_name, surname, rating, starting_elo, starting_elo),
                     )
-                    conn.commit()
+                    ranked[player_id] = starting_elo
+                    row = conn.execute("SELECT * FROM players WHERE id = ?", (player_id,)).fetchone()
+                    self.version += 1
             except sqlite3.IntegrityError:
                 raise ValueError("Player already exists.")
-            
-            return self.get_player(player_id=player_id)[0]
+
+            return dict(row)
+
+
+    @timed("registry", slow_log_sql=True)
+    def register_players(self, batch: Iterable[Mapping]) -> dict:
+        """
+        Register many players in one transaction.
+
+        Each item has `first_name`, `surname` and optionally `rating` / `elo`.
+        Valid rows are inserted with a single executemany; invalid or duplicate
+        rows are skipped and reported by their position in the batch:
+
+            {"created": [player, ...], "errors": [{"index": i, "error": "..."}]}
+        """
+        cleaned: list[tuple[int, tuple[str, str, str, float]]] = []
+        errors: list[dict] = []
+        for i, item in enumerate(batch):
+            try:
+                cleaned.append((i, self._clean_new_player(
+                    item.get("first_name") or "",
+                    item.get("surname") or "",
+                    item.get("rating") or "E",
+                    item.get("elo"),
+                )))
+            except ValueError as e:
+                errors.append({"index": i, "error": str(e)})
+
+        created: dict[str, dict] = {}
+        index_by_id: dict[str, int] = {}
+        with self.db.write() as conn, self._ranking_changes(conn) as ranked:
+            params: list[tuple] = []
+            for i, (first_name, surname, rating, starting_elo) in cleaned:
+                try:
+                    player_id = self._generate_player_id(conn, first_name, surname, reserved=index_by_id)
+                except ValueError as e:
+                    errors.append({"index": i, "error": str(e)})
+                    continue
+                index_by_id[player_id] = i
+                params.append((player_id, first_name, surname, rating, starting_elo, starting_elo))
+
+            # OR IGNORE keeps one duplicate name from aborting the whole batch;
+            # ignored rows are detected below because their id never appears.
+            conn.executemany(
+                """INSERT OR IGNORE INTO players
+                    (id, first_name, surname, rating, elo, boosted)
+                VALUES (?, ?, ?, ?, ?, ?)""",
+                params,
+            )
+            for chunk in chunked(list(index_by_id)):
+                placeholders = ", ".join("?" * len(chunk))
+                for row in conn.execute(f"SELECT * FROM players WHERE id IN ({placeholders})", chunk):
+                    created[row["id"]] = dict(row)
+                    ranked[row["id"]] = row["elo"]
+            if created:
+                self.version += 1
+
+        for player_id, i in index_by_id.items():
+            if player_id not in created:
+                errors.append({"index": i, "error": "Player already exists."})
+
+        errors.sort(key=lambda e: e["index"])
+        return {
+            "created": [created[pid] for pid in index_by_id if pid in created],
+            "errors": errors,
+        }
+
+
+    @timed("registry", slow_log_sql=True)
+    def import_players(self, rows: Iterable[tuple[int, Mapping | ValueError]], *, batch_size: int = IMPORT_BATCH_ROWS) -> dict:
+        """
+        Bulk-load (row number, record) pairs, e.g. from core.player_io, in one
+        transaction. Records hold `first_name`, `surname` and optionally
+        `rating`, `elo` and `id` (kept if given and unused, so exports
+        round-trip); other keys are ignored. A ValueError in place of a
+        record (a line the parser couldn't read) is reported as that row's
+        error. Valid rows are inserted with one executemany per `batch_size`
+        rows, so `rows` can be a lazy stream of any length. Returns
+
+            {"imported": n, "error_count": m, "errors": [{"row": r, "error": "..."}, ...]}
+
+        with at most IMPORT_MAX_ERRORS errors listed.
+        """
+        imported = 0
+        error_count = 0
+        errors: list[dict] = []
+
+        def reject(row_no: int, message: str) -> None:
+            nonlocal error_count
+            error_count += 1
+            if len(errors) < IMPORT_MAX_ERRORS:
+                errors.append({"row": row_no, "error": message})
+
+        def flush(conn: sqlite3.Connection, params: list[tuple]) -> int:
+            ranked.update((p[0], p[4]) for p in params)
+            conn.executemany(
+                """INSERT INTO players
+                    (id, first_name, surname, rating, elo, boosted)
+                VALUES (?, ?, ?, ?, ?, ?)""",
+                params,
+            )
+            return len(params)
+
+        with self.db.write() as conn, _search_index_deferred(conn), self._ranking_changes(conn) as ranked:
+            params: list[tuple] = []
+            reserved: set[str] = set()  # ids taken earlier in the current batch
+            for row_no, record in rows:
+                if isinstance(record, ValueError):
+                    reject(row_no, str(record))
+                    continue
+                try:
+                    elo = record.get("elo")
+                    elo = float(elo) if elo not in (None, "") else None
+                except (TypeError, ValueError):
+                    reject(row_no, f"Invalid elo '{record.get('elo')}'.")
+                    continue
+                try:
+                    first_name, surname, rating, starting_elo = self._clean_new_player(
+                        str(record.get("first_name") or ""),
+                        str(record.get("surname") or ""),
+                        str(record.get("rating") or "E"),
+                        elo,
+                    )
+                    player_id = str(record.get("id") or "").strip()
+                    if not player_id:
+                        player_id = self._generate_player_id(conn, first_name, surname, reserved=reserved)
+                    elif player_id in reserved or conn.execute(
+                        "SELECT 1 FROM players WHERE id = ?", (player_id,)
+                    ).fetchone():
+                        raise ValueError(f"Player id '{player_id}' already exists.")
+                except ValueError as e:
+                    reject(row_no, str(e))
+                    continue
+
+                reserved.add(player_id)
+                params.append((player_id, first_name, surname, rating, starting_elo, starting_elo))
+                if len(params) >= batch_size:
+                    imported += flush(conn, params)
+                    params.clear()
+                    reserved.clear()  # now visible to the id probes above
+            if params:
+                imported += flush(conn, params)
+            if imported:
+                self.version += 1
+
+        return {"imported": imported, "error_count": error_count, "errors": errors}
 
             
+    @timed("registry", slow_log_sql=True)
     def get_player(
         self,
         *,
@@ -50,7 +363,7 @@ class PlayerRegistry:
         first_name: str | None = None,
         surname: str | None = None,
     ) -> list[dict]:
-        with get_db_connection() as conn:
+        with self.db.read() as conn:
             if player_id:
                 rows = conn.execute(
                     "SELECT * FROM players WHERE id = ?", (player_id,)
@@ -65,22 +378,371 @@ class PlayerRegistry:
         return [dict(r) for r in rows]
 
 
+    @timed("registry", slow_log_sql=True)
+    def get_players(self, player_ids: Iterable[str]) -> tuple[list[dict], list[str]]:
+        """
+        Fetch many players by id using chunked `IN (...)` queries.
+        Returns (players in input order, ids that weren't found). Duplicate ids are looked up once.
+        """
+        ids = list(dict.fromkeys(pid.strip() for pid in player_ids if pid and pid.strip()))
+        found: dict[str, dict] = {}
+        with self.db.read() as conn:
+            for chunk in chunked(ids):
+                placeholders = ", ".join("?" * len(chunk))
+                for r in conn.execute(f"SELECT * FROM players WHERE id IN ({placeholders})", chunk):
+                    found[r["id"]] = dict(r)
+        players = [found[pid] for pid in ids if pid in found]
+        missing = [pid for pid in ids if pid not in found]
+        return players, missing
+
+
+    @timed("registry", slow_log_sql=True)
     def delete_player(self, player_id: str) -> bool:
         player_id = player_id.strip()
         if not player_id:
             raise ValueError("player_id cannot be empty.")
-        with get_db_connection() as conn:
+        with self.db.write() as conn, self._ranking_changes(conn) as ranked:
             cur = conn.execute("DELETE FROM players WHERE id = ?", (player_id,))
-            conn.commit()
-            return cur.rowcount > 0
+            if cur.rowcount:
+                ranked[player_id] = None
+                self.version += 1
+        return cur.rowcount > 0
 
 
-    def list_players(self) -> list[dict]:
-        with get_db_connection() as conn:
-            rows = conn.execute("SELECT * FROM players ORDER BY surname, first_name").fetchall()
-        return [dict(r) for r in rows]
+    @staticmethod
+    def _players_query(
+        fields: Sequence[str] | None,
+        after: Sequence[str] | None,
+        limit: int | None,
+    ) -> tuple[str, list]:
+        if fields:
+            unknown = [f for f in fields if f not in PLAYER_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown field(s) {unknown}. Must be among {PLAYER_FIELDS}")
+            columns = ", ".join(dict.fromkeys([*fields, *PLAYER_ORDER_KEY]))
+        else:
+            columns = "*"
+
+        sql = f"SELECT {columns} FROM players"
+        params: list = []
+        if after is not None:
+            if len(after) != len(PLAYER_ORDER_KEY):
+                raise ValueError("Cursor must hold (surname, first_name, id).")
+            sql += " WHERE (surname, first_name, id) > (?, ?, ?)"
+            params.extend(after)
+        sql += " ORDER BY surname, first_name, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
 
 
+    @staticmethod
+    def _project(row: sqlite3.Row, fields: Sequence[str] | None) -> dict:
+        return {f: row[f] for f in fields} if fields else dict(row)
+
+
+    @timed("registry", slow_log_sql=True)
+    def list_players(
+        self,
+        *,
+        fields: Sequence[str] | None = None,
+        after: Sequence[str] | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """
+        Players ordered by (surname, first_name, id).
+        `after` is the order key of the last row already seen (keyset pagination);
+        `fields` limits the columns returned.
+        """
+        sql, params = self._players_query(fields, after, limit)
+        with self.db.read() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [self._project(r, fields) for r in rows]
+
+
+    @timed("registry", slow_log_sql=True)
+    def players_page(
+        self,
+        limit: int,
+        *,
+        fields: Sequence[str] | None = None,
+        after: Sequence[str] | None = None,
+    ) -> tuple[list[dict], tuple[str, str, str] | None]:
+        """One keyset page plus the order key to pass as `after` for the next one (None on the last page)."""
+        sql, params = self._players_query(fields, after, limit + 1)
+        with self.db.read() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        next_after = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_after = tuple(rows[-1][k] for k in PLAYER_ORDER_KEY)
+        return [self._project(r, fields) for r in rows], next_after
+
+
+    def iter_players(
+        self,
+        *,
+        fields: Sequence[str] | None = None,
+        after: Sequence[str] | None = None,
+    ) -> Iterator[dict]:
+        """
+        Stream players in listing order from a cursor, without materialising the table.
+        Arguments are validated on call; the connection opens on first iteration.
+        """
+        sql, params = self._players_query(fields, after, None)
+        return self._stream_rows(sql, params, fields)
+
+
+    def _stream_rows(self, sql: str, params: list, fields: Sequence[str] | None) -> Iterator[dict]:
+        with self.db.snapshot() as conn:
+            for row in conn.execute(sql, params):
+                yield self._project(row, fields)
+
+
+    @timed("registry", slow_log_sql=True)
+    def search(self, query: str, limit: int = SEARCH_DEFAULT_LIMIT) -> list[dict]:
+        """
+        Players whose id or name matches `query`, best matches first. Case is
+        ignored for names.
+
+          0. The player whose id is exactly `query`.
+          1. Every word of the query starts a word of the name ("jo sm" → John Smith).
+          2. Every word appears somewhere in the name ("mit" → Smith).
+          3. Typos: names starting with the same letter(s) as the query and
+             within a few edits of it ("jonh" → John, "smth" → Smith), then
+             names sharing the most three-letter fragments with it.
+
+        Prefixes come from the NOCASE name indexes and the rest from the
+        players_search trigram index, so cost depends on `limit` and
+        SEARCH_CANDIDATES, not on the size of the table.
+        """
+        terms = query.lower().split()
+        if not terms:
+            raise ValueError("Search query cannot be empty.")
+        if not 1 <= limit <= SEARCH_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {SEARCH_MAX_LIMIT}.")
+
+        found: dict[str, dict] = {}
+        with self.db.read() as conn:
+            row = conn.execute("SELECT * FROM players WHERE id = ?", (query.strip(),)).fetchone()
+            if row is not None:
+                found[row["id"]] = dict(row)
+            for tier in (self._search_prefix, self._search_substring, self._search_fuzzy):
+                if len(found) >= limit:
+                    break
+                # a tier returns up to `limit` rows, so at least the missing number are new
+                for row in tier(conn, terms, limit):
+                    if row["id"] not in found:
+                        found[row["id"]] = dict(row)
+        return list(found.values())[:limit]
+
+
+    @staticmethod
+    def _in_listing_order(rows: Iterable[sqlite3.Row]) -> list[sqlite3.Row]:
+        return sorted(rows, key=lambda r: tuple(r[k] for k in PLAYER_ORDER_KEY))
+
+
+    def _search_prefix(self, conn: sqlite3.Connection, terms: list[str], limit: int) -> list[sqlite3.Row]:
+        # Range-scan the NOCASE name indexes for the longest word (the most
+        # selective); the other words are filtered alongside in SQL.
+        key = max(terms, key=len)
+        others = list(terms)
+        others.remove(key)
+        where = "".join(
+            " AND (first_name LIKE ? ESCAPE '\\' OR surname LIKE ? ESCAPE '\\'"
+            " OR first_name LIKE ? ESCAPE '\\' OR surname LIKE ? ESCAPE '\\')"
+            for _ in others
+        )
+        filters = [p for t in others for p in (f"{_like_escape(t)}%",) * 2 + (f"% {_like_escape(t)}%",) * 2]
+
+        rows: dict[str, sqlite3.Row] = {}
+        for column in ("surname", "first_name"):
+            for row in conn.execute(
+                f"SELECT * FROM players WHERE {column} >= ? COLLATE NOCASE AND {column} < ? COLLATE NOCASE"
+                f"{where} ORDER BY {column} COLLATE NOCASE LIMIT ?",
+                [key, _prefix_end(key), *filters, limit],
+            ):
+                rows.setdefault(row["id"], row)
+        return list(rows.values())[:limit]
+
+
+    def _search_substring(self, conn: sqlite3.Connection, terms: list[str], limit: int) -> list[sqlite3.Row]:
+        indexed = [t for t in terms if len(t) >= 3]  # the trigram index can't look up shorter words
+        if not indexed:
+            return []
+        short = [t for t in terms if len(t) < 3]
+        where = "".join(" AND (p.first_name || ' ' || p.surname) LIKE ? ESCAPE '\\'" for _ in short)
+        rows = conn.execute(
+            "SELECT p.* FROM players_search JOIN players p ON p.rowid = players_search.rowid "
+            f"WHERE players_search MATCH ?{where} LIMIT ?",
+            [" ".join(_fts_phrase(t) for t in indexed), *(f"%{_like_escape(t)}%" for t in short), limit],
+        ).fetchall()
+        return self._in_listing_order(rows)
+
+
+    def _search_fuzzy(self, conn: sqlite3.Connection, terms: list[str], limit: int) -> list[sqlite3.Row]:
+        """
+        Names within a few edits of the query (see _search_misspelt), then
+        names by how many of the query's trigrams they share. Trigram
+        candidates come from the query's rarest trigrams that exist at all,
+        since a typo usually makes trigrams no name has.
+        """
+        grams = list(dict.fromkeys(g for t in terms for g in _trigrams(t)))
+        if not grams:
+            return []
+        placeholders = ", ".join("?" * len(grams))
+        counts = dict(conn.execute(f"SELECT term, doc FROM players_search_vocab WHERE term IN ({placeholders})", grams))
+        rare = sorted(counts, key=counts.__getitem__)[:SEARCH_FUZZY_GRAMS]
+        scored = []
+        if rare:
+            # score on the index's own copy of the names; full rows only for the winners
+            candidates = conn.execute(
+                "SELECT rowid, first_name, surname FROM players_search WHERE players_search MATCH ? LIMIT ?",
+                (" OR ".join(_fts_phrase(g) for g in rare), SEARCH_CANDIDATES),
+            ).fetchall()
+            wanted = set(grams)
+            needed = max(1, len(wanted) // 3)
+            for rowid, first_name, surname in candidates:
+                name = f"{first_name} {surname}".lower()
+                shared = sum(g in name for g in wanted)
+                if shared >= needed:
+                    scored.append((-shared, surname, first_name, rowid))
+        scored.sort()
+        # near-misspellings first: a short word's typo shares few fragments with it
+        best = [rowid for *_, rowid in sorted(self._search_misspelt(conn, terms))]
+        seen = set(best)
+        best += [rowid for *_, rowid in scored if rowid not in seen]
+        return self._rows_by_rowid(conn, best[:limit])
+
+
+    def _search_misspelt(self, conn: sqlite3.Connection, terms: list[str]) -> list[tuple]:
+        """
+        Names where every query word is within one edit per
+        SEARCH_TYPO_LETTERS letters of a word of the name, scored by total
+        edits. Candidates come from the NOCASE name indexes: names starting
+        with the longest query word with two neighbouring letters swapped or
+        one letter dropped ("jonh" → "john"), and the names sorting nearest
+        the word, on either side, among those sharing its first two letters
+        and then its first letter.
+        """
+        key = max(terms, key=len)
+        swapped = [key[:i] + key[i + 1] + key[i] + key[i + 2 :] for i in range(len(key) - 1)]
+        dropped = [key[:i] + key[i + 1 :] for i in range(len(key))]
+        probes = [(variant, _prefix_end(variant), "ASC", SEARCH_CANDIDATES // 10) for variant in swapped + dropped if variant]
+        for prefix in dict.fromkeys((key[:2], key[:1])):
+            probes.append((key, _prefix_end(prefix), "ASC", SEARCH_CANDIDATES // 2))
+            probes.append((prefix, key, "DESC", SEARCH_CANDIDATES // 2))
+
+        candidates: dict[int, tuple[str, str]] = {}
+        for low, high, order, limit in probes:
+            for column in ("surname", "first_name"):
+                for rowid, first_name, surname in conn.execute(
+                    f"SELECT rowid, first_name, surname FROM players WHERE {column} >= ? COLLATE NOCASE"
+                    f" AND {column} < ? COLLATE NOCASE ORDER BY {column} COLLATE NOCASE {order} LIMIT ?",
+                    (low, high, limit),
+                ):
+                    candidates.setdefault(rowid, (first_name, surname))
+
+        scored = []
+        for rowid, (first_name, surname) in candidates.items():
+            words = f"{first_name} {surname}".lower().split()
+            total = 0
+            for term in terms:
+                edits = min((_edit_distance(term, word) for word in words), default=len(term))
+                if edits > max(1, len(term) // SEARCH_TYPO_LETTERS):
+                    break
+                total += edits
+            else:
+                scored.append((total, surname, first_name, rowid))
+        return scored
+
+
+    @staticmethod
+    def _rows_by_rowid(conn: sqlite3.Connection, best: list[int]) -> list[sqlite3.Row]:
+        if not best:
+            return []
+        rows = {
+            r["rowid"]: r
+            for r in conn.execute(
+                f"SELECT rowid, * FROM players WHERE rowid IN ({', '.join('?' * len(best))})", best
+            )
+        }
+        return [rows[rowid] for rowid in best if rowid in rows]
+
+
+    @timed("registry", slow_log_sql=True)
+    def players_version(self) -> int:
+        """Counter bumped by triggers on every players write (see table_versions in schema.sql)."""
+        with self.db.read() as conn:
+            return self._players_version(conn)
+
+
+    def _ranking(self) -> Leaderboard:
+        """The leaderboard, (re)loaded first if the players table changed behind its back."""
+        board = self._leaderboard
+        with self.db.read() as conn:
+            version = self._players_version(conn)
+        if board.version != version:
+            with self.db.snapshot() as conn:
+                conn.execute("BEGIN")
+                version = self._players_version(conn)
+                rows = conn.execute("SELECT id, elo FROM players").fetchall()
+                conn.execute("COMMIT")
+            board.load(version, rows)
+        return board
+
+    @timed("registry", slow_log_sql=True)
+    def leaderboard(
+        self,
+        *,
+        grade: str | None = None,
+        offset: int = 0,
+        limit: int = LEADERBOARD_DEFAULT_LIMIT,
+    ) -> tuple[list[dict], int]:
+        """
+        A page of players by Elo, highest first, as dicts with `rank`, id,
+        names, rating and elo; plus how many players are ranked. With
+        `grade`, only players whose Elo falls in that grade's band of
+        GRADE_THRESHOLDS, ranked among themselves. Tied players share a rank.
+        """
+        if offset < 0:
+            raise ValueError("offset cannot be negative.")
+        if limit < 1:
+            raise ValueError("limit must be at least 1.")
+        if grade is not None:
+            grade = grade.strip().upper()
+            grade_band(grade)
+
+        entries, total = self._ranking().page(offset, limit, grade)
+        ids = [pid for _, pid, _ in entries]
+        names: dict[str, sqlite3.Row] = {}
+        with self.db.read() as conn:
+            for chunk in chunked(ids):
+                placeholders = ", ".join("?" * len(chunk))
+                for row in conn.execute(
+                    f"SELECT id, first_name, surname, rating FROM players WHERE id IN ({placeholders})", chunk
+                ):
+                    names[row["id"]] = row
+        rows = [
+            {"rank": rank, **dict(names[pid]), "elo": elo}
+            for rank, pid, elo in entries
+            if pid in names  # deleted since the page was taken
+        ]
+        return rows, total
+
+    @timed("registry", slow_log_sql=True)
+    def player_rank(self, player_id: str) -> dict | None:
+        """
+        A player's rank by Elo overall and within their grade band:
+        {"id", "elo", "rank", "players", "grade", "grade_rank", "grade_players"},
+        or None if there is no such player.
+        """
+        return self._ranking().rank(player_id.strip())
+
+
+    @timed("registry", slow_log_sql=True)
     def update_player(
         self,
         player_id: str,
@@ -122,7 +784,120 @@ class PlayerRegistry:
         values.append(player_id)
         sql = f"UPDATE players SET {', '.join(fields)} WHERE id = ?"
 
-        with get_db_connection() as conn:
+        with self.db.write() as conn, self._ranking_changes(conn):
             cur = conn.execute(sql, values)
-            conn.commit()
+            if cur.rowcount:
+                self.version += 1
         return cur.rowcount > 0
+
+
+    @timed("registry", slow_log_sql=True)
+    def apply_rating_changes(self, changes: Iterable[RatingChange]) -> int:
+        """
+        Write engine output back in one transaction. `games`/`wins`/`losses` are
+        increments; Elo, boosted and the streaks are absolute values.
+        """
+        params = [
+            (c.elo, c.boosted, c.games, c.wins, c.losses, c.streak_wins, c.streak_losses, c.player_id)
+            for c in changes
+        ]
+        if not params:
+            return 0
+        with self.db.write() as conn, self._ranking_changes(conn) as ranked:
+            cur = conn.executemany(
+                """UPDATE players SET
+                    elo = ?,
+                    boosted = ?,
+                    total_games = total_games + ?,
+                    total_wins = total_wins + ?,
+                    total_losses = total_losses + ?,
+                    streak_wins = ?,
+                    streak_losses = ?
+                WHERE id = ?""",
+                params,
+            )
+            self._rank_updates(ranked, cur.rowcount, [(p[-1], p[0]) for p in params])
+            if cur.rowcount:
+                self.version += 1
+        return cur.rowcount
+
+
+    @timed("registry", slow_log_sql=True)
+    def set_ratings(self, states: Iterable[Mapping]) -> int:
+        """
+        Overwrite rating columns with absolute values, e.g. after a history replay.
+        Each state holds `id` plus every column in RATING_FIELDS.
+        """
+        params = [tuple(s[f] for f in RATING_FIELDS) + (s["id"],) for s in states]
+        if not params:
+            return 0
+        assignments = ", ".join(f"{f} = ?" for f in RATING_FIELDS)
+        with self.db.write() as conn, self._ranking_changes(conn) as ranked:
+            cur = conn.executemany(f"UPDATE players SET {assignments} WHERE id = ?", params)
+            self._rank_updates(ranked, cur.rowcount, [(p[-1], p[0]) for p in params])
+            if cur.rowcount:
+                self.version += 1
+        return cur.rowcount
+
+
+    @timed("registry", slow_log_sql=True)
+    def update_grades(self, *, session_id: str | None = None) -> list[dict]:
+        """
+        Re-grade players from their Elo and streaks in one set-based pass and
+        one transaction. A player moves to the grade their Elo falls in under
+        GRADE_THRESHOLDS when that is higher than their current grade and they
+        have won PROMOTION_MATCH_STREAK in a row, or lower and they have lost
+        DEMOTION_MATCH_STREAK in a row. Each change is recorded in
+        `grade_changes`.
+
+        With `session_id`, only players in that session's completed matches
+        are considered (run it after the session's ratings are recomputed).
+        Returns the changes as {"player_id", "old_grade", "new_grade", "elo"}.
+        """
+        thresholds = ", ".join("(?, ?, ?)" for _ in GRADE_THRESHOLDS)
+        threshold_params = [v for step, (grade, elo) in enumerate(GRADE_THRESHOLDS) for v in (grade, step, elo)]
+        if session_id is None:
+            scope, scope_params = "", []
+        else:
+            scope = """WHERE p.id IN (
+                        SELECT mp.player_id FROM matches m
+                        JOIN match_players mp ON mp.match_id = m.id
+                        WHERE m.session_id = ? AND m.status = 'completed'
+                    )"""
+            scope_params = [session_id]
+
+        with self.db.write() as conn, self._ranking_changes(conn):
+            (last_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM grade_changes").fetchone()
+            conn.execute(
+                f"""WITH thresholds(grade, step, min_elo) AS (VALUES {thresholds}),
+                placed AS (
+                    SELECT p.id, p.rating, p.elo, p.streak_wins, p.streak_losses,
+                           held.step AS current_step,
+                           COALESCE((SELECT MAX(t.step) FROM thresholds t WHERE t.min_elo <= p.elo), 0) AS elo_step
+                    FROM players p
+                    JOIN thresholds held ON held.grade = p.rating
+                    {scope}
+                )
+                INSERT INTO grade_changes
+                    (player_id, session_id, old_grade, new_grade, elo, streak_wins, streak_losses)
+                SELECT placed.id, ?, placed.rating, target.grade, placed.elo, placed.streak_wins, placed.streak_losses
+                FROM placed
+                JOIN thresholds target ON target.step = placed.elo_step
+                WHERE (placed.elo_step > placed.current_step AND placed.streak_wins >= ?)
+                   OR (placed.elo_step < placed.current_step AND placed.streak_losses >= ?)
+                ORDER BY placed.id""",
+                [*threshold_params, *scope_params, session_id, PROMOTION_MATCH_STREAK, DEMOTION_MATCH_STREAK],
+            )
+            changes = conn.execute(
+                "SELECT player_id, old_grade, new_grade, elo FROM grade_changes WHERE id > ? ORDER BY id",
+                (last_id,),
+            ).fetchall()
+            if changes:
+                conn.execute(
+                    """UPDATE players SET rating = c.new_grade
+                    FROM grade_changes c
+                    WHERE c.player_id = players.id AND c.id > ?""",
+                    (last_id,),
+                )
+                self.version += 1
+        return [dict(row) for row in changes]
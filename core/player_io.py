@@ -0,0 +1,129 @@
+"""
+Streaming player import/export as CSV or JSONL (one JSON object per line).
+
+Both directions work a row at a time: imports are parsed lazily and handed to
+PlayerRegistry.import_players, which inserts in batches; exports are written
+straight from a database cursor. Memory use doesn't grow with the file.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence, TextIO
+
+from core.player import PLAYER_FIELDS, PlayerRegistry
+
+FORMATS = ("csv", "jsonl")
+
+_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+def format_for(path: str | Path, fmt: str | None = None) -> str:
+    """`fmt` if given, else the format implied by the file extension."""
+    if fmt is None:
+        fmt = _EXTENSIONS.get(Path(path).suffix.lower())
+        if fmt is None:
+            raise ValueError(f"Can't tell the format of '{path}'; use a .csv or .jsonl file or give the format.")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Must be one of {FORMATS}")
+    return fmt
+
+
+def parse_rows(lines: Iterable[str], fmt: str) -> Iterator[tuple[int, dict | ValueError]]:
+    """
+    Yield (row number, record) for each row of a CSV (with a header line) or
+    JSONL stream, or (row number, ValueError) for a row that can't be read.
+    Row numbers count data rows from 1, skipping blank JSONL lines.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        if reader.fieldnames is None:
+            return
+        missing = {"first_name", "surname"} - set(reader.fieldnames)
+        if missing:
+            raise ValueError(f"CSV header is missing column(s) {sorted(missing)}.")
+        for row_no, record in enumerate(reader, 1):
+            if None in record:
+                yield row_no, ValueError("More values than header columns.")
+            else:
+                yield row_no, record
+        return
+
+    row_no = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        row_no += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_no, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield row_no, ValueError("Each line must be a JSON object.")
+            continue
+        yield row_no, record
+
+
+def import_lines(registry: PlayerRegistry, lines: Iterable[str], fmt: str) -> dict:
+    """Import players from CSV or JSONL text in one transaction; see PlayerRegistry.import_players."""
+    return registry.import_players(parse_rows(lines, fmt))
+
+
+def import_file(registry: PlayerRegistry, path: str | Path, fmt: str | None = None) -> dict:
+    fmt = format_for(path, fmt)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return import_lines(registry, f, fmt)
+
+
+def format_rows(rows: Iterable[dict], fmt: str, fields: Sequence[str], *, header: bool = True) -> Iterator[str]:
+    """
+    Serialise rows as CSV (header first unless `header` is False) or JSONL
+    text, one row per yielded string.
+    """
+    if fmt == "jsonl":
+        for row in rows:
+            yield json.dumps({f: row[f] for f in fields}) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(fields)
+    for row in rows:
+        writer.writerow([row[f] for f in fields])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # header of an empty export
+        yield buffer.getvalue()
+
+
+def _write_rows(rows: Iterable[dict], out: TextIO, fmt: str, fields: Sequence[str]) -> int:
+    count = 0
+
+    def counted() -> Iterator[dict]:
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    for text in format_rows(counted(), fmt, fields):
+        out.write(text)
+    return count
+
+
+def export_players(registry: PlayerRegistry, out: TextIO, fmt: str, fields: Sequence[str] | None = None) -> int:
+    """Write every player, in listing order, to `out`. Returns the number of rows."""
+    fields = list(fields or PLAYER_FIELDS)
+    return _write_rows(registry.iter_players(fields=fields), out, fmt, fields)
+
+
+def export_file(registry: PlayerRegistry, path: str | Path, fmt: str | None = None, fields: Sequence[str] | None = None) -> int:
+    fmt = format_for(path, fmt)
+    fields = list(fields or PLAYER_FIELDS)
+    rows = registry.iter_players(fields=fields)  # rejects unknown fields before `path` is truncated
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        return _write_rows(rows, f, fmt, fields)
@@ -0,0 +1,140 @@
+import asyncio
+import json
+from collections import deque
+from itertools import islice
+from typing import Callable, TypeVar
+
+from core.constants import FEED_HISTORY, FEED_QUEUE_SIZE
+from engine.session import SessionState
+
+T = TypeVar("T")
+
+# Queued to a subscriber instead of diffs it fell too far behind to receive.
+RESYNC = object()
+# Queued to every subscriber when the session ends.
+CLOSED = object()
+
+_MISSING = object()
+
+
+def session_view(state: SessionState) -> dict[str, object]:
+    """
+    Flat, JSON-ready view of a session. Each key is one unit of change on the
+    feed: a court, the waiting list, the ready matches, or one attendee.
+    """
+    roster = state.roster
+    view: dict[str, object] = {
+        "phase": state.phase,
+        "settings": {
+            "format": "doubles" if state.fmt == "d" else "singles",
+            "courts": state.courts,
+            "seed": state.seed,
+        },
+        "waiting": list(state.waiting),
+        "next_up": [list(ids) for ids in state.ready],
+    }
+    for idx, ids in enumerate(state.court_player_ids):
+        match = state.court_matches[idx]
+        view[f"court/{idx + 1}"] = {
+            "match_id": state.court_match_ids[idx],
+            "player_ids": list(ids),
+            "team1": list(match.team1),
+            "team2": list(match.team2),
+        }
+    for pid in sorted(state.attendee_ids):
+        view[f"attendee/{pid}"] = {
+            "name": roster.name(pid),
+            "games_played": state.games_played.get(pid, 0),
+            "paused": pid in state.paused_ids,
+        }
+    return view
+
+
+class SessionFeed:
+    """
+    Versioned diff stream for one session.
+
+    `publish` compares a fresh view against the last one and sends only the keys
+    that changed (removed keys as null), tagged with an increasing `seq`. Each
+    diff is encoded once and the same string is queued to every subscriber, so
+    the cost of a publish is one dict comparison plus a queue put per client.
+    The last FEED_HISTORY diffs are kept for clients reconnecting with `since`.
+    """
+
+    def __init__(self, *, history: int = FEED_HISTORY, queue_size: int = FEED_QUEUE_SIZE) -> None:
+        self.seq = 0
+        self.view: dict[str, object] = {}
+        self.queue_size = queue_size
+        self._log: deque[tuple[int, str]] = deque(maxlen=history)
+        self._subscribers: set[asyncio.Queue] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, view: dict[str, object]) -> int:
+        changes = {k: v for k, v in view.items() if self.view.get(k, _MISSING) != v}
+        changes.update({k: None for k in self.view.keys() - view.keys()})
+        if not changes:
+            return self.seq
+
+        self.seq += 1
+        self.view = view
+        text = json.dumps({"seq": self.seq, "changes": changes})
+        self._log.append((self.seq, text))
+        for queue in self._subscribers:
+            self._offer(queue, (self.seq, text))
+        return self.seq
+
+    def full(self) -> str:
+        return json.dumps({"seq": self.seq, "full": self.view})
+
+    def since(self, seq: int) -> list[tuple[int, str]] | None:
+        """(seq, diff) pairs after `seq`, or None if they're no longer held (the client needs `full()`)."""
+        if seq == self.seq:
+            return []
+        if seq > self.seq or not self._log or self._log[0][0] > seq + 1:
+            return None
+        start = seq + 1 - self._log[0][0]
+        return list(islice(self._log, start, None))
+
+    def subscribe(self) -> asyncio.Queue:
+        """A queue receiving (seq, diff) pairs, RESYNC or CLOSED."""
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def close(self) -> None:
+        for queue in self._subscribers:
+            self._offer(queue, CLOSED)
+        self._subscribers.clear()
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, message: object) -> None:
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A slow client: drop its backlog and have it start again from a full view.
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(CLOSED if message is CLOSED else RESYNC)
+
+
+class LiveSession:
+    """A running session served over the API: its state, its feed, and a lock that serialises operations."""
+
+    def __init__(self, state: SessionState) -> None:
+        self.state = state
+        self.feed = SessionFeed()
+        self.lock = asyncio.Lock()
+        self.feed.publish(session_view(state))
+
+    async def apply(self, op: Callable[..., T], *args) -> T:
+        """Run a blocking engine.session operation off the event loop, then publish what changed."""
+        async with self.lock:
+            try:
+                return await asyncio.to_thread(op, *args)
+            finally:
+                self.feed.publish(session_view(self.state))
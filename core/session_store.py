@@ -0,0 +1,242 @@
+import atexit
+import json
+import sqlite3
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from core.constants import JOURNAL_FLUSH_INTERVAL_S, JOURNAL_MAX_BATCH
+from core.db import ConnectionManager, get_manager
+
+
+_SAVE_SNAPSHOT = """INSERT INTO session_snapshots (session_id, taken_at, state) VALUES (?, ?, ?)
+ON CONFLICT(session_id) DO UPDATE SET taken_at = excluded.taken_at, state = excluded.state"""
+
+
+def _now() -> str:
+    """UTC timestamp in the same format as SQLite's datetime('now')."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class SessionJournal:
+    """
+    Write-behind queue for session events.
+
+    Callers enqueue statements and return immediately; a background thread
+    commits everything queued so far in one transaction every
+    JOURNAL_FLUSH_INTERVAL_S (sooner once JOURNAL_MAX_BATCH statements are
+    waiting). Snapshots are coalesced: only the newest one per session is
+    written with each commit.
+
+    If a batch fails, it is replayed one statement per transaction so one bad
+    statement can't take the rest of the night's history with it; the
+    statements that still fail are kept, with their error, for `failures`.
+    """
+
+    def __init__(
+        self,
+        db: ConnectionManager,
+        *,
+        flush_interval: float = JOURNAL_FLUSH_INTERVAL_S,
+        max_batch: int = JOURNAL_MAX_BATCH,
+    ) -> None:
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+
+        self._cond = threading.Condition()
+        self._ops: list[tuple[str, tuple]] = []
+        self._snapshots: dict[str, tuple[str, str]] = {}
+        self._flush_requested = False
+        self._queued = 0     # statements and snapshots enqueued so far
+        self._committed = 0  # of those, how many the writer has finished with
+        self._closed = False
+        self._failed: list[tuple[str, tuple, str]] = []  # (sql, params, error), oldest first
+        self._thread = threading.Thread(target=self._run, name="session-journal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def execute(self, sql: str, params: tuple = ()) -> None:
+        with self._cond:
+            self._ops.append((sql, params))
+            self._queued += 1
+            if len(self._ops) >= self.max_batch:
+                self._cond.notify()
+
+    def snapshot(self, session_id: str, state: str) -> None:
+        with self._cond:
+            self._snapshots[session_id] = (state, _now())
+            self._queued += 1
+
+    def flush(self) -> None:
+        """Block until everything queued so far is committed."""
+        with self._cond:
+            if self._closed:
+                return
+            target = self._queued
+            if self._committed >= target:
+                return
+            self._flush_requested = True
+            self._cond.notify()
+            self._cond.wait_for(lambda: self._committed >= target or self._closed)
+
+    def failures(self) -> list[tuple[str, tuple, str]]:
+        """Statements that could not be committed, as (sql, params, error)."""
+        with self._cond:
+            return list(self._failed)
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed or self._flush_requested or len(self._ops) >= self.max_batch,
+                    timeout=self.flush_interval,
+                )
+                ops, self._ops = self._ops, []
+                snapshots, self._snapshots = self._snapshots, {}
+                batch_end = self._queued  # everything enqueued so far is in this batch
+                self._flush_requested = False
+                closing = self._closed
+
+            if ops or snapshots:
+                self._commit(ops, snapshots)
+
+            with self._cond:
+                self._committed = batch_end
+                self._cond.notify_all()
+            if closing:
+                return
+
+    def _commit(self, ops: list[tuple[str, tuple]], snapshots: dict[str, tuple[str, str]]) -> None:
+        ops = ops + [(_SAVE_SNAPSHOT, (sid, taken_at, state)) for sid, (state, taken_at) in snapshots.items()]
+        try:
+            with self.db.write() as conn:
+                for sql, params in ops:
+                    conn.execute(sql, params)
+            return
+        except sqlite3.Error:
+            pass
+        # The batch was rolled back; keep everything that can be written.
+        for sql, params in ops:
+            try:
+                with self.db.write() as conn:
+                    conn.execute(sql, params)
+            except sqlite3.Error as e:
+                with self._cond:
+                    self._failed.append((sql, params, str(e)))
+                print(f"Session journal write failed: {e}", file=sys.stderr)
+
+
+class SessionStore:
+    """Records a club night in sessions / courts / signups / matches / match_players."""
+
+    def __init__(self, db: ConnectionManager | None = None, journal: SessionJournal | None = None) -> None:
+        self.db = db or get_manager()
+        self.journal = journal or SessionJournal(self.db)
+
+    def open_session(self) -> str:
+        session_id = uuid.uuid4().hex
+        now = _now()
+        self.journal.execute(
+            "INSERT INTO sessions (id, date, start_time, end_time, status) VALUES (?, ?, ?, '', 'open')",
+            (session_id, now[:10], now[11:16]),
+        )
+        return session_id
+
+    def add_attendee(self, session_id: str, player_id: str) -> None:
+        self.journal.execute(
+            "INSERT OR IGNORE INTO signups (session_id, player_id) VALUES (?, ?)",
+            (session_id, player_id),
+        )
+
+    def remove_attendee(self, session_id: str, player_id: str) -> None:
+        self.journal.execute(
+            "DELETE FROM signups WHERE session_id = ? AND player_id = ?",
+            (session_id, player_id),
+        )
+
+    def start_session(self, session_id: str, fmt: str, courts: int) -> None:
+        self.journal.execute(
+            "UPDATE sessions SET status = 'in_progress', format = ?, court_count = ? WHERE id = ?",
+            ("doubles" if fmt == "d" else "singles", courts, session_id),
+        )
+        for court_no in range(1, courts + 1):
+            self.journal.execute(
+                "INSERT OR IGNORE INTO courts (session_id, court_number, status) VALUES (?, ?, 'idle')",
+                (session_id, court_no),
+            )
+
+    def start_match(self, session_id: str, court_no: int, fmt: str, team1: tuple[str, ...], team2: tuple[str, ...]) -> str:
+        match_id = uuid.uuid4().hex
+        self.journal.execute(
+            """INSERT INTO matches (id, session_id, court_id, format, team1_ids, team2_ids, status, started_at)
+            VALUES (?, ?, (SELECT id FROM courts WHERE session_id = ? AND court_number = ?), ?, ?, ?, 'in_progress', ?)""",
+            (
+                match_id, session_id, session_id, court_no,
+                "doubles" if fmt == "d" else "singles",
+                ",".join(team1), ",".join(team2), _now(),
+            ),
+        )
+        for team, ids in ((1, team1), (2, team2)):
+            for pid in ids:
+                self.journal.execute(
+                    "INSERT INTO match_players (match_id, player_id, team) VALUES (?, ?, ?)",
+                    (match_id, pid, team),
+                )
+        self.journal.execute(
+            "UPDATE courts SET status = 'in_progress' WHERE session_id = ? AND court_number = ?",
+            (session_id, court_no),
+        )
+        return match_id
+
+    def complete_match(self, session_id: str, court_no: int, match_id: str, score: tuple[int, int] | None = None) -> None:
+        score_team1, score_team2 = score or (None, None)
+        self.journal.execute(
+            "UPDATE matches SET status = 'completed', completed_at = ?, score_team1 = ?, score_team2 = ? WHERE id = ?",
+            (_now(), score_team1, score_team2, match_id),
+        )
+        self.journal.execute(
+            "UPDATE courts SET status = 'finished' WHERE session_id = ? AND court_number = ?",
+            (session_id, court_no),
+        )
+
+    def save_snapshot(self, session_id: str, state: dict) -> None:
+        self.journal.snapshot(session_id, json.dumps(state, separators=(",", ":")))
+
+    def close_session(self, session_id: str) -> None:
+        self.journal.execute(
+            "UPDATE sessions SET status = 'closed', end_time = ? WHERE id = ?",
+            (_now()[11:16], session_id),
+        )
+        self.journal.flush()
+
+    def latest_open_snapshot(self) -> tuple[str, dict] | None:
+        """(session_id, state) of the most recently saved session that was never closed."""
+        self.journal.flush()
+        with self.db.read() as conn:
+            row = conn.execute(
+                """SELECT s.id, snap.state
+                FROM session_snapshots snap
+                JOIN sessions s ON s.id = snap.session_id
+                WHERE s.status IN ('open', 'in_progress')
+                ORDER BY snap.taken_at DESC
+                LIMIT 1"""
+            ).fetchone()
+        return (row["id"], json.loads(row["state"])) if row else None
+
+    def failed_writes(self) -> list[tuple[str, tuple, str]]:
+        """Journal statements that could not be committed, as (sql, params, error)."""
+        return self.journal.failures()
+
+    def close(self) -> None:
+        self.journal.close()
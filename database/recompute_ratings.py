@@ -0,0 +1,21 @@
+import argparse
+
+from core.db import init_db
+from core.player import PlayerRegistry
+from engine.recompute import recompute_ratings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay match history into player ratings.")
+    parser.add_argument("--from-match", metavar="MATCH_ID", help="replay from the batch containing this match (e.g. after fixing its score)")
+    parser.add_argument("--full", action="store_true", help="replay all history (e.g. after changing a K-factor)")
+    args = parser.parse_args()
+
+    init_db()
+    summary = recompute_ratings(PlayerRegistry(), from_match_id=args.from_match, full=args.full)
+    if summary.start_seq is None:
+        print("Ratings already up to date.")
+    else:
+        print(
+            f"Replayed {summary.matches} matches in {summary.batches} batches "
+            f"from match #{summary.start_seq}; {summary.players} players updated."
+        )
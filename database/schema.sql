@@ -1,5 +1,7 @@
-PRAGMA journal_mode=WAL;
-PRAGMA foreign_keys=ON;
+-- Baseline schema: migration step 1 in core/migrations.py, which records the
+-- applied version in PRAGMA user_version. Change the schema by appending a
+-- step there rather than editing this file. (WAL mode is set by
+-- core.db.ConnectionManager.)
 
 -- ─── PLAYERS ────────────────────────────────────────────────────────────────
 CREATE TABLE IF NOT EXISTS players (
@@ -75,6 +77,115 @@ CREATE TABLE IF NOT EXISTS match_players (
     PRIMARY KEY (match_id, player_id)
 );
 
+
+-- Latest in-memory state of a running session (waiting order, courts, rng),
+-- rewritten by the session journal so a crashed session can be resumed.
+CREATE TABLE IF NOT EXISTS session_snapshots (
+    session_id TEXT PRIMARY KEY REFERENCES sessions(id) ON DELETE CASCADE,
+    taken_at   TEXT NOT NULL,
+    state      TEXT NOT NULL      -- JSON
+);
+
+-- ─── RATING HISTORY ─────────────────────────────────────────────────────────
+-- Matches are rated in batches: consecutive completed matches (by rowid) of one
+-- session. A checkpoint holds a player's ratings after a batch, so a replay can
+-- restart from any batch instead of from the first match ever played.
+CREATE TABLE IF NOT EXISTS rating_batches (
+    seq         INTEGER PRIMARY KEY,     -- matches.rowid of the first match in the batch
+    last_seq    INTEGER NOT NULL,        -- matches.rowid of the last match in the batch
+    session_id  TEXT    NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rating_checkpoints (
+    player_id     TEXT    NOT NULL,
+    seq           INTEGER NOT NULL,        -- rating_batches.seq
+    session_id    TEXT    NOT NULL,
+    elo           REAL    NOT NULL,
+    boosted       REAL    NOT NULL,
+    total_games   INTEGER NOT NULL,
+    total_wins    INTEGER NOT NULL,
+    total_losses  INTEGER NOT NULL,
+    streak_wins   INTEGER NOT NULL,
+    streak_losses INTEGER NOT NULL,
+    PRIMARY KEY (player_id, seq)
+) WITHOUT ROWID;
+
+-- Ratings a player had before their first rated match.
+CREATE TABLE IF NOT EXISTS rating_baselines (
+    player_id     TEXT PRIMARY KEY,
+    elo           REAL    NOT NULL,
+    boosted       REAL    NOT NULL,
+    total_games   INTEGER NOT NULL,
+    total_wins    INTEGER NOT NULL,
+    total_losses  INTEGER NOT NULL,
+    streak_wins   INTEGER NOT NULL,
+    streak_losses INTEGER NOT NULL
+) WITHOUT ROWID;
+
+
+CREATE INDEX IF NOT EXISTS idx_rating_checkpoints_seq ON rating_checkpoints(seq);
+CREATE INDEX IF NOT EXISTS idx_players_name_order  ON players(surname, first_name, id);
 CREATE INDEX IF NOT EXISTS idx_match_players_player ON match_players(player_id);
 CREATE INDEX IF NOT EXISTS idx_matches_session      ON matches(session_id);
 CREATE INDEX IF NOT EXISTS idx_signups_session      ON signups(session_id);
+CREATE INDEX IF NOT EXISTS idx_players_surname_nocase    ON players(surname COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_players_first_name_nocase ON players(first_name COLLATE NOCASE);
+
+
+-- ─── PLAYER SEARCH ──────────────────────────────────────────────────────────
+-- Trigram index over names for substring and typo-tolerant search
+-- (PlayerRegistry.search). Holds no copy of the names (content='players'); the
+-- triggers keep it in step with inserts, deletes and renames only, so rating
+-- updates don't touch it. The INSERT fills it once for a database created
+-- before the index existed.
+CREATE VIRTUAL TABLE IF NOT EXISTS players_search USING fts5(
+    first_name, surname,
+    content='players', content_rowid='rowid', tokenize='trigram'
+);
+-- Per-trigram document counts, so search can start from the rarest fragments.
+CREATE VIRTUAL TABLE IF NOT EXISTS players_search_vocab USING fts5vocab(players_search, 'row');
+INSERT INTO players_search(players_search) SELECT 'rebuild'
+    WHERE NOT EXISTS (SELECT 1 FROM players_search_docsize) AND EXISTS (SELECT 1 FROM players);
+
+CREATE TRIGGER IF NOT EXISTS trg_players_search_insert AFTER INSERT ON players
+BEGIN
+    INSERT INTO players_search(rowid, first_name, surname) VALUES (new.rowid, new.first_name, new.surname);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_players_search_delete AFTER DELETE ON players
+BEGIN
+    INSERT INTO players_search(players_search, rowid, first_name, surname)
+    VALUES ('delete', old.rowid, old.first_name, old.surname);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_players_search_rename AFTER UPDATE OF first_name, surname ON players
+BEGIN
+    INSERT INTO players_search(players_search, rowid, first_name, surname)
+    VALUES ('delete', old.rowid, old.first_name, old.surname);
+    INSERT INTO players_search(rowid, first_name, surname) VALUES (new.rowid, new.first_name, new.surname);
+END;
+
+
+-- ─── CHANGE TRACKING ────────────────────────────────────────────────────────
+-- Bumped by triggers on every write, so readers (e.g. API ETags) can tell
+-- whether a table changed without scanning it.
+CREATE TABLE IF NOT EXISTS table_versions (
+    name    TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO table_versions (name) VALUES ('players');
+
+CREATE TRIGGER IF NOT EXISTS trg_players_version_insert AFTER INSERT ON players
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE name = 'players';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_players_version_update AFTER UPDATE ON players
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE name = 'players';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_players_version_delete AFTER DELETE ON players
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE name = 'players';
+END;
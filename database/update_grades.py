@@ -0,0 +1,16 @@
+import argparse
+
+from core.db import init_db
+from core.player import PlayerRegistry
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Promote / demote player grades from their Elo and streaks.")
+    parser.add_argument("--session", metavar="SESSION_ID", help="only players in this session's completed matches")
+    args = parser.parse_args()
+
+    init_db()
+    changes = PlayerRegistry().update_grades(session_id=args.session)
+    if not changes:
+        print("No grade changes.")
+    for c in changes:
+        print(f"{c['player_id']}: {c['old_grade']} -> {c['new_grade']} (Elo {c['elo']:.0f})")
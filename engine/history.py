@@ -0,0 +1,136 @@
+# engine/history.py
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+from core.constants import OPPONENT_REPEAT_WEIGHT, PARTNER_REPEAT_WEIGHT
+from engine.matchmaking import _SPLITS
+
+_COUNT_MAX = np.iinfo(np.uint8).max
+
+
+def _split_pairs() -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Row/column positions of the partner and opponent pairs in each split, for fancy indexing."""
+    partner_r, partner_c, opp_r, opp_c = [], [], [], []
+    for t1, t2 in _SPLITS:
+        partner_r.append([t1[0], t2[0]])
+        partner_c.append([t1[1], t2[1]])
+        opp_r.append([a for a in t1 for _ in t2])
+        opp_c.append([b for _ in t1 for b in t2])
+    return np.array(partner_r), np.array(partner_c), np.array(opp_r), np.array(opp_c)
+
+
+_PARTNER_R, _PARTNER_C, _OPP_R, _OPP_C = _split_pairs()
+
+
+class PairHistory:
+    """
+    How often each pair of attendees has partnered and faced each other tonight.
+
+    Counts live in two square uint8 matrices indexed by attendee slot (the
+    order players joined the session). Recording a match touches a fixed
+    number of cells. Capacity doubles when it runs out, so late arrivals cost
+    amortised O(1).
+    """
+
+    def __init__(self, capacity: int = 16) -> None:
+        self.slot: dict[str, int] = {}
+        self.partners = np.zeros((capacity, capacity), dtype=np.uint8)
+        self.opponents = np.zeros((capacity, capacity), dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.slot)
+
+    def add(self, pid: str) -> int:
+        idx = self.slot.get(pid)
+        if idx is not None:
+            return idx
+        idx = self.slot[pid] = len(self.slot)
+        capacity = self.partners.shape[0]
+        if idx >= capacity:
+            new = max(capacity * 2, idx + 1)
+            for name in ("partners", "opponents"):
+                old = getattr(self, name)
+                grown = np.zeros((new, new), dtype=np.uint8)
+                grown[:capacity, :capacity] = old
+                setattr(self, name, grown)
+        return idx
+
+    def slots(self, ids: Sequence[str]) -> np.ndarray:
+        return np.fromiter((self.add(pid) for pid in ids), dtype=np.intp, count=len(ids))
+
+    def record(self, team1: Sequence[str], team2: Sequence[str]) -> None:
+        """Count one finished match."""
+        for team in (team1, team2):
+            for i in range(len(team)):
+                for j in range(i + 1, len(team)):
+                    self._bump(self.partners, self.add(team[i]), self.add(team[j]))
+        for a in team1:
+            for b in team2:
+                self._bump(self.opponents, self.add(a), self.add(b))
+
+    @staticmethod
+    def _bump(matrix: np.ndarray, i: int, j: int) -> None:
+        if matrix[i, j] < _COUNT_MAX:
+            matrix[i, j] += 1
+            matrix[j, i] += 1
+
+    def repeat_costs(self, slots: np.ndarray) -> np.ndarray:
+        """
+        Repeat cost of each team split in engine.matchmaking._SPLITS for many
+        foursomes at once: `slots` is (k, 4), the result is (k, 3).
+        """
+        rows, cols = slots[:, :, None], slots[:, None, :]
+        partners = self.partners[rows, cols].astype(np.float64)  # (k, 4, 4)
+        opponents = self.opponents[rows, cols].astype(np.float64)
+        return (
+            PARTNER_REPEAT_WEIGHT * partners[:, _PARTNER_R, _PARTNER_C].sum(axis=2)
+            + OPPONENT_REPEAT_WEIGHT * opponents[:, _OPP_R, _OPP_C].sum(axis=2)
+        )
+
+    def choose_group(self, ids: Sequence[str], size: int) -> list[str]:
+        """
+        `size` players from `ids` for one court, starting with ids[0] and
+        adding whoever has met the players already chosen the fewest times.
+        Ties go to the earlier id, so with no history this is ids[:size].
+        """
+        if len(ids) <= size:
+            return list(ids)
+        slots = self.slots(ids)
+        met = (
+            PARTNER_REPEAT_WEIGHT * self.partners[np.ix_(slots, slots)].astype(np.float64)
+            + OPPONENT_REPEAT_WEIGHT * self.opponents[np.ix_(slots, slots)]
+        )
+        chosen = [0]
+        load = met[0].copy()
+        load[0] = np.inf
+        for _ in range(size - 1):
+            nxt = int(np.argmin(load))
+            chosen.append(nxt)
+            load += met[nxt]
+            load[chosen] = np.inf
+        return [ids[i] for i in chosen]
+
+    def snapshot(self) -> dict:
+        """Slots in order plus the non-zero upper-triangle cells, as plain JSON types."""
+        n = len(self.slot)
+        p = np.triu(self.partners[:n, :n], 1)
+        o = np.triu(self.opponents[:n, :n], 1)
+        rows, cols = np.nonzero(p | o)
+        return {
+            "ids": list(self.slot),
+            "cells": [[int(i), int(j), int(p[i, j]), int(o[i, j])] for i, j in zip(rows, cols)],
+        }
+
+    @classmethod
+    def restore(cls, data: dict) -> PairHistory:
+        ids = data["ids"]
+        history = cls(max(16, len(ids)))
+        for pid in ids:
+            history.add(pid)
+        for i, j, partners, opponents in data["cells"]:
+            history.partners[i, j] = history.partners[j, i] = partners
+            history.opponents[i, j] = history.opponents[j, i] = opponents
+        return history
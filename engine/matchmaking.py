@@ -3,7 +3,12 @@ from __future__ import annotations
 
 import random
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from core.constants import MATCHMAKING_MAX_SWAP_CHECKS, MAX_PARTNER_GAP, MAX_TEAM_DIFF, SWAP_WINDOW
+from core.metrics import timed
 
 
 @dataclass(frozen=True)
@@ -30,96 +35,278 @@ def _elo(p: dict) -> float:
     return float(p.get("boosted") or p.get("elo") or 1500.0)
 
 
-def make_balanced_doubles(
-    players: list[dict],
+@dataclass(frozen=True, slots=True)
+class IndexMatch:
+    """A match as positions in a MatchRoster; `MatchRoster.match` resolves the names."""
+    format: str
+    team1: tuple[int, ...]
+    team2: tuple[int, ...]
+
+
+class MatchRoster:
+    """
+    Compact, column-wise view of the players a matchmaker works on.
+
+    Holds the IDs plus NumPy columns for Elo, boosted Elo and the Elo used for
+    matchmaking (`_elo`: boosted, else Elo, else 1500), so the matchmakers sort
+    and score without touching a dict. The source rows are kept by reference
+    and only read again when a name is needed for display.
+    """
+
+    __slots__ = ("ids", "elo", "boosted", "match_elo", "_rows")
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        elo: np.ndarray,
+        boosted: np.ndarray,
+        rows: Sequence[dict] | None = None,
+    ) -> None:
+        self.ids = tuple(ids)
+        self.elo = elo
+        self.boosted = boosted
+        # same fallbacks as _elo; 0 counts as missing there too
+        self.match_elo = np.where(boosted > 0, boosted, np.where(elo > 0, elo, 1500.0))
+        self._rows = rows
+
+    @classmethod
+    def from_players(cls, players: Sequence[dict]) -> MatchRoster:
+        n = len(players)
+        return cls(
+            [p.get("id", "") for p in players],
+            np.fromiter((p.get("elo") or 0.0 for p in players), dtype=np.float64, count=n),
+            np.fromiter((p.get("boosted") or 0.0 for p in players), dtype=np.float64, count=n),
+            players,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def name(self, i: int) -> str | None:
+        return _display_name(self._rows[i] if self._rows is not None else {"id": self.ids[i]})
+
+    def names(self, indices: Iterable[int]) -> list[str | None]:
+        if self._rows is None:
+            return [self.name(i) for i in indices]
+        rows = self._rows
+        return [_display_name(rows[i]) for i in indices]
+
+    def match(self, m: IndexMatch) -> Match:
+        return Match(format=m.format, team1=tuple(self.names(m.team1)), team2=tuple(self.names(m.team2)))
+
+
+# Partitions of a foursome sorted by Elo (descending) into two teams.
+_SPLITS = (((0, 1), (2, 3)), ((0, 2), (1, 3)), ((0, 3), (1, 2)))
+
+# Cost added per Elo point a constraint is exceeded by; large enough that any
+# feasible foursome beats any infeasible one, but still finite so the best
+# infeasible option is chosen when nothing fits.
+_VIOLATION_WEIGHT = 1000.0
+
+
+def _split_cost(p1: float, p2: float, q1: float, q2: float) -> float:
+    diff = abs((p1 + p2) - (q1 + q2)) / 2
+    violation = (
+        max(0.0, abs(p1 - p2) - MAX_PARTNER_GAP)
+        + max(0.0, abs(q1 - q2) - MAX_PARTNER_GAP)
+        + max(0.0, diff - MAX_TEAM_DIFF)
+    )
+    return diff + _VIOLATION_WEIGHT * violation
+
+
+def _foursome_cost(a: float, b: float, c: float, d: float) -> tuple[float, int]:
+    """Best team split for four Elos sorted descending: (cost, index into _SPLITS)."""
+    costs = (_split_cost(a, b, c, d), _split_cost(a, c, b, d), _split_cost(a, d, b, c))
+    k = min(range(3), key=costs.__getitem__)
+    return costs[k], k
+
+
+_SPLIT_INDEX = np.array([t1 + t2 for t1, t2 in _SPLITS])  # (3, 4): positions as team1 + team2
+
+
+def split_diffs(elos: np.ndarray) -> np.ndarray:
+    """
+    Team average Elo difference of each of _SPLITS for many foursomes at once:
+    `elos` is (k, 4) in any order, the result is (k, 3).
+    """
+    teams = elos[:, _SPLIT_INDEX]  # (k, 3, 4)
+    return np.abs(teams[..., 0] + teams[..., 1] - teams[..., 2] - teams[..., 3]) / 2
+
+
+def _group_cost(elos: Sequence[float], group: Sequence[int]) -> float:
+    return _foursome_cost(*sorted((elos[p] for p in group), reverse=True))[0]
+
+
+def _optimise_groups(elos: Sequence[float], max_checks: int) -> list[list[int]]:
+    """
+    Partition indices of `elos` (sorted descending, length divisible by 4) into
+    foursomes with a low summed _foursome_cost.
+
+    Starts from consecutive foursomes and improves them by swapping single players
+    between nearby groups until no swap helps or `max_checks` pairs of groups
+    have been tried. This is a local search: the grouping it stops at need not be
+    the minimum. The bound is a count rather than a time so the same input always
+    gives the same grouping, however fast the machine.
+    """
+    groups = [list(range(i, i + 4)) for i in range(0, len(elos), 4)]
+    costs = [_group_cost(elos, g) for g in groups]
+
+    checks = 0
+    improved = True
+    while improved:
+        improved = False
+        for gi in range(len(groups)):
+            for gj in range(gi + 1, min(len(groups), gi + 1 + SWAP_WINDOW)):
+                if checks >= max_checks:
+                    return groups
+                checks += 1
+                g1, g2 = groups[gi], groups[gj]
+                best_total, best = costs[gi] + costs[gj] - 1e-9, None
+                for x in range(4):
+                    for y in range(4):
+                        n1 = g1[:x] + [g2[y]] + g1[x + 1:]
+                        n2 = g2[:y] + [g1[x]] + g2[y + 1:]
+                        c1 = _group_cost(elos, n1)
+                        if c1 >= best_total:
+                            continue
+                        c2 = _group_cost(elos, n2)
+                        if c1 + c2 < best_total:
+                            best_total, best = c1 + c2, (sorted(n1), sorted(n2), c1, c2)
+                if best is not None:
+                    groups[gi], groups[gj], costs[gi], costs[gj] = best
+                    improved = True
+
+    return groups
+
+
+def _shuffled_order(n: int, rng: random.Random) -> list[int]:
+    order = list(range(n))
+    rng.shuffle(order)
+    return order
+
+
+def _by_elo_desc(roster: MatchRoster, indices: Sequence[int]) -> np.ndarray:
+    """`indices` sorted by matchmaking Elo, highest first; equal Elos keep their order."""
+    indices = np.asarray(indices, dtype=np.intp)
+    return indices[np.argsort(-roster.match_elo[indices], kind="stable")]
+
+
+@timed("matchmaking")
+def balanced_doubles(
+    roster: MatchRoster,
     *,
     seed: int | None = None,
-) -> tuple[list[Match], list[str]]:
+    courts: int | None = None,
+    max_swap_checks: int = MATCHMAKING_MAX_SWAP_CHECKS,
+) -> tuple[list[IndexMatch], list[int]]:
     """
-    Generate doubles matches where:
+    Generate doubles matches with low total team imbalance where:
       • Partner Elo gap ≤ MAX_PARTNER_GAP
       • Team average Elo diff ≤ MAX_TEAM_DIFF
 
     Algorithm:
-      1. Sort players by boosted Elo descending.
-      2. Greedily pair adjacent players into teams (close in skill).
-      3. Pair teams together to form matches — closest average Elos play each other.
-      4. Remaining players go to bench.
-
-    Falls back to random pairing if constraints can't be satisfied.
+      1. Bench the surplus (players beyond a multiple of 4, or beyond `courts`
+         matches) at random, so no rating band is always the one sitting out.
+      2. Sort the rest by boosted Elo and take consecutive foursomes.
+      3. Improve the grouping by swapping players between nearby foursomes
+         while that lowers the total cost, trying at most `max_swap_checks`
+         pairs of foursomes.
+      4. Split each foursome into the best of its three possible team pairings.
+
+    Constraints that can't be met are penalised rather than failing, so the
+    search prefers the grouping with the least violation it finds. It is a
+    heuristic, not an exact optimum; the same roster, seed and bound always
+    give the same matches.
+
+    Matches and the bench are positions in `roster`.
     """
     rng = random.Random(seed)
 
-    if not players or not isinstance(players[0], dict):
-        raise TypeError("players must be a list of player dicts")
-
-    # Shuffle first for tie-breaking randomness, then sort by Elo
-    shuffled = players[:]
-    rng.shuffle(shuffled)
-    sorted_players = sorted(shuffled, key=_elo, reverse=True)
-
-    bench_names: list[str] = []
-    rem = len(sorted_players) % 4
-    if rem:
-        # Bench the lowest-rated surplus players
-        bench_names = [_display_name(p) for p in sorted_players[-rem:]]
-        sorted_players = sorted_players[:-rem]
-
-    # Form pairs: [0,1], [2,3], ...  (adjacent → similar Elo)
-    pairs: list[tuple[dict, dict]] = []
-    for i in range(0, len(sorted_players), 2):
-        pairs.append((sorted_players[i], sorted_players[i + 1]))
+    # Shuffle first for tie-breaking randomness and a random bench
+    order = _shuffled_order(len(roster), rng)
 
-    # Form matches: pair adjacent pairs (similar team averages)
-    matches: list[Match] = []
-    for i in range(0, len(pairs), 2):
-        t1p1, t1p2 = pairs[i]
-        t2p1, t2p2 = pairs[i + 1]
+    playing = len(order) // 4 * 4
+    if courts is not None:
+        playing = min(playing, max(courts, 0) * 4)
+    bench = order[playing:]
 
-        # Optionally shuffle team order so same players don't always face each other
-        if rng.random() < 0.5:
-            t2p1, t2p2 = t2p2, t2p1
+    ranked = _by_elo_desc(roster, order[:playing]).tolist()
+    elos = roster.match_elo[ranked].tolist()
 
-        matches.append(Match(
+    matches: list[IndexMatch] = []
+    for group in _optimise_groups(elos, max_swap_checks):
+        _, k = _foursome_cost(*(elos[p] for p in group))
+        (a, b), (c, d) = _SPLITS[k]
+        matches.append(IndexMatch(
             format="doubles",
-            team1=(_display_name(t1p1), _display_name(t1p2)),
-            team2=(_display_name(t2p1), _display_name(t2p2)),
+            team1=(ranked[group[a]], ranked[group[b]]),
+            team2=(ranked[group[c]], ranked[group[d]]),
         ))
 
-    return matches, bench_names
+    return matches, bench
 
 
-def make_balanced_singles(
-    players: list[dict],
+@timed("matchmaking")
+def balanced_singles(
+    roster: MatchRoster,
     *,
     seed: int | None = None,
-) -> tuple[list[Match], list[str]]:
+) -> tuple[list[IndexMatch], list[int]]:
     """
-    Pair players by closest boosted Elo.
+    Pair players by closest boosted Elo. Matches and the bench are positions in `roster`.
     """
     rng = random.Random(seed)
-    shuffled = players[:]
-    rng.shuffle(shuffled)
-    sorted_players = sorted(shuffled, key=_elo, reverse=True)
+    ranked = _by_elo_desc(roster, _shuffled_order(len(roster), rng)).tolist()
 
-    bench_names: list[str] = []
-    if len(sorted_players) % 2 == 1:
-        bench_names = [_display_name(sorted_players.pop())]
+    bench: list[int] = []
+    if len(ranked) % 2 == 1:
+        bench = [ranked.pop()]
+
+    matches = [
+        IndexMatch(format="singles", team1=(ranked[i],), team2=(ranked[i + 1],))
+        for i in range(0, len(ranked), 2)
+    ]
+    return matches, bench
 
-    matches: list[Match] = []
-    for i in range(0, len(sorted_players), 2):
-        a, b = sorted_players[i], sorted_players[i + 1]
-        matches.append(Match(
-            format="singles",
-            team1=(_display_name(a),),
-            team2=(_display_name(b),),
-        ))
 
-    return matches, bench_names
+def _resolve(roster: MatchRoster, result: tuple[list[IndexMatch], list[int]]) -> tuple[list[Match], list[str]]:
+    """Name every match and the bench; each player's name is built once."""
+    matches, bench = result
+    names = roster.names(range(len(roster)))
+    return [
+        Match(format=m.format, team1=tuple(names[i] for i in m.team1), team2=tuple(names[i] for i in m.team2))
+        for m in matches
+    ], [names[i] for i in bench]
+
+
+def make_balanced_doubles(
+    players: list[dict],
+    *,
+    seed: int | None = None,
+    courts: int | None = None,
+    max_swap_checks: int = MATCHMAKING_MAX_SWAP_CHECKS,
+) -> tuple[list[Match], list[str]]:
+    """`balanced_doubles` for a list of player dicts, with names in the result."""
+    if not players or not isinstance(players[0], dict):
+        raise TypeError("players must be a list of player dicts")
+
+    roster = MatchRoster.from_players(players)
+    return _resolve(roster, balanced_doubles(roster, seed=seed, courts=courts, max_swap_checks=max_swap_checks))
+
+
+def make_balanced_singles(
+    players: list[dict],
+    *,
+    seed: int | None = None,
+) -> tuple[list[Match], list[str]]:
+    """`balanced_singles` for a list of player dicts, with names in the result."""
+    roster = MatchRoster.from_players(players)
+    return _resolve(roster, balanced_singles(roster, seed=seed))
 
 
 # ─── RANDOM MATCHMAKING (kept for backwards compat) ───────────────────────────
 
+@timed("matchmaking")
 def make_random_doubles(
     players: list[str] | list[dict],
     *,
@@ -144,6 +331,7 @@ def make_random_doubles(
     return matches, bench
 
 
+@timed("matchmaking")
 def make_random_singles(
     players: list[str] | list[dict],
     *,
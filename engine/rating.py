@@ -0,0 +1,230 @@
+# engine/rating.py
+from __future__ import annotations
+
+from typing import Mapping, Sequence
+
+import numpy as np
+
+from core.constants import (
+    BOOST_ALPHA,
+    BOOST_GAMMA,
+    DEFAULT_BOOSTED,
+    DEFAULT_ELO,
+    ELO_DIVISOR,
+    K_BALANCED,
+    K_RANKED,
+    SPLIT_POWER,
+    VECTORIZE_MIN_MATCHES,
+)
+from core.player import PlayerRegistry
+from model.model import MatchResult, RatingChange
+
+# A batch of results is one rating period: every match is scored against the
+# ratings the players had when the batch started, and the per-match changes
+# are summed. Applying a club night as one batch therefore doesn't depend on
+# the order courts finished in, and the NumPy path can score all matches at once.
+#
+# Per match:
+#   • team rating     = mean Elo of the team
+#   • expected score  = 1 / (1 + 10 ** ((opp - own) / ELO_DIVISOR))
+#   • team change     = K * (actual - expected), K_RANKED or K_BALANCED
+#   • player change   = team change * n * elo**SPLIT_POWER / Σ teammate elo**SPLIT_POWER
+#                       (the stronger partner takes the larger share of a win or a loss)
+#   • boosted change  = BOOST_ALPHA * carry + BOOST_GAMMA * (elo - boosted)
+#                       where carry = how far a winner's partner out-rates them,
+#                       so players who keep getting carried get matched as stronger.
+
+
+def expected_score(own: float, opp: float) -> float:
+    return 1.0 / (1.0 + 10.0 ** ((opp - own) / ELO_DIVISOR))
+
+
+def _split(team_change: float, elos: Sequence[float]) -> list[float]:
+    powered = [e ** SPLIT_POWER for e in elos]
+    total = sum(powered)
+    return [team_change * len(elos) * p / total for p in powered]
+
+
+def _ratings_of(player: Mapping) -> tuple[float, float]:
+    elo, boosted = player.get("elo"), player.get("boosted")
+    return (
+        float(elo) if elo is not None else DEFAULT_ELO,
+        float(boosted) if boosted is not None else DEFAULT_BOOSTED,
+    )
+
+
+def _k(result: MatchResult) -> float:
+    return K_RANKED if result.ranked else K_BALANCED
+
+
+def _validate(results: Sequence[MatchResult], players: Mapping[str, Mapping]) -> None:
+    for r in results:
+        if r.winner_team not in (1, 2):
+            raise ValueError(f"Match {r.match_id}: winner_team must be 1 or 2.")
+        size = 2 if r.format == "doubles" else 1
+        if len(r.team1_ids) != size or len(r.team2_ids) != size:
+            raise ValueError(f"Match {r.match_id}: {r.format} needs {size} player(s) per team.")
+        ids = (*r.team1_ids, *r.team2_ids)
+        if len(set(ids)) != len(ids):
+            raise ValueError(f"Match {r.match_id}: a player appears twice.")
+        missing = [pid for pid in ids if pid not in players]
+        if missing:
+            raise ValueError(f"Match {r.match_id}: unknown player(s) {missing}.")
+
+
+def _streaks(start: Mapping, outcomes: Sequence[bool]) -> tuple[int, int]:
+    wins = int(start.get("streak_wins") or 0)
+    losses = int(start.get("streak_losses") or 0)
+    for won in outcomes:
+        if won:
+            wins, losses = wins + 1, 0
+        else:
+            wins, losses = 0, losses + 1
+    return wins, losses
+
+
+def _changes(
+    players: Mapping[str, Mapping],
+    elo_delta: Mapping[str, float],
+    boosted_delta: Mapping[str, float],
+    outcomes: Mapping[str, list[bool]],
+) -> dict[str, RatingChange]:
+    changes: dict[str, RatingChange] = {}
+    for pid, played in outcomes.items():
+        elo, boosted = _ratings_of(players[pid])
+        streak_wins, streak_losses = _streaks(players[pid], played)
+        wins = sum(played)
+        changes[pid] = RatingChange(
+            player_id=pid,
+            elo=elo + elo_delta[pid],
+            boosted=boosted + boosted_delta[pid],
+            games=len(played),
+            wins=wins,
+            losses=len(played) - wins,
+            streak_wins=streak_wins,
+            streak_losses=streak_losses,
+        )
+    return changes
+
+
+def rate_batch_python(results: Sequence[MatchResult], players: Mapping[str, Mapping]) -> dict[str, RatingChange]:
+    """Reference implementation, one match at a time. Cheaper than NumPy for a handful of matches."""
+    _validate(results, players)
+    ratings = {pid: _ratings_of(p) for pid, p in players.items()}
+    elo_delta: dict[str, float] = {}
+    boosted_delta: dict[str, float] = {}
+    outcomes: dict[str, list[bool]] = {}
+
+    for r in results:
+        teams = (list(r.team1_ids), list(r.team2_ids))
+        means = [sum(ratings[pid][0] for pid in t) / len(t) for t in teams]
+        for side, team in enumerate(teams):
+            won = r.winner_team == side + 1
+            expected = expected_score(means[side], means[1 - side])
+            team_change = _k(r) * ((1.0 if won else 0.0) - expected)
+            elos = [ratings[pid][0] for pid in team]
+            for pid, change in zip(team, _split(team_change, elos)):
+                elo, boosted = ratings[pid]
+                partners = [ratings[q][0] for q in team if q != pid]
+                carry = max(0.0, sum(partners) / len(partners) - elo) if won and partners else 0.0
+                elo_delta[pid] = elo_delta.get(pid, 0.0) + change
+                boosted_delta[pid] = boosted_delta.get(pid, 0.0) + BOOST_ALPHA * carry + BOOST_GAMMA * (elo - boosted)
+                outcomes.setdefault(pid, []).append(won)
+
+    return _changes(players, elo_delta, boosted_delta, outcomes)
+
+
+def rate_batch_numpy(results: Sequence[MatchResult], players: Mapping[str, Mapping]) -> dict[str, RatingChange]:
+    """Vectorised rating period: every match in the batch is scored in one set of array operations."""
+    _validate(results, players)
+    ids = list(dict.fromkeys(pid for r in results for pid in (*r.team1_ids, *r.team2_ids)))
+    index = {pid: i for i, pid in enumerate(ids)}
+    start = np.array([_ratings_of(players[pid]) for pid in ids], dtype=float).reshape(-1, 2)
+    elo0, boosted0 = start[:, 0], start[:, 1]
+
+    # slots[m, team, seat]: player index, padded with 0 for singles; `mask` marks real seats.
+    m = len(results)
+    slots = np.zeros((m, 2, 2), dtype=np.intp)
+    mask = np.zeros((m, 2, 2), dtype=bool)
+    for i, r in enumerate(results):
+        for t, team in enumerate((r.team1_ids, r.team2_ids)):
+            for s, pid in enumerate(team):
+                slots[i, t, s] = index[pid]
+                mask[i, t, s] = True
+
+    elo = np.where(mask, elo0[slots], 0.0)
+    size = mask.sum(axis=2)                                       # (m, 2)
+    mean = elo.sum(axis=2) / size                                 # (m, 2)
+    expected = 1.0 / (1.0 + 10.0 ** ((mean[:, ::-1] - mean) / ELO_DIVISOR))
+    winner = np.array([r.winner_team for r in results])
+    won = np.stack([winner == 1, winner == 2], axis=1)            # (m, 2)
+    k = np.array([_k(r) for r in results])
+    team_change = k[:, None] * (won - expected)                   # (m, 2)
+
+    powered = np.where(mask, elo ** SPLIT_POWER, 0.0)
+    share = powered / powered.sum(axis=2, keepdims=True)
+    change = team_change[:, :, None] * size[:, :, None] * share   # (m, 2, 2)
+
+    # Seats are at most two per team, so a doubles partner is simply the other seat.
+    partner = elo[:, :, ::-1]
+    doubles = (size == 2)[:, :, None]
+    carry = np.where(won[:, :, None] & doubles, np.maximum(partner - elo, 0.0), 0.0)
+    boost = BOOST_ALPHA * carry + BOOST_GAMMA * (elo - np.where(mask, boosted0[slots], 0.0))
+
+    flat = slots[mask]
+    elo_delta = np.zeros(len(ids))
+    boosted_delta = np.zeros(len(ids))
+    np.add.at(elo_delta, flat, change[mask])
+    np.add.at(boosted_delta, flat, boost[mask])
+
+    outcomes: dict[str, list[bool]] = {pid: [] for pid in ids}
+    for r in results:
+        for pid in r.team1_ids:
+            outcomes[pid].append(r.winner_team == 1)
+        for pid in r.team2_ids:
+            outcomes[pid].append(r.winner_team == 2)
+
+    return _changes(
+        players,
+        {pid: float(elo_delta[i]) for pid, i in index.items()},
+        {pid: float(boosted_delta[i]) for pid, i in index.items()},
+        outcomes,
+    )
+
+
+def rate_batch(
+    results: Sequence[MatchResult],
+    players: Mapping[str, Mapping],
+    *,
+    vectorized: bool | None = None,
+) -> dict[str, RatingChange]:
+    """
+    Rate a batch of results against `players` (id → row with elo/boosted/streaks).
+    `vectorized=None` picks NumPy once the batch has VECTORIZE_MIN_MATCHES matches.
+    """
+    if not results:
+        return {}
+    if vectorized is None:
+        vectorized = len(results) >= VECTORIZE_MIN_MATCHES
+    return rate_batch_numpy(results, players) if vectorized else rate_batch_python(results, players)
+
+
+def apply_results(
+    registry: PlayerRegistry,
+    results: Sequence[MatchResult],
+    *,
+    vectorized: bool | None = None,
+) -> dict[str, RatingChange]:
+    """Read current ratings, rate the batch and write every change back in one transaction."""
+    ids = list(dict.fromkeys(pid for r in results for pid in (*r.team1_ids, *r.team2_ids)))
+    if not ids:
+        return {}
+    # Holding the write transaction while reading keeps another writer from
+    # changing a rating between the read and the write-back.
+    with registry.db.write():
+        players, missing = registry.get_players(ids)
+        if missing:
+            raise ValueError(f"Unknown player(s) {missing}.")
+        changes = rate_batch(results, {p["id"]: p for p in players}, vectorized=vectorized)
+        registry.apply_rating_changes(changes.values())
+    return changes
@@ -0,0 +1,200 @@
+# engine/recompute.py
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Iterator
+
+from core.player import RATING_FIELDS, PlayerRegistry
+from engine.rating import rate_batch
+from model.model import MatchResult
+
+# Replays completed matches from `matches` / `match_players` through the rating
+# engine. History is rated in batches (consecutive matches of one session, in
+# matches.rowid order) and every batch leaves a checkpoint row per player in
+# `rating_checkpoints`. Correcting a match or changing a K-factor then only
+# replays from the batch containing the earliest affected match: players pick
+# up from their last checkpoint before it, and rows are streamed from a cursor
+# rather than loaded up front. Completed matches a replay has passed over are
+# flagged `matches.rated`; the lowest unflagged one is where new work starts,
+# since courts finish out of rowid order.
+
+
+@dataclass(frozen=True)
+class RecomputeSummary:
+    start_seq: int | None   # matches.rowid the replay started from (None: nothing to do)
+    batches: int
+    matches: int
+    players: int
+
+
+_RESULT_ROWS = """
+    SELECT m.rowid AS seq, m.id, m.session_id, m.format, m.score_team1, m.score_team2,
+           mp.player_id, mp.team
+    FROM matches m
+    JOIN match_players mp ON mp.match_id = m.id
+    WHERE m.status = 'completed' AND m.rowid >= ?
+    ORDER BY m.rowid, mp.team, mp.player_id
+"""
+
+
+def _stream_results(conn: sqlite3.Connection, start_seq: int) -> Iterator[tuple[int, str, MatchResult]]:
+    """Yield (seq, session_id, result) per completed match, in rowid order. Drawn and unscored matches are skipped."""
+    current: sqlite3.Row | None = None
+    teams: tuple[list[str], list[str]] = ([], [])
+
+    def finish() -> tuple[int, str, MatchResult] | None:
+        s1, s2 = current["score_team1"], current["score_team2"]
+        if s1 is None or s2 is None or s1 == s2:
+            return None
+        result = MatchResult(
+            match_id=current["id"],
+            winner_team=1 if s1 > s2 else 2,
+            team1_ids=teams[0],
+            team2_ids=teams[1],
+            format=current["format"],
+        )
+        return current["seq"], current["session_id"], result
+
+    for row in conn.execute(_RESULT_ROWS, (start_seq,)):
+        if current is None or row["seq"] != current["seq"]:
+            if current is not None and (done := finish()):
+                yield done
+            current = row
+            teams = ([], [])
+        teams[row["team"] - 1].append(row["player_id"])
+
+    if current is not None and (done := finish()):
+        yield done
+
+
+def _batches(results: Iterator[tuple[int, str, MatchResult]]) -> Iterator[tuple[int, int, str, list[MatchResult]]]:
+    """Group consecutive matches of the same session into (seq, last_seq, session_id, results)."""
+    batch: list[MatchResult] = []
+    seq = last_seq = 0
+    session_id = ""
+    for match_seq, match_session, result in results:
+        if batch and match_session != session_id:
+            yield seq, last_seq, session_id, batch
+            batch = []
+        if not batch:
+            seq, session_id = match_seq, match_session
+        batch.append(result)
+        last_seq = match_seq
+    if batch:
+        yield seq, last_seq, session_id, batch
+
+
+def _start_seq(conn: sqlite3.Connection, from_match_id: str | None, full: bool) -> int | None:
+    """Earliest matches.rowid that has to be replayed, or None if everything is up to date."""
+    if full:
+        row = conn.execute("SELECT MIN(rowid) AS seq FROM matches WHERE status = 'completed'").fetchone()
+        return row["seq"]
+
+    candidates: list[int] = []
+
+    # Matches completed since the last replay, wherever they fall in rowid order.
+    row = conn.execute("SELECT MIN(rowid) AS seq FROM matches WHERE status = 'completed' AND rated = 0").fetchone()
+    if row["seq"] is not None:
+        candidates.append(row["seq"])
+
+    if from_match_id is not None:
+        row = conn.execute("SELECT rowid AS seq FROM matches WHERE id = ?", (from_match_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"No match with id '{from_match_id}'.")
+        candidates.append(row["seq"])
+
+    if not candidates:
+        return None
+    # Restart from the start of the batch the earliest match falls in (or any later one it precedes).
+    start = min(candidates)
+    row = conn.execute("SELECT MIN(seq) AS seq FROM rating_batches WHERE last_seq >= ?", (start,)).fetchone()
+    return start if row["seq"] is None else min(start, row["seq"])
+
+
+def _opening_state(conn: sqlite3.Connection, player_id: str, start_seq: int) -> dict:
+    """Ratings a player had just before `start_seq`: last checkpoint, else baseline, else the players row."""
+    columns = ", ".join(RATING_FIELDS)
+    row = conn.execute(
+        f"""SELECT {columns} FROM rating_checkpoints
+        WHERE player_id = ? AND seq < ?
+        ORDER BY seq DESC LIMIT 1""",
+        (player_id, start_seq),
+    ).fetchone()
+    if row is None:
+        row = conn.execute(f"SELECT {columns} FROM rating_baselines WHERE player_id = ?", (player_id,)).fetchone()
+    if row is None:
+        # Never rated before: the players row still holds the registration values.
+        row = conn.execute(f"SELECT {columns} FROM players WHERE id = ?", (player_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Match history references unknown player '{player_id}'.")
+        conn.execute(
+            f"INSERT INTO rating_baselines (player_id, {columns}) VALUES (?, {', '.join('?' * len(RATING_FIELDS))})",
+            (player_id, *row),
+        )
+    return {"id": player_id, **dict(row)}
+
+
+def recompute_ratings(
+    registry: PlayerRegistry,
+    *,
+    from_match_id: str | None = None,
+    full: bool = False,
+) -> RecomputeSummary:
+    """
+    Bring player ratings up to date with match history in one transaction.
+
+    Replays from the earliest of: the batch containing `from_match_id` (after a
+    score correction), the first match not yet rated, or the very first match
+    when `full` is set (after changing a K-factor or other constant).
+    """
+    with registry.db.write() as conn:
+        start = _start_seq(conn, from_match_id, full)
+        if start is None:
+            return RecomputeSummary(start_seq=None, batches=0, matches=0, players=0)
+
+        # Players rated in the batches being replaced must be reset even if the
+        # corrected history no longer includes them.
+        states: dict[str, dict] = {
+            pid: _opening_state(conn, pid, start)
+            for (pid,) in conn.execute("SELECT DISTINCT player_id FROM rating_checkpoints WHERE seq >= ?", (start,)).fetchall()
+        }
+        conn.execute("DELETE FROM rating_checkpoints WHERE seq >= ?", (start,))
+        conn.execute("DELETE FROM rating_batches WHERE seq >= ?", (start,))
+
+        columns = ", ".join(RATING_FIELDS)
+        checkpoint_sql = (
+            f"INSERT INTO rating_checkpoints (player_id, seq, session_id, {columns}) "
+            f"VALUES (?, ?, ?, {', '.join('?' * len(RATING_FIELDS))})"
+        )
+        batches = matches = 0
+        for seq, last_seq, session_id, results in _batches(_stream_results(conn, start)):
+            for r in results:
+                for pid in (*r.team1_ids, *r.team2_ids):
+                    if pid not in states:
+                        states[pid] = _opening_state(conn, pid, start)
+
+            changes = rate_batch(results, states)
+            for pid, c in changes.items():
+                s = states[pid]
+                s["elo"], s["boosted"] = c.elo, c.boosted
+                s["total_games"] += c.games
+                s["total_wins"] += c.wins
+                s["total_losses"] += c.losses
+                s["streak_wins"], s["streak_losses"] = c.streak_wins, c.streak_losses
+
+            conn.execute(
+                "INSERT INTO rating_batches (seq, last_seq, session_id) VALUES (?, ?, ?)",
+                (seq, last_seq, session_id),
+            )
+            conn.executemany(
+                checkpoint_sql,
+                [(pid, seq, session_id, *(states[pid][f] for f in RATING_FIELDS)) for pid in changes],
+            )
+            batches += 1
+            matches += len(results)
+
+        conn.execute("UPDATE matches SET rated = 1 WHERE status = 'completed' AND rated = 0 AND rowid >= ?", (start,))
+        registry.set_ratings(states.values())
+
+    return RecomputeSummary(start_seq=start, batches=batches, matches=matches, players=len(states))
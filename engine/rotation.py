@@ -0,0 +1,207 @@
+# engine/rotation.py
+from __future__ import annotations
+
+import heapq
+import random
+from collections import deque
+from typing import Callable, Iterator
+
+# (games played, join sequence, random tiebreak, player id): a player's place in the queue
+Entry = tuple[int, int, float, str]
+
+
+class RotationQueue:
+    """
+    Waiting list for bench rotation.
+
+    Players come off the bench fewest-games-played first, then longest-waiting
+    first, then by a random tiebreak drawn when they joined the queue.
+
+    Backed by a heap with lazy deletion: removing a player only forgets their
+    live entry (O(1)); stale heap entries are skipped when popped and purged
+    once they outnumber live ones. Pick, pause and remove are O(log n).
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[Entry] = []
+        self._live: dict[str, Entry] = {}
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, pid: object) -> bool:
+        return pid in self._live
+
+    def __iter__(self) -> Iterator[str]:
+        """Waiting players in the order they joined the queue (sorted on demand; for display)."""
+        return (entry[3] for entry in sorted(self._live.values(), key=lambda entry: entry[1]))
+
+    def push(self, pid: str, games_played: int, rng: random.Random) -> Entry:
+        """Add a player (or re-add them with a fresh wait start). Returns their entry."""
+        self._live.pop(pid, None)
+        entry = (games_played, self._seq, rng.random(), pid)
+        self._seq += 1
+        self._live[pid] = entry
+        heapq.heappush(self._heap, entry)
+        self._maybe_compact()
+        return entry
+
+    def put_back(self, entries: list[Entry]) -> None:
+        """Return players taken by `take_group` to the places they had."""
+        for entry in entries:
+            self._live[entry[3]] = entry
+            heapq.heappush(self._heap, entry)
+
+    def remove(self, pid: str) -> bool:
+        """Take a player out of the queue. Returns False if they weren't waiting."""
+        if self._live.pop(pid, None) is None:
+            return False
+        self._maybe_compact()
+        return True
+
+    def peek(self) -> str | None:
+        self._drop_stale()
+        return self._heap[0][3] if self._heap else None
+
+    def pop_many(self, n: int) -> list[str]:
+        """Remove and return the next `n` players, or nobody if fewer than `n` are waiting."""
+        if len(self._live) < n:
+            return []
+        picked: list[str] = []
+        while len(picked) < n:
+            self._drop_stale()
+            entry = heapq.heappop(self._heap)
+            del self._live[entry[3]]
+            picked.append(entry[3])
+        return picked
+
+    def pop_group(self, n: int, lookahead: int, choose: Callable[[list[str]], list[str]]) -> list[str]:
+        """
+        Like pop_many, but `choose` picks `n` players from the next n + `lookahead`
+        candidates with the same games-played count as the head of the queue
+        (always including the head). Candidates not chosen keep their place.
+        """
+        return [entry[3] for entry in self.take_group(n, lookahead, choose)]
+
+    def take_group(self, n: int, lookahead: int, choose: Callable[[list[str]], list[str]]) -> list[Entry]:
+        """pop_group, returning the chosen players' entries (for `put_back`) in `choose` order."""
+        if len(self._live) < n:
+            return []
+        candidates: list[Entry] = []
+        while len(candidates) < min(n + lookahead, len(self._live)):
+            self._drop_stale()
+            entry = self._heap[0]
+            if len(candidates) >= n and entry[0] != candidates[0][0]:
+                break
+            candidates.append(heapq.heappop(self._heap))
+
+        picked = choose([entry[3] for entry in candidates])
+        chosen = set(picked)
+        for entry in candidates:
+            if entry[3] in chosen:
+                del self._live[entry[3]]
+            else:
+                heapq.heappush(self._heap, entry)
+        by_pid = {entry[3]: entry for entry in candidates}
+        return [by_pid[pid] for pid in picked]
+
+    def snapshot(self) -> dict:
+        """JSON-serialisable copy of the queue; `restore` rebuilds the same pick order."""
+        return {"seq": self._seq, "entries": [list(entry) for entry in self._live.values()]}
+
+    @classmethod
+    def restore(cls, data: dict) -> RotationQueue:
+        queue = cls()
+        queue._seq = data["seq"]
+        for gp, seq, tiebreak, pid in data["entries"]:
+            queue._live[pid] = (gp, seq, tiebreak, pid)
+        queue._heap = list(queue._live.values())
+        heapq.heapify(queue._heap)
+        return queue
+
+    def _drop_stale(self) -> None:
+        heap = self._heap
+        while heap and self._live.get(heap[0][3]) is not heap[0]:
+            heapq.heappop(heap)
+
+    def _maybe_compact(self) -> None:
+        if len(self._heap) > 2 * len(self._live) + 32:
+            self._heap = list(self._live.values())
+            heapq.heapify(self._heap)
+
+
+class ReadyQueue:
+    """
+    The next matches off the bench, picked ahead of time so a finished court
+    is refilled by popping the front one (O(1)) and the board can show who
+    is on next.
+
+    Each match keeps its players' RotationQueue entries; they are out of the
+    waiting list while they are here. A player joining the waiting list
+    ahead of someone in a match (fewer games played, e.g. a late arrival)
+    reopens that match and every one after it: their players go back to
+    the waiting list in their old places, to be picked again. Pausing or
+    removing a player does the same from their match on. Matches in front
+    are left alone. The queue is a few matches long, so lookups are scans.
+    """
+
+    def __init__(self) -> None:
+        # (player ids in team order, their entries, the last-placed entry)
+        self._matches: deque[tuple[tuple[str, ...], list[Entry], Entry]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._matches)
+
+    def __contains__(self, pid: object) -> bool:
+        return self._position(pid) is not None
+
+    def __iter__(self) -> Iterator[tuple[str, ...]]:
+        """Player ids of each ready match, next first."""
+        return (ids for ids, _, _ in self._matches)
+
+    def append(self, ids: tuple[str, ...], entries: list[Entry]) -> None:
+        self._matches.append((ids, entries, max(entries)))
+
+    def pop(self) -> tuple[str, ...]:
+        """Player ids of the next match, or () if none is ready."""
+        return self._matches.popleft()[0] if self._matches else ()
+
+    def joined(self, entry: Entry, waiting: RotationQueue) -> None:
+        """`entry` just joined `waiting`: reopen the first match it would have been picked ahead of."""
+        for i, (_, _, last) in enumerate(self._matches):
+            if entry < last:
+                self.reopen(i, waiting)
+                return
+
+    def discard(self, pid: str, waiting: RotationQueue) -> bool:
+        """Reopen the match `pid` is in (and those after it). Returns False if they're in none."""
+        i = self._position(pid)
+        if i is None:
+            return False
+        self.reopen(i, waiting)
+        return True
+
+    def reopen(self, start: int, waiting: RotationQueue) -> None:
+        """Send the players of matches `start` onwards back to `waiting`."""
+        entries: list[Entry] = []
+        while len(self._matches) > start:
+            entries.extend(self._matches.pop()[1])
+        if entries:
+            waiting.put_back(entries)
+
+    def _position(self, pid: object) -> int | None:
+        for i, (ids, _, _) in enumerate(self._matches):
+            if pid in ids:
+                return i
+        return None
+
+    def snapshot(self) -> list[dict]:
+        return [{"ids": list(ids), "entries": [list(entry) for entry in entries]} for ids, entries, _ in self._matches]
+
+    @classmethod
+    def restore(cls, data: list[dict]) -> ReadyQueue:
+        queue = cls()
+        for match in data:
+            queue.append(tuple(match["ids"]), [(gp, seq, tiebreak, pid) for gp, seq, tiebreak, pid in match["entries"]])
+        return queue
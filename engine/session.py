@@ -0,0 +1,528 @@
+# engine/session.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import random
+from typing import Iterable, Mapping
+
+import numpy as np
+
+from core.constants import READY_MATCHES_PER_COURT, REFILL_LOOKAHEAD
+from core.metrics import timed
+from core.player import PlayerRegistry
+from core.session_store import SessionStore
+from engine.history import PairHistory
+from engine.matchmaking import _SPLITS, Match, _elo, split_diffs
+from engine.rotation import ReadyQueue, RotationQueue
+
+
+# -----------------------------
+# Session State (court-based)
+# -----------------------------
+
+class Roster:
+    """
+    Attendee rows cached for the session so the flows never go back to SQLite
+    for names and ratings. The whole roster is reloaded with one query when
+    the registry reports a write since the last load.
+    """
+
+    def __init__(self) -> None:
+        self.players: dict[str, dict] = {}
+        self.names: dict[str, str] = {}
+        self._version: int | None = None
+
+    def put(self, player: dict) -> None:
+        pid = player["id"]
+        self.players[pid] = player
+        self.names[pid] = display_name(player)
+
+    def discard(self, pid: str) -> None:
+        self.players.pop(pid, None)
+        self.names.pop(pid, None)
+
+    def sync(self, registry: PlayerRegistry, attendee_ids: Iterable[str]) -> None:
+        if self._version == registry.version:
+            return
+        self.players.clear()
+        self.names.clear()
+        players, _ = registry.get_players(attendee_ids)
+        for player in players:
+            self.put(player)
+        self._version = registry.version
+
+    def name(self, pid: str) -> str:
+        return self.names.get(pid, pid)
+
+
+@dataclass
+class SessionState:
+    attendee_ids: set[str] = field(default_factory=set)
+    phase: str = "lobby"
+    fmt: str = "d"  # "d" doubles, "s" singles
+    courts: int = 1
+    seed: int | None = None
+
+    court_matches: list[Match] = field(default_factory=list)
+    court_player_ids: list[tuple[str, ...]] = field(default_factory=list)
+    court_of: dict[str, int] = field(default_factory=dict)  # player id -> court index
+    waiting: RotationQueue = field(default_factory=RotationQueue)
+    paused_ids: set[str] = field(default_factory=set)
+    games_played: dict[str, int] = field(default_factory=dict)
+    rng: random.Random = field(default_factory=random.Random)
+    roster: Roster = field(default_factory=Roster)
+    history: PairHistory = field(default_factory=PairHistory)
+    # Extra same-games-played waiters considered per refill (0: strict queue order)
+    lookahead: int = REFILL_LOOKAHEAD
+    # Next matches, picked ahead from the waiting list (taken out of it)
+    ready: ReadyQueue = field(default_factory=ReadyQueue)
+    ready_per_court: int = READY_MATCHES_PER_COURT
+
+    session_id: str | None = None
+    court_match_ids: list[str | None] = field(default_factory=list)
+    store: SessionStore | None = field(default=None, repr=False, compare=False)
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def display_name(p: dict) -> str:
+    first = p.get("first_name")
+    surname = p.get("surname")
+    if isinstance(first, str) and isinstance(surname, str):
+        full = f"{first.strip()} {surname.strip()}".strip()
+        if full:
+            return full
+
+    pid = p.get("id")
+    return str(pid) if pid is not None else "?"
+
+
+def sync_roster(registry: PlayerRegistry, state: SessionState) -> Roster:
+    state.roster.sync(registry, state.attendee_ids)
+    return state.roster
+
+
+def get_attendees(registry: PlayerRegistry, state: SessionState) -> list[dict]:
+    players = sync_roster(registry, state).players
+    return [players[pid] for pid in sorted(state.attendee_ids) if pid in players]
+
+
+def is_on_court(state: SessionState, pid: str) -> bool:
+    return pid in state.court_of
+
+
+def players_per_court(fmt: str) -> int:
+    return 4 if fmt == "d" else 2
+
+
+def _empty_match(fmt: str) -> Match:
+    if fmt == "d":
+        return Match(format="doubles", team1=("—", "—"), team2=("—", "—"))
+    return Match(format="singles", team1=("—",), team2=("—",))
+
+
+def _enqueue(state: SessionState, pid: str) -> None:
+    state.ready.joined(state.waiting.push(pid, state.games_played.get(pid, 0), state.rng), state.waiting)
+
+
+def _unready(state: SessionState, pid: str) -> None:
+    """Take `pid` off the bench: out of any ready match (re-picking it) and the waiting list."""
+    state.ready.discard(pid, state.waiting)
+    state.waiting.remove(pid)
+
+
+def next_up(state: SessionState) -> list[Match]:
+    """The ready matches, in the order courts will get them."""
+    return [_match_from_ids(state.roster, state.fmt, ids) for ids in state.ready]
+
+
+def _top_up(state: SessionState, depth: int | None = None) -> None:
+    """
+    Pick ready matches until there are `depth` (default: `ready_per_court` per
+    court) or the bench runs out. Each pick takes the next N waiting players,
+    prioritising those with fewer games played. The longest-waiting player
+    always goes on; the rest may be swapped for someone a little further back
+    with the same games played if that avoids repeat partners/opponents.
+    """
+    if depth is None:
+        depth = state.ready_per_court * state.courts
+    needed = players_per_court(state.fmt)
+    groups = []
+    while len(state.ready) + len(groups) < depth:
+        entries = state.waiting.take_group(
+            needed,
+            state.lookahead,
+            lambda candidates: state.history.choose_group(candidates, needed),
+        )
+        if not entries:
+            break
+        groups.append(entries)
+
+    if groups:
+        made = _make_matches_for_groups(
+            state.roster, state.fmt, [[entry[3] for entry in group] for group in groups], state.rng, state.history
+        )
+        for (_, ids), entries in zip(made, groups):
+            state.ready.append(ids, entries)
+
+
+def _journaling(state: SessionState) -> bool:
+    return state.store is not None and state.session_id is not None
+
+
+def _set_court(state: SessionState, idx: int, match: Match, ids: tuple[str, ...]) -> None:
+    for pid in state.court_player_ids[idx]:
+        state.court_of.pop(pid, None)
+    state.court_matches[idx] = match
+    state.court_player_ids[idx] = ids
+    for pid in ids:
+        state.court_of[pid] = idx
+
+    match_id = None
+    if ids and _journaling(state):
+        half = len(ids) // 2
+        match_id = state.store.start_match(state.session_id, idx + 1, state.fmt, ids[:half], ids[half:])
+    state.court_match_ids[idx] = match_id
+
+
+def _match_from_ids(roster: Roster, fmt: str, ids: tuple[str, ...]) -> Match:
+    """Match for display, teams taken from `ids` in order (first half vs second half)."""
+    if not ids:
+        return _empty_match(fmt)
+    names = tuple(roster.name(pid) for pid in ids)
+    half = len(names) // 2
+    return Match(format="doubles" if fmt == "d" else "singles", team1=names[:half], team2=names[half:])
+
+
+@timed("session", "make_match")
+def _make_matches_for_groups(
+    roster: Roster,
+    fmt: str,
+    groups: list[list[str]],
+    rng: random.Random,
+    history: PairHistory | None = None,
+) -> list[tuple[Match, tuple[str, ...]]]:
+    """
+    Create a Match for display + the exact IDs used, for each group of picked players.
+
+    Each group is shuffled with the session RNG (in order, so the result is
+    reproducible from the seed). Doubles then take whichever of the three team
+    splits has the smallest team Elo difference plus repeat partner/opponent cost,
+    scored for all groups in one go; the shuffle decides between equal splits.
+    """
+    shuffled = []
+    for ids in groups:
+        ids = ids[:]
+        rng.shuffle(ids)
+        shuffled.append(ids)
+
+    fours = [ids for ids in shuffled if len(ids) == 4]
+    if fours:
+        elos = np.array([[_elo(roster.players.get(pid, {})) for pid in ids] for ids in fours])
+        cost = split_diffs(elos)
+        if history is not None:
+            cost += history.repeat_costs(np.array([history.slots(ids) for ids in fours]))
+        best = iter(cost.argmin(axis=1))
+        for n, ids in enumerate(shuffled):
+            if len(ids) == 4:
+                (a, b), (c, d) = _SPLITS[next(best)]
+                shuffled[n] = [ids[a], ids[b], ids[c], ids[d]]
+
+    return [(_match_from_ids(roster, fmt, tuple(ids)), tuple(ids)) for ids in shuffled]
+
+
+# -----------------------------
+# Persistence
+# -----------------------------
+
+def snapshot_state(state: SessionState) -> dict:
+    """Everything needed to rebuild `state` exactly, as plain JSON types."""
+    version, internal, gauss_next = state.rng.getstate()
+    return {
+        "phase": state.phase,
+        "fmt": state.fmt,
+        "courts": state.courts,
+        "seed": state.seed,
+        "attendee_ids": sorted(state.attendee_ids),
+        "paused_ids": sorted(state.paused_ids),
+        "games_played": state.games_played,
+        "court_player_ids": [list(ids) for ids in state.court_player_ids],
+        "court_match_ids": state.court_match_ids,
+        "waiting": state.waiting.snapshot(),
+        "ready": state.ready.snapshot(),
+        "history": state.history.snapshot(),
+        "rng": [version, list(internal), gauss_next],
+    }
+
+
+def restore_state(
+    registry: PlayerRegistry,
+    session_id: str,
+    payload: dict,
+    store: SessionStore | None = None,
+) -> SessionState:
+    """Rebuild a SessionState from `snapshot_state` output without re-running any allocation."""
+    version, internal, gauss_next = payload["rng"]
+    rng = random.Random()
+    rng.setstate((version, tuple(internal), gauss_next))
+
+    state = SessionState(
+        attendee_ids=set(payload["attendee_ids"]),
+        phase=payload["phase"],
+        fmt=payload["fmt"],
+        courts=payload["courts"],
+        seed=payload["seed"],
+        court_player_ids=[tuple(ids) for ids in payload["court_player_ids"]],
+        waiting=RotationQueue.restore(payload["waiting"]),
+        ready=ReadyQueue.restore(payload.get("ready", [])),
+        paused_ids=set(payload["paused_ids"]),
+        games_played=dict(payload["games_played"]),
+        rng=rng,
+        history=PairHistory.restore(payload["history"]) if "history" in payload else PairHistory(),
+        session_id=session_id,
+        court_match_ids=list(payload["court_match_ids"]),
+        store=store,
+    )
+    roster = sync_roster(registry, state)
+    state.court_matches = [_match_from_ids(roster, state.fmt, ids) for ids in state.court_player_ids]
+    state.court_of = {pid: idx for idx, ids in enumerate(state.court_player_ids) for pid in ids}
+    return state
+
+
+def _persist(state: SessionState) -> None:
+    if _journaling(state):
+        state.store.save_snapshot(state.session_id, snapshot_state(state))
+
+
+# -----------------------------
+# Operations
+#
+# Each one validates, mutates `state`, journals it and raises ValueError with a
+# user-facing message when the request doesn't apply.
+# -----------------------------
+
+def add_attendees(state: SessionState, players: Iterable[dict]) -> list[dict]:
+    """Add players (registry rows) to the session. Returns the ones that weren't already in it."""
+    added: list[dict] = []
+    for player in players:
+        pid = player.get("id")
+        if not pid or pid in state.attendee_ids:
+            continue
+
+        state.attendee_ids.add(pid)
+        state.roster.put(player)
+        state.history.add(pid)
+        state.games_played.setdefault(pid, 0)  # harmless in lobby too
+
+        # If session is running, join the waiting list (unless paused)
+        if state.phase == "running" and pid not in state.paused_ids:
+            _enqueue(state, pid)
+
+        if _journaling(state):
+            state.store.add_attendee(state.session_id, pid)
+        added.append(player)
+
+    if added:
+        if state.phase == "running":
+            _top_up(state)
+            _fill_idle_courts(state, state.roster)
+        _persist(state)
+    return added
+
+
+def remove_attendee(state: SessionState, pid: str) -> None:
+    if pid not in state.attendee_ids:
+        raise ValueError("That player is not in the session.")
+
+    if state.phase == "running" and is_on_court(state, pid):
+        raise ValueError("That player is currently on court. Remove them after their game finishes.")
+
+    _unready(state, pid)
+    state.attendee_ids.discard(pid)
+    state.roster.discard(pid)
+    state.paused_ids.discard(pid)
+    state.games_played.pop(pid, None)
+    if state.phase == "running":
+        _top_up(state)
+    if _journaling(state):
+        state.store.remove_attendee(state.session_id, pid)
+    _persist(state)
+
+
+@timed("session")
+def start_session(registry: PlayerRegistry, state: SessionState, fmt: str, courts: int, seed: int | None = None) -> None:
+    if state.phase != "lobby":
+        raise ValueError("Session already started.")
+
+    if not state.attendee_ids:
+        raise ValueError("No attendees. Add attendees first.")
+
+    if fmt not in {"s", "d"}:
+        raise ValueError("Format must be 's' (singles) or 'd' (doubles).")
+
+    if courts <= 0:
+        raise ValueError("Courts must be at least 1.")
+
+    # lock in settings
+    state.phase = "running"
+    state.fmt = fmt
+    state.courts = courts
+    state.seed = seed
+    state.rng = random.Random(seed)
+    if _journaling(state):
+        state.store.start_session(state.session_id, fmt, courts)
+
+    # init games played
+    for pid in state.attendee_ids:
+        state.games_played.setdefault(pid, 0)
+
+    # everyone starts waiting
+    state.waiting = RotationQueue()
+    state.ready = ReadyQueue()
+    for pid in sorted(state.attendee_ids):
+        if pid not in state.paused_ids:
+            _enqueue(state, pid)
+    # allocate courts immediately
+    state.court_matches = [_empty_match(fmt) for _ in range(courts)]
+    state.court_player_ids = [tuple() for _ in range(courts)]
+    state.court_match_ids = [None] * courts
+    state.court_of = {}
+
+    _refill(state, sync_roster(registry, state), range(courts))
+    _persist(state)
+
+
+def _refill(state: SessionState, roster: Roster, indexes: Iterable[int]) -> list[bool]:
+    """Give each court index in turn the next ready match, then pick ahead again."""
+    indexes = list(indexes)
+    if len(state.ready) < len(indexes):
+        _top_up(state, len(indexes))  # fewer ready than courts to fill: pick the rest now
+
+    filled: list[bool] = []
+    for idx in indexes:
+        ids = state.ready.pop()
+        _set_court(state, idx, _match_from_ids(roster, state.fmt, ids), ids)
+        filled.append(bool(ids))
+    _top_up(state)
+    return filled
+
+
+@timed("session", "court_refill")
+def complete_courts(
+    registry: PlayerRegistry,
+    state: SessionState,
+    court_nos: Iterable[int],
+    scores: Mapping[int, tuple[int, int]] | None = None,
+) -> list[bool]:
+    """
+    Finish the matches on several courts (1-based) and refill them, in the order
+    given. Returns, per court, whether it could be refilled. Every court is
+    checked before any is touched.
+
+    `scores` maps court numbers to (team 1, team 2) points. Only scored matches
+    are rated (engine.recompute); a court left out is recorded as played, unscored.
+    """
+    if state.phase != "running":
+        raise ValueError("Session not running.")
+
+    court_nos = list(court_nos)
+    if not court_nos:
+        raise ValueError("No courts given.")
+
+    if len(set(court_nos)) != len(court_nos):
+        raise ValueError("A court is listed more than once.")
+
+    for court_no in court_nos:
+        if court_no <= 0 or court_no > state.courts:
+            raise ValueError("Invalid court number.")
+        if not state.court_player_ids[court_no - 1]:
+            raise ValueError("That court has no match allocated.")
+
+    scores = dict(scores or {})
+    for court_no, score in scores.items():
+        if court_no not in court_nos:
+            raise ValueError(f"Court {court_no} has a score but is not being completed.")
+        if len(score) != 2 or any(not isinstance(p, int) or p < 0 for p in score):
+            raise ValueError("A score is two whole numbers of points, one per team.")
+        if score[0] == score[1]:
+            raise ValueError("A score must have a winner.")
+
+    for court_no in court_nos:
+        idx = court_no - 1
+        ids_on_court = state.court_player_ids[idx]
+
+        match_id = state.court_match_ids[idx]
+        if match_id is not None and _journaling(state):
+            state.store.complete_match(state.session_id, court_no, match_id, scores.get(court_no))
+        half = len(ids_on_court) // 2
+        state.history.record(ids_on_court[:half], ids_on_court[half:])
+
+        # update fairness stats and send them to the back of the waiting list
+        for pid in ids_on_court:
+            state.games_played[pid] = state.games_played.get(pid, 0) + 1
+            if pid not in state.paused_ids:
+                _enqueue(state, pid)
+
+    # refill these courts, then any left idle that the returning players can fill
+    roster = sync_roster(registry, state)
+    refilled = _refill(state, roster, [court_no - 1 for court_no in court_nos])
+    _fill_idle_courts(state, roster)
+    _persist(state)
+    return refilled
+
+
+def _fill_idle_courts(state: SessionState, roster: Roster) -> None:
+    """
+    Put waiting players on courts left empty because too few were waiting at
+    their last refill, once enough are (e.g. after late arrivals).
+    """
+    idle = [idx for idx, ids in enumerate(state.court_player_ids) if not ids]
+    if idle and (state.ready or len(state.waiting) >= players_per_court(state.fmt)):
+        _refill(state, roster, idle)
+
+
+def complete_court(
+    registry: PlayerRegistry,
+    state: SessionState,
+    court_no: int,
+    score: tuple[int, int] | None = None,
+) -> bool:
+    """Finish the match on `court_no` (1-based), with its score if known, and refill it. Returns False if nobody could be picked."""
+    return complete_courts(registry, state, [court_no], None if score is None else {court_no: score})[0]
+
+
+def pause_attendee(state: SessionState, pid: str) -> None:
+    if pid not in state.attendee_ids:
+        raise ValueError("That player is not in the session.")
+
+    if is_on_court(state, pid):
+        raise ValueError("That player is currently on court. Pause them after their game finishes.")
+
+    state.paused_ids.add(pid)
+    _unready(state, pid)
+    if state.phase == "running":
+        _top_up(state)
+    _persist(state)
+
+
+def unpause_attendee(state: SessionState, pid: str) -> None:
+    if pid not in state.attendee_ids:
+        raise ValueError("That player is not in the session.")
+
+    if pid not in state.paused_ids:
+        raise ValueError("That player is not paused.")
+
+    state.paused_ids.discard(pid)
+
+    if state.phase == "running":
+        _enqueue(state, pid)
+        _top_up(state)
+        _fill_idle_courts(state, state.roster)
+    _persist(state)
+
+
+def end_session(state: SessionState) -> None:
+    if _journaling(state):
+        state.store.close_session(state.session_id)
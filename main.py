@@ -1,9 +1,48 @@
+"""
+Interactive club app, or a one-off player import/export:
+
+    python main.py
+    python main.py import members.csv [--format csv|jsonl]
+    python main.py export players.jsonl [--format csv|jsonl] [--fields id,first_name,surname]
+"""
+import argparse
+import sys
+
 from core.db import init_db
 from core.player import PlayerRegistry
+from core.player_io import FORMATS, export_file, import_file
 from cli.app import run
+from cli.registry_flows import print_import_result
+
+
+def _commands(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help in (("import", "load players from a CSV or JSONL file"), ("export", "write all players to a CSV or JSONL file")):
+        cmd = sub.add_parser(name, help=help)
+        cmd.add_argument("path")
+        cmd.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    sub.choices["export"].add_argument("--fields", help="comma-separated columns (default: all)")
+    args = parser.parse_args(argv)
+
+    registry = PlayerRegistry()
+    try:
+        if args.command == "import":
+            result = import_file(registry, args.path, args.format)
+            print_import_result(result)
+            return 1 if result["error_count"] else 0
+        fields = [f.strip() for f in args.fields.split(",") if f.strip()] if args.fields else None
+        count = export_file(registry, args.path, args.format, fields)
+        print(f"Exported {count} player(s) to {args.path}.")
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"{args.command} failed: {e}", file=sys.stderr)
+        return 2
 
 
 if __name__ == "__main__":
     init_db()
+    if len(sys.argv) > 1:
+        sys.exit(_commands(sys.argv[1:]))
     registry = PlayerRegistry()
-    run(registry)
\ No newline at end of file
+    run(registry)
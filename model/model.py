@@ -2,7 +2,7 @@ from dataclasses import dataclass, field
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Player:
     id:            str
     first_name:    str
@@ -59,3 +59,17 @@ class MatchResult:
     team1_ids:   list[str]
     team2_ids:   list[str]
     format:      str      
+    ranked:      bool = True   # False → K_BALANCED instead of K_RANKED
+
+
+@dataclass
+class RatingChange:
+    """Produced by the ranking engine; one per player touched by a batch of results."""
+    player_id:     str
+    elo:           float
+    boosted:       float
+    games:         int
+    wins:          int
+    losses:        int
+    streak_wins:   int
+    streak_losses: int
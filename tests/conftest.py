@@ -0,0 +1,24 @@
+import sqlite3
+
+import pytest
+
+from core.db import ConnectionManager
+from core.migrations import migrate
+from core.player import PlayerRegistry
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A migrated database of its own for each test."""
+    path = tmp_path / "club.db"
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.close()
+    manager = ConnectionManager(path)
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def registry(db):
+    return PlayerRegistry(db)
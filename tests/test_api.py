@@ -0,0 +1,29 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from core import api, db as core_db
+from core.async_player import AsyncPlayerRegistry
+
+
+@pytest.fixture
+def client(db, registry, monkeypatch):
+    """The API app, serving the test database."""
+    monkeypatch.setattr(core_db, "_manager", db)
+    monkeypatch.setattr(api, "registry", AsyncPlayerRegistry(registry))
+    with TestClient(api.app) as client:
+        yield client
+
+
+@pytest.mark.parametrize(
+    "batch, status, created, errors",
+    [
+        ([{"first_name": "Ada", "surname": "Lovelace"}], 201, 1, 0),
+        ([{"first_name": "Ada", "surname": "Lovelace"}, {"first_name": "Alan", "surname": ""}], 207, 1, 1),
+        ([{"first_name": "Ada", "surname": "Lovelace", "rating": "Z"}], 400, 0, 1),
+    ],
+)
+def test_bulk_create_status(client, batch, status, created, errors):
+    response = client.post("/players/bulk", json=batch)
+    assert response.status_code == status
+    body = response.json()
+    assert (len(body["created"]), len(body["errors"])) == (created, errors)
@@ -0,0 +1,33 @@
+import asyncio
+import threading
+
+from core.async_player import AsyncPlayerRegistry
+
+
+def test_stream_cancelled_mid_chunk_closes_rows(registry):
+    reading, release = threading.Event(), threading.Event()
+    closed = []
+
+    def rows():
+        try:
+            reading.set()
+            release.wait()
+            yield {"id": "P1"}
+        finally:
+            closed.append(threading.current_thread().name)
+
+    async def main():
+        players = AsyncPlayerRegistry(registry, read_workers=1)
+        stream = players._stream(rows())
+        task = asyncio.ensure_future(stream.__anext__())
+        await asyncio.get_running_loop().run_in_executor(None, reading.wait)
+        task.cancel()
+        threading.Timer(0.05, release.set).start()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        players.close()
+
+    asyncio.run(main())
+    assert len(closed) == 1 and closed[0].startswith("db-read")
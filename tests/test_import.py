@@ -0,0 +1,21 @@
+def _rows(*names):
+    return [(n, {"first_name": first, "surname": surname}) for n, (first, surname) in enumerate(names, start=1)]
+
+
+def test_imported_players_are_searchable(registry):
+    result = registry.import_players(_rows(("Ada", "Lovelace"), ("Alan", "Turing")))
+    assert result["imported"] == 2
+    assert [p["surname"] for p in registry.search("turi")] == ["Turing"]
+
+    # The per-row trigger is back for players added afterwards.
+    registry.register_player("Grace", "Hopper")
+    assert [p["surname"] for p in registry.search("hopp")] == ["Hopper"]
+
+
+def test_import_without_search_trigger(db, registry):
+    with db.write() as conn:
+        conn.execute("DROP TRIGGER trg_players_search_insert")
+
+    assert registry.import_players(_rows(("Ada", "Lovelace")))["imported"] == 1
+    with db.read() as conn:
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'trg_players_search_insert'").fetchone() is None
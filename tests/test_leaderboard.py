@@ -0,0 +1,67 @@
+import random
+
+from core.leaderboard import Leaderboard, OrderedKeys, grade_band, grade_for_elo
+
+
+def test_ordered_keys_match_a_sorted_list():
+    rng = random.Random(1)
+    keys = OrderedKeys(rng.sample(range(1000), 50), block_size=4)
+    expected = sorted(keys.slice(0, 50))
+    for _ in range(2000):
+        key = rng.randrange(1000)
+        if key in expected:
+            keys.remove(key)
+            expected.remove(key)
+        else:
+            keys.add(key)
+            expected.append(key)
+            expected.sort()
+        probe = rng.randrange(1001)
+        assert keys.index_of(probe) == sum(k < probe for k in expected)
+        start = rng.randrange(len(expected) + 1)
+        assert list(keys.slice(start, start + 7)) == expected[start : start + 7]
+    assert len(keys) == len(expected)
+
+
+def _brute_ranks(elos):
+    ordered = sorted(elos.items(), key=lambda item: (-item[1], item[0]))
+    return [(1 + sum(e > elo for e in elos.values()), pid, elo) for pid, elo in ordered]
+
+
+def test_pages_and_ranks_match_brute_force():
+    rng = random.Random(2)
+    elos = {f"P{i:03d}": float(rng.choice(range(1200, 1800, 25))) for i in range(300)}  # plenty of ties
+    board = Leaderboard(block_size=8)
+    board.load(1, elos.items())
+
+    for step in range(200):
+        pid = f"P{rng.randrange(320):03d}"
+        value = None if rng.random() < 0.1 else float(rng.choice(range(1200, 1800, 25)))
+        board.apply({pid: value}, before=step + 1, after=step + 2)
+        if value is None:
+            elos.pop(pid, None)
+        else:
+            elos[pid] = value
+
+    expected = _brute_ranks(elos)
+    assert board.page(0, len(elos) + 5) == (expected, len(elos))
+    assert board.page(37, 20)[0] == expected[37:57]
+
+    for pid in rng.sample(sorted(elos), 20):
+        rank = board.rank(pid)
+        grade = grade_for_elo(elos[pid])
+        low, high = grade_band(grade)
+        band = {p: e for p, e in elos.items() if low <= e < high}
+        assert rank["rank"] == 1 + sum(e > elos[pid] for e in elos.values())
+        assert (rank["grade"], rank["grade_players"]) == (grade, len(band))
+        assert rank["grade_rank"] == 1 + sum(e > elos[pid] for e in band.values())
+        assert board.page(0, len(band), grade)[0] == [
+            (r - sum(e >= high for e in elos.values()), p, e) for r, p, e in expected if low <= e < high
+        ]
+
+
+def test_write_from_elsewhere_forces_reload():
+    board = Leaderboard()
+    board.load(5, [("a", 1500.0)])
+    board.apply({"a": 1600.0}, before=6, after=7)
+    assert board.version is None
@@ -0,0 +1,27 @@
+import random
+
+from engine.matchmaking import _group_cost, _optimise_groups, make_balanced_doubles
+
+
+def _players(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        {"id": f"P{i:03d}", "first_name": f"First{i}", "surname": f"Surname{i}", "boosted": rng.gauss(1500, 250)}
+        for i in range(n)
+    ]
+
+
+def test_same_seed_gives_same_matches():
+    players = _players(120)
+    first = make_balanced_doubles(players, seed=7, courts=30)
+    assert all(make_balanced_doubles(players, seed=7, courts=30) == first for _ in range(3))
+
+
+def test_swap_checks_are_bounded():
+    elos = sorted((p["boosted"] for p in _players(80)), reverse=True)
+    assert _optimise_groups(elos, 0) == [list(range(i, i + 4)) for i in range(0, 80, 4)]
+
+    def total(groups):
+        return sum(_group_cost(elos, g) for g in groups)
+
+    assert total(_optimise_groups(elos, 10_000)) <= total(_optimise_groups(elos, 5)) <= total(_optimise_groups(elos, 0))
@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+from core.migrations import MIGRATIONS, SCHEMA_VERSION, migrate, schema_version
+
+
+def _at_version(path, version):
+    conn = sqlite3.connect(path)
+    for _, step in MIGRATIONS[:version]:
+        step(conn)
+    conn.execute(f"PRAGMA user_version = {version}")
+    conn.commit()
+    return conn
+
+
+def test_rated_flag_backfilled_from_rating_batches(tmp_path):
+    conn = _at_version(tmp_path / "club.db", 3)
+    conn.execute("INSERT INTO sessions (id, date, start_time, end_time) VALUES ('s1', '2026-01-01', '19:00', '')")
+    conn.execute("INSERT INTO courts (session_id, court_number) VALUES ('s1', 1)")
+    for n, status in enumerate(("completed", "completed", "in_progress", "completed"), start=1):
+        conn.execute(
+            """INSERT INTO matches (rowid, id, session_id, court_id, format, team1_ids, team2_ids, status)
+            VALUES (?, ?, 's1', 1, 'singles', 'a', 'b', ?)""",
+            (n, f"m{n}", status),
+        )
+    conn.execute("INSERT INTO rating_batches (seq, last_seq, session_id) VALUES (1, 2, 's1')")
+    conn.commit()
+
+    assert migrate(conn) == [name for name, _ in MIGRATIONS[3:]]
+    assert schema_version(conn) == SCHEMA_VERSION
+    rated = dict(conn.execute("SELECT id, rated FROM matches"))
+    assert rated == {"m1": 1, "m2": 1, "m3": 0, "m4": 0}
+    conn.close()
+
+
+def test_fresh_database_migrates_once(tmp_path):
+    conn = sqlite3.connect(tmp_path / "club.db")
+    assert migrate(conn) == [name for name, _ in MIGRATIONS]
+    assert schema_version(conn) == SCHEMA_VERSION
+    assert migrate(conn) == []
+    conn.close()
+
+
+def test_newer_database_is_refused(tmp_path):
+    conn = sqlite3.connect(tmp_path / "club.db")
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    with pytest.raises(RuntimeError):
+        migrate(conn)
+    conn.close()
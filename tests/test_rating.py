@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from core.constants import K_RANKED
+from engine.rating import rate_batch, rate_batch_numpy, rate_batch_python
+from model.model import MatchResult
+
+
+def _player(pid, elo, boosted=None):
+    return {"id": pid, "elo": elo, "boosted": boosted if boosted is not None else elo, "streak_wins": 0, "streak_losses": 0}
+
+
+def test_even_singles_winner_takes_half_k():
+    players = {"a": _player("a", 1500), "b": _player("b", 1500)}
+    changes = rate_batch([MatchResult("m1", 1, ["a"], ["b"], "singles")], players)
+    assert changes["a"].elo == pytest.approx(1500 + K_RANKED / 2)
+    assert changes["b"].elo == pytest.approx(1500 - K_RANKED / 2)
+    assert (changes["a"].wins, changes["a"].streak_wins) == (1, 1)
+    assert (changes["b"].losses, changes["b"].streak_losses) == (1, 1)
+
+
+def test_numpy_matches_python_and_is_zero_sum():
+    rng = random.Random(3)
+    players = {f"P{i}": _player(f"P{i}", rng.gauss(1500, 250), rng.gauss(1500, 250)) for i in range(40)}
+    ids = list(players)
+    results = []
+    for m in range(60):
+        fmt = "doubles" if m % 3 else "singles"
+        picked = rng.sample(ids, 4 if fmt == "doubles" else 2)
+        half = len(picked) // 2
+        results.append(MatchResult(f"m{m}", rng.choice((1, 2)), picked[:half], picked[half:], fmt, ranked=m % 5 != 0))
+
+    python, numpy = rate_batch_python(results, players), rate_batch_numpy(results, players)
+    assert python.keys() == numpy.keys()
+    for pid, change in python.items():
+        other = numpy[pid]
+        assert (other.elo, other.boosted) == pytest.approx((change.elo, change.boosted))
+        assert (other.games, other.wins, other.losses, other.streak_wins, other.streak_losses) == (
+            change.games, change.wins, change.losses, change.streak_wins, change.streak_losses,
+        )
+    assert sum(c.elo - players[pid]["elo"] for pid, c in python.items()) == pytest.approx(0, abs=1e-6)
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        MatchResult("m1", 3, ["a"], ["b"], "singles"),
+        MatchResult("m1", 1, ["a"], ["b"], "doubles"),
+        MatchResult("m1", 1, ["a"], ["a"], "singles"),
+        MatchResult("m1", 1, ["a"], ["zz"], "singles"),
+    ],
+)
+def test_invalid_results_rejected(result):
+    with pytest.raises(ValueError):
+        rate_batch([result], {"a": _player("a", 1500), "b": _player("b", 1500)})
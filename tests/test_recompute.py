@@ -0,0 +1,40 @@
+from core.player import RATING_FIELDS
+from engine.recompute import recompute_ratings
+
+
+def _ratings(registry, ids):
+    return {pid: tuple(registry.get_player(player_id=pid)[0][f] for f in RATING_FIELDS) for pid in ids}
+
+
+def test_match_completed_out_of_rowid_order_is_rated(db, registry):
+    ids = [registry.register_player(f"P{i}", "Test")["id"] for i in range(4)]
+    with db.write() as conn:
+        conn.execute("INSERT INTO sessions (id, date, start_time, end_time) VALUES ('s1', '2026-01-01', '19:00', '')")
+        conn.execute("INSERT INTO courts (session_id, court_number) VALUES ('s1', 1), ('s1', 2)")
+        for match_id, court, (a, b) in (("m1", 1, (0, 1)), ("m2", 2, (2, 3))):
+            conn.execute(
+                """INSERT INTO matches (id, session_id, court_id, format, team1_ids, team2_ids, status)
+                VALUES (?, 's1', ?, 'singles', ?, ?, 'in_progress')""",
+                (match_id, court, ids[a], ids[b]),
+            )
+            conn.executemany(
+                "INSERT INTO match_players (match_id, player_id, team) VALUES (?, ?, ?)",
+                [(match_id, ids[a], 1), (match_id, ids[b], 2)],
+            )
+
+    def complete(match_id):
+        with db.write() as conn:
+            conn.execute("UPDATE matches SET status = 'completed', score_team1 = 21, score_team2 = 15 WHERE id = ?", (match_id,))
+
+    # Court 2 finishes first and is rated before court 1's earlier-created match completes.
+    complete("m2")
+    assert recompute_ratings(registry).matches == 1
+    complete("m1")
+    summary = recompute_ratings(registry)
+    assert summary.matches == 2
+    incremental = _ratings(registry, ids)
+    assert registry.get_player(player_id=ids[0])[0]["total_wins"] == 1
+
+    assert recompute_ratings(registry).start_seq is None
+    recompute_ratings(registry, full=True)
+    assert _ratings(registry, ids) == incremental
@@ -0,0 +1,69 @@
+import random
+
+from engine.rotation import ReadyQueue, RotationQueue
+
+
+def _queue(*players):
+    queue, rng = RotationQueue(), random.Random(0)
+    for pid, games in players:
+        queue.push(pid, games, rng)
+    return queue
+
+
+def test_fewest_games_then_longest_waiting():
+    queue = _queue(("a", 2), ("b", 1), ("c", 1), ("d", 0))
+    assert queue.pop_many(3) == ["d", "b", "c"]
+    assert queue.pop_many(2) == []
+    assert list(queue) == ["a"]
+
+
+def test_removed_players_are_skipped():
+    queue = _queue(*((f"p{i}", 0) for i in range(100)))
+    for i in range(0, 100, 2):
+        assert queue.remove(f"p{i}")
+    assert not queue.remove("p0")
+    assert queue.pop_many(3) == ["p1", "p3", "p5"]
+    assert len(queue) == 47
+
+
+def test_take_group_and_put_back_keep_places():
+    queue = _queue(*((f"p{i}", 0) for i in range(8)), ("late", 1))
+    taken = queue.take_group(2, 3, lambda candidates: [candidates[0], candidates[3]])
+    assert [entry[3] for entry in taken] == ["p0", "p3"]
+    assert queue.pop_many(2) == ["p1", "p2"]
+    queue.put_back(taken)
+    assert queue.pop_many(3) == ["p0", "p3", "p4"]
+
+
+def test_snapshot_restores_pick_order():
+    queue = _queue(("a", 1), ("b", 0), ("c", 1), ("d", 0))
+    queue.remove("d")
+    restored = RotationQueue.restore(queue.snapshot())
+    assert restored.pop_many(3) == queue.pop_many(3) == ["b", "a", "c"]
+
+
+def test_late_arrival_reopens_matches_behind_them():
+    waiting, rng = RotationQueue(), random.Random(0)
+    for i in range(8):
+        waiting.push(f"p{i}", 1, rng)
+    ready = ReadyQueue()
+    for _ in range(2):
+        entries = waiting.take_group(4, 0, lambda candidates: candidates)
+        ready.append(tuple(entry[3] for entry in entries), entries)
+
+    ready.joined(waiting.push("late", 0, rng), waiting)
+    assert len(ready) == 0
+    assert waiting.pop_many(5) == ["late", "p0", "p1", "p2", "p3"]
+
+
+def test_discard_leaves_earlier_matches():
+    waiting = _queue(*((f"p{i}", 0) for i in range(8)))
+    ready = ReadyQueue()
+    for _ in range(2):
+        entries = waiting.take_group(4, 0, lambda candidates: candidates)
+        ready.append(tuple(entry[3] for entry in entries), entries)
+
+    assert ready.discard("p5", waiting)
+    assert not ready.discard("p5", waiting)
+    assert list(ready) == [("p0", "p1", "p2", "p3")]
+    assert list(waiting) == ["p4", "p5", "p6", "p7"]
@@ -0,0 +1,45 @@
+import pytest
+
+from core.player import _edit_distance
+
+
+@pytest.fixture
+def club(registry):
+    for first, surname in [("John", "Smith"), ("Jane", "Doe"), ("Joan", "Smithers"), ("Mike", "Jones")]:
+        registry.register_player(first, surname)
+    return registry
+
+
+def names(rows):
+    return [f"{r['first_name']} {r['surname']}" for r in rows]
+
+
+def test_prefix_and_substring(club):
+    assert sorted(names(club.search("jo sm"))) == ["Joan Smithers", "John Smith"]
+    assert "John Smith" in names(club.search("mit"))
+
+
+def test_exact_id_first(club):
+    pid = club.search("Mike")[0]["id"]
+    assert club.search(pid)[0]["id"] == pid
+
+
+@pytest.mark.parametrize("query, expected", [("jonh", "John Smith"), ("jhon", "John Smith"), ("smtih", "John Smith"), ("smth", "John Smith")])
+def test_typos_in_short_words(club, query, expected):
+    assert names(club.search(query))[0] == expected
+
+
+def test_unrelated_query_finds_nobody(club):
+    assert club.search("xyzzy") == []
+
+
+def test_rejects_bad_arguments(club):
+    with pytest.raises(ValueError):
+        club.search("  ")
+    with pytest.raises(ValueError):
+        club.search("jo", limit=0)
+
+
+@pytest.mark.parametrize("a, b, edits", [("john", "john", 0), ("jonh", "john", 1), ("smth", "smith", 1), ("kitten", "sitting", 3)])
+def test_edit_distance(a, b, edits):
+    assert _edit_distance(a, b) == edits
@@ -0,0 +1,47 @@
+import pytest
+
+from core.session_store import SessionStore
+from engine.recompute import recompute_ratings
+from engine.session import SessionState, add_attendees, complete_court, complete_courts, start_session
+
+
+@pytest.fixture
+def night(db, registry):
+    """A running singles night on two courts, journalled to the test database."""
+    players = [registry.register_player(f"P{i}", "Test") for i in range(4)]
+    store = SessionStore(db)
+    state = SessionState(session_id=store.open_session(), store=store)
+    add_attendees(state, players)
+    start_session(registry, state, "s", 2, 0)
+    yield state
+    store.close()
+
+
+def test_score_is_recorded_and_rated(db, registry, night):
+    winner, loser = night.court_player_ids[0]
+    complete_court(registry, night, 1, (21, 17))
+    complete_courts(registry, night, [2])
+    night.store.journal.flush()
+
+    with db.read() as conn:
+        rows = conn.execute("SELECT score_team1, score_team2 FROM matches WHERE status = 'completed' ORDER BY rowid").fetchall()
+    assert [tuple(r) for r in rows] == [(21, 17), (None, None)]
+
+    assert recompute_ratings(registry).matches == 1
+    assert registry.get_player(player_id=winner)[0]["total_wins"] == 1
+    assert registry.get_player(player_id=loser)[0]["total_losses"] == 1
+
+
+@pytest.mark.parametrize(
+    "courts, scores",
+    [
+        ([1], {1: (21, 21)}),   # no winner
+        ([1], {1: (21, -3)}),
+        ([1], {2: (21, 17)}),   # court 2 isn't being completed
+    ],
+)
+def test_bad_score_leaves_courts_untouched(registry, night, courts, scores):
+    before = list(night.court_player_ids)
+    with pytest.raises(ValueError):
+        complete_courts(registry, night, courts, scores)
+    assert night.court_player_ids == before
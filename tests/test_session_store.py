@@ -0,0 +1,73 @@
+import threading
+
+from core.session_store import SessionJournal, SessionStore
+
+INSERT_SESSION = "INSERT INTO sessions (id, date, start_time, end_time, status) VALUES (?, '2026-01-01', '19:00', '', 'open')"
+
+
+def session_ids(db):
+    with db.read() as conn:
+        return {row[0] for row in conn.execute("SELECT id FROM sessions")}
+
+
+def test_flush_commits_everything_queued(db):
+    journal = SessionJournal(db, flush_interval=60)
+    try:
+        journal.execute(INSERT_SESSION, ("a",))
+        journal.flush()
+        assert session_ids(db) == {"a"}
+        journal.flush()  # nothing queued: returns straight away
+    finally:
+        journal.close()
+
+
+def test_flush_waits_for_ops_queued_during_a_commit(db):
+    journal = SessionJournal(db, flush_interval=60)
+    gates = [threading.Event(), threading.Event()]  # hold the first two batches
+    batches = iter(gates)
+    committing = threading.Event()
+    real_commit = journal._commit
+
+    def slow_commit(ops, snapshots):
+        gate = next(batches, None)
+        committing.set()
+        if gate is not None:
+            gate.wait(5)
+        real_commit(ops, snapshots)
+
+    journal._commit = slow_commit
+    try:
+        journal.execute(INSERT_SESSION, ("first",))
+        threading.Thread(target=journal.flush).start()
+        assert committing.wait(5)  # the writer holds a batch with "first" only
+
+        journal.execute(INSERT_SESSION, ("second",))
+        flushed = threading.Event()
+        threading.Thread(target=lambda: (journal.flush(), flushed.set())).start()
+        gates[0].set()
+        assert not flushed.wait(0.3)  # "second" is in the next batch, still held
+        gates[1].set()
+        assert flushed.wait(5)
+        assert session_ids(db) == {"first", "second"}
+    finally:
+        for gate in gates:
+            gate.set()
+        journal.close()
+
+
+def test_failed_statement_does_not_lose_the_rest_of_the_batch(db):
+    store = SessionStore(db, SessionJournal(db, flush_interval=60))
+    try:
+        store.journal.execute(INSERT_SESSION, ("a",))
+        store.journal.execute(INSERT_SESSION, ("a",))  # duplicate key
+        store.journal.execute(INSERT_SESSION, ("b",))
+        store.save_snapshot("a", {"phase": "lobby"})
+        store.journal.flush()
+
+        assert session_ids(db) == {"a", "b"}
+        with db.read() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM session_snapshots").fetchone()[0] == 1
+        [(sql, params, error)] = store.failed_writes()
+        assert params == ("a",) and "UNIQUE" in error
+    finally:
+        store.close()